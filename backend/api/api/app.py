@@ -1,16 +1,19 @@
 """
 SpecWeaver API - FastAPI backend
 """
-from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, BackgroundTasks, UploadFile, File, Form, Request
 from starlette.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Literal
 from pathlib import Path
 import json
 import uuid
+import asyncio
+import contextlib
+import time
 from datetime import datetime
 import logging
 import sys
@@ -21,10 +24,15 @@ import difflib
 sys.path.append(str(Path(__file__).parent.parent / "core"))
 
 from core.schemas import RequirementGraph, TestSuite, ExecutionConfig
-from core.llm_orchestrator import LLMOrchestrator
-from core.requirement_parser import RequirementParser
+from core.components import components
 from core.test_generator import TestCaseGenerator
-from core.code_synthesizer import CodeSynthesizer
+from core.browser_pool import browser_pool
+from core.scrape_cache import scrape_cache
+from core.run_store import run_store, migrate_json_artifacts
+from core.metrics_log import metrics_log, run_summary
+from core.run_events import run_events, TERMINAL_STATUSES, STATUS_FIELDS
+from core.streaming_subprocess import run_streaming
+from core.test_sharding import default_shard_count, prepare_shards, shard_plan, run_sharded, run_timeout
 
 # Setup
 app = FastAPI(title="SpecWeaver API", version="1.0.0")
@@ -52,62 +60,54 @@ app.mount("/reports", StaticFiles(directory=str(reports_dir)), name="reports")
 ARTIFACTS_DIR = Path("artifacts")
 ARTIFACTS_DIR.mkdir(exist_ok=True)
 
-# In-memory store (would use Redis/DB in production)
-sessions: Dict[str, Any] = {}
-test_runs: Dict[str, Any] = {}
-RUNS_FILE = ARTIFACTS_DIR / "run_status.json"
-
-
-def _serialize_run(run: Dict[str, Any]) -> Dict[str, Any]:
-    out = run.copy()
-    for k in ["created_at", "started_at", "completed_at"]:
-        if isinstance(out.get(k), datetime):
-            out[k] = out[k].isoformat()
-    return out
-
-
-def _save_runs() -> None:
-    try:
-        RUNS_FILE.write_text(json.dumps({k: _serialize_run(v) for k, v in test_runs.items()}, indent=2))
-    except Exception:
-        logger.exception("Failed to persist run status")
-
-
-def _load_runs() -> None:
-    if RUNS_FILE.exists():
+# Seconds between SSE keepalive comments on idle run event streams
+RUN_EVENTS_HEARTBEAT_SECONDS = 15
+# In-process run events never see RQ workers' runs; their status is polled from the run store
+RUN_STATUS_POLL_SECONDS = 2
+
+class SessionCache(dict):
+    """
+    Sessions by id, cached in memory over run_store: misses load from the store so
+    sessions survive restarts, assignments are written through, and in-place
+    changes are persisted with save()
+    """
+    
+    def __missing__(self, session_id: str) -> Dict[str, Any]:
+        record = run_store.load_session(session_id)
+        if record is None:
+            raise KeyError(session_id)
+        session = dict(record)
+        session["requirement"] = RequirementGraph.model_validate(record["requirement"])
+        if record.get("test_suite"):
+            session["test_suite"] = TestSuite.model_validate(record["test_suite"])
+        if record.get("created_at"):
+            session["created_at"] = datetime.fromisoformat(record["created_at"])
+        dict.__setitem__(self, session_id, session)
+        return session
+    
+    def __contains__(self, session_id: object) -> bool:
+        return self.get(session_id) is not None
+    
+    def get(self, session_id, default=None):
+        try:
+            return self[session_id]
+        except KeyError:
+            return default
+    
+    def __setitem__(self, session_id: str, session: Dict[str, Any]) -> None:
+        dict.__setitem__(self, session_id, session)
+        self.save(session_id)
+    
+    def save(self, session_id: str) -> None:
+        record = {key: value.model_dump(mode="json") if hasattr(value, "model_dump") else value
+                  for key, value in self[session_id].items()}
         try:
-            data = json.loads(RUNS_FILE.read_text())
-            for k, v in data.items():
-                for ts in ["created_at", "started_at", "completed_at"]:
-                    if v.get(ts):
-                        v[ts] = datetime.fromisoformat(v[ts])
-            test_runs.update(data)
+            run_store.save_session(session_id, record)
         except Exception:
-            logger.exception("Failed to load run status")
-
-
-def _append_metrics(summary: Dict[str, Any]) -> None:
-    metrics_file = ARTIFACTS_DIR / "metrics.json"
-    try:
-        if metrics_file.exists():
-            arr = json.loads(metrics_file.read_text())
-        else:
-            arr = []
-        arr.append(summary)
-        metrics_file.write_text(json.dumps(arr, indent=2))
-    except Exception:
-        logger.exception("Failed to append metrics")
+            logger.exception(f"Failed to persist session {session_id}")
 
 
-def _read_metrics_history() -> List[Dict[str, Any]]:
-    metrics_file = ARTIFACTS_DIR / "metrics.json"
-    if not metrics_file.exists():
-        return []
-    try:
-        return json.loads(metrics_file.read_text())
-    except Exception:
-        logger.exception("Failed to read metrics history")
-        return []
+sessions = SessionCache()
 
 
 class RequirementUpload(BaseModel):
@@ -117,12 +117,31 @@ class RequirementUpload(BaseModel):
     tags: Optional[List[str]] = []
 
 
+class BatchStory(BaseModel):
+    """One story inside a batch upload"""
+    id: Optional[str] = None
+    story_text: str
+    domain: Optional[str] = None
+    tags: Optional[List[str]] = []
+
+
+class BatchRequirementUpload(BaseModel):
+    """Request to parse many requirements at once"""
+    stories: List[BatchStory]
+    max_parallel: int = 4
+    batch_id: Optional[str] = None  # pass a previous batch_id to resume it
+
+
 class GenerateRequest(BaseModel):
     """Request to generate test cases"""
     requirement_id: str
     coverage: str = "comprehensive"
     domain_pack: Optional[str] = None
     allow_duplicates: bool = False
+    readiness: Optional[Literal["adaptive", "networkidle"]] = None  # page readiness for URL scraping
+    scrape_profile: Optional[Literal["full", "lightweight", "dom_only"]] = None  # requests blocked while scraping
+    scrape_offline: Optional[bool] = None  # generate from cached page snapshots only
+    scrape_backend: Optional[Literal["auto", "browser", "parser"]] = None  # parser reads HTML without a browser
 
 
 class ApprovalRequest(BaseModel):
@@ -141,6 +160,30 @@ class RunRequest(BaseModel):
     api_mode: str = "mock"
     tags: Optional[List[str]] = []
     auto_pr: bool = False
+    parallel: bool = True  # as ExecutionConfig.parallel; False always runs one pytest process
+    shards: Optional[int] = None  # defaults to PARALLEL_WORKERS
+    shard_mode: Literal["local", "rq"] = "local"  # rq: one RQ job per shard (needs an RQ worker pool)
+
+
+def _shard_count(req: RunRequest) -> int:
+    return max(1, req.shards or default_shard_count()) if req.parallel else 1
+
+
+@app.on_event("startup")
+async def warm_components():
+    """Build shared pipeline components before the first request, import legacy JSON run data and watch config/ for changes"""
+    await run_in_threadpool(components.warmup)
+    await run_in_threadpool(migrate_json_artifacts, run_store, metrics_log, ARTIFACTS_DIR)
+    if os.getenv("CONFIG_HOT_RELOAD", "true").lower() != "false":
+        components.start_watching()
+    if os.getenv("BROWSER_POOL_WARMUP", "false").lower() == "true":
+        await run_in_threadpool(browser_pool.warmup)
+
+
+@app.on_event("shutdown")
+async def stop_component_watcher():
+    components.stop_watching()
+    await run_in_threadpool(browser_pool.close)
 
 
 @app.get("/")
@@ -157,9 +200,7 @@ async def upload_requirement(req: RequirementUpload):
         session_id = str(uuid.uuid4())
         
         # Parse requirement
-        orchestrator = LLMOrchestrator()
-        parser = RequirementParser(orchestrator)
-        requirement = parser.parse(story_text=req.story_text)
+        requirement = await run_in_threadpool(components.parser.parse, story_text=req.story_text)
         
         # Add domain if provided
         if req.domain:
@@ -235,6 +276,100 @@ async def upload_requirement_file(
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/api/requirements/batch")
+async def upload_requirement_batch(req: BatchRequirementUpload):
+    """Parse many requirements concurrently, streaming one JSON line per story as it completes"""
+    batch_id = req.batch_id or str(uuid.uuid4())
+    if Path(batch_id).name != batch_id:
+        raise HTTPException(status_code=400, detail="Invalid batch_id")
+    checkpoint = ARTIFACTS_DIR / "batches" / f"{batch_id}.jsonl"
+    stories = {story.id or f"story-{i + 1}": story for i, story in enumerate(req.stories)}
+    parser = components.batch_parser
+
+    def results():
+        pairs = ((story_id, story.story_text) for story_id, story in stories.items())
+        for result in parser.parse_many(pairs, max_workers=max(1, req.max_parallel), checkpoint_path=checkpoint):
+            if result["status"] == "ok":
+                story = stories[result["story_id"]]
+                requirement = RequirementGraph(**result["requirement"])
+                if story.domain:
+                    requirement.domain = story.domain
+                if story.tags:
+                    requirement.tags.extend(story.tags)
+                session_id = str(uuid.uuid4())
+                req_dir = ARTIFACTS_DIR / session_id
+                req_dir.mkdir(exist_ok=True)
+                (req_dir / "requirement_graph.json").write_text(requirement.model_dump_json(indent=2))
+                sessions[session_id] = {
+                    "requirement": requirement,
+                    "created_at": datetime.utcnow(),
+                    "status": "parsed",
+                    "raw_text": story.story_text
+                }
+                result = {**result, "session_id": session_id, "requirement": json.loads(requirement.model_dump_json())}
+            yield json.dumps({"batch_id": batch_id, **result}) + "\n"
+
+    # Sync generator: Starlette iterates it in the threadpool
+    return StreamingResponse(results(), media_type="application/x-ndjson", headers={"X-Batch-Id": batch_id})
+
+
+def _store_generated_suite(session_id: str, test_suite: TestSuite, allow_duplicates: bool) -> Dict[str, Any]:
+    """Persist a generated suite, run the reuse scan and build the API payload"""
+    # Save to artifacts
+    suite_file = ARTIFACTS_DIR / session_id / "test_cases.json"
+    suite_file.write_text(test_suite.model_dump_json(indent=2))
+    
+    # Reuse scan
+    duplicates: List[Dict[str, Any]] = []
+    try:
+        from core.utils.reuse_scanner import find_equivalent_tests
+        duplicates = find_equivalent_tests(suite_file, Path("tests"))
+    except Exception:
+        logger.exception("Reuse scan failed")
+
+    if duplicates and not allow_duplicates:
+        raise HTTPException(status_code=409, detail={"duplicates": duplicates})
+
+    # Update session
+    sessions[session_id]["test_suite"] = test_suite
+    sessions[session_id]["status"] = "generated"
+    sessions.save(session_id)
+    
+    return {
+        "session_id": session_id,
+        "test_count": len(test_suite.test_cases),
+        "coverage": test_suite.coverage_metrics,
+        "test_cases": [
+            {
+                "id": tc.id,
+                "title": tc.title,
+                "type": tc.type,
+                "priority": tc.priority,
+                "trace_to": tc.traceTo,
+                "preconditions": tc.preconditions,
+                "data": tc.data,  # includes raw_steps/examples if present
+            }
+            for tc in test_suite.test_cases
+        ],
+        "duplicates": duplicates
+    }
+
+
+def _generator(readiness: Optional[str], scrape_profile: Optional[str], scrape_offline: Optional[bool],
+               scrape_backend: Optional[str]) -> TestCaseGenerator:
+    """A test generator with the request's scrape options over the configured ones"""
+    generator = components.generator()
+    if readiness:
+        generator.scrape_options["readiness"] = readiness
+    if scrape_profile:
+        generator.scrape_options["profile"] = scrape_profile
+    if scrape_offline is not None:
+        generator.scrape_options["offline"] = scrape_offline
+    if scrape_backend:
+        generator.scrape_options["backend"] = scrape_backend
+    return generator
+
+
 @app.post("/api/requirements/{session_id}/generate")
 async def generate_test_cases(session_id: str, req: GenerateRequest):
     """Generate test cases from requirement"""
@@ -249,52 +384,63 @@ async def generate_test_cases(session_id: str, req: GenerateRequest):
             requirement.raw_text = raw_text  # type: ignore
         
         # Generate test cases (threadpool to avoid event loop conflicts)
-        orchestrator = LLMOrchestrator()
-        generator = TestCaseGenerator(orchestrator)
+        generator = _generator(req.readiness, req.scrape_profile, req.scrape_offline, req.scrape_backend)
         test_suite = await run_in_threadpool(generator.generate, requirement, req.coverage)
         
-        # Save to artifacts
-        suite_file = ARTIFACTS_DIR / session_id / "test_cases.json"
-        suite_file.write_text(test_suite.model_dump_json(indent=2))
-        
-        # Reuse scan
-        duplicates: List[Dict[str, Any]] = []
-        try:
-            from core.utils.reuse_scanner import find_equivalent_tests
-            duplicates = find_equivalent_tests(suite_file, Path("tests"))
-        except Exception:
-            logger.exception("Reuse scan failed")
-
-        if duplicates and not req.allow_duplicates:
-            raise HTTPException(status_code=409, detail={"duplicates": duplicates})
-
-        # Update session
-        sessions[session_id]["test_suite"] = test_suite
-        sessions[session_id]["status"] = "generated"
-        
-        return {
-            "session_id": session_id,
-            "test_count": len(test_suite.test_cases),
-            "coverage": test_suite.coverage_metrics,
-            "test_cases": [
-                {
-                    "id": tc.id,
-                    "title": tc.title,
-                    "type": tc.type,
-                    "priority": tc.priority,
-                    "trace_to": tc.traceTo,
-                    "preconditions": tc.preconditions,
-                    "data": tc.data,  # includes raw_steps/examples if present
-                }
-                for tc in test_suite.test_cases
-            ],
-            "duplicates": duplicates
-        }
+        return _store_generated_suite(session_id, test_suite, req.allow_duplicates)
     except Exception as e:
         logger.error(f"Failed to generate test cases: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data: Any, event_id: Optional[int] = None) -> str:
+    """Format one server-sent event"""
+    prefix = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{prefix}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+@app.get("/api/requirements/{session_id}/generate/stream")
+async def stream_test_cases(session_id: str,
+                            coverage: str = "comprehensive",
+                            allow_duplicates: bool = False,
+                            readiness: Optional[Literal["adaptive", "networkidle"]] = None,
+                            scrape_profile: Optional[Literal["full", "lightweight", "dom_only"]] = None,
+                            scrape_offline: Optional[bool] = None,
+                            scrape_backend: Optional[Literal["auto", "browser", "parser"]] = None):
+    """Generate test cases and push features/scenarios as server-sent events as the LLM writes them"""
+    if session_id not in sessions:
+        raise HTTPException(status_code=404, detail="Session not found")
+    
+    requirement = sessions[session_id]["requirement"]
+    raw_text = sessions[session_id].get("raw_text")
+    if raw_text:
+        requirement.raw_text = raw_text  # type: ignore
+    generator = _generator(readiness, scrape_profile, scrape_offline, scrape_backend)
+    
+    async def events():
+        features: List[Dict[str, Any]] = []
+        try:
+            async for feature in generator.astream_bdd_features(requirement, coverage):
+                features.append(feature)
+                scenarios = feature.get("scenarios", [])
+                yield _sse("feature", {
+                    "index": len(features) - 1,
+                    "feature_name": feature.get("feature_name"),
+                    "scenario_count": len(scenarios)
+                })
+                for scenario in scenarios:
+                    yield _sse("scenario", {"feature_name": feature.get("feature_name"), **scenario})
+            test_suite = await run_in_threadpool(generator.build_suite, requirement, features, coverage)
+            yield _sse("done", await run_in_threadpool(_store_generated_suite, session_id, test_suite, allow_duplicates))
+        except HTTPException as e:
+            yield _sse("error", {"status_code": e.status_code, "detail": e.detail})
+        except Exception as e:
+            logger.exception("Streaming generation failed")
+            yield _sse("error", {"status_code": 500, "detail": str(e)})
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
 @app.post("/api/requirements/{session_id}/approve")
 async def approve_tests(session_id: str, req: ApprovalRequest):
     """Approve generated test cases"""
@@ -346,7 +492,7 @@ async def approve_tests(session_id: str, req: ApprovalRequest):
 
         # Generate code for approved tests with proper functional organization
         config = ExecutionConfig()
-        synthesizer = CodeSynthesizer()
+        synthesizer = components.synthesizer
         
         # Write directly to framework tests/ root (no per-session folders)
         test_dir = Path("tests")
@@ -357,6 +503,7 @@ async def approve_tests(session_id: str, req: ApprovalRequest):
         session["approved_tests"] = req.test_case_ids
         session["generated_files"] = {k: str(v) for k, v in generated_files.items()}
         session["status"] = "approved"
+        sessions.save(session_id)
         
         return {
             "session_id": session_id,
@@ -379,16 +526,17 @@ async def run_tests(req: RunRequest, background_tasks: BackgroundTasks):
     run_id = str(uuid.uuid4())
     
     # Create run record
-    test_runs[run_id] = {
+    run = run_store.update_run(run_id, {
         "id": run_id,
         "session_id": req.session_id,
         "ui_mode": req.ui_mode,
         "api_mode": req.api_mode,
         "auto_pr": req.auto_pr,
-        "requirement_id": sessions[req.session_id]["requirement"].id if req.session_id in sessions else None,
+        "requirement_id": sessions[req.session_id]["requirement"].id,
         "status": "queued",
         "created_at": datetime.utcnow()
-    }
+    })
+    run_events.status(run)
     
     # Queue background execution (RQ/Redis if available)
     # Try RQ if Redis is available, otherwise use BackgroundTasks
@@ -402,8 +550,9 @@ async def run_tests(req: RunRequest, background_tasks: BackgroundTasks):
             # Test Redis connection
             conn.ping()
             q = Queue("specweaver", connection=conn, default_timeout=3600)
-            job = q.enqueue("backend.api.worker.run_tests_job", run_id, req.session_id, req.ui_mode, req.api_mode, req.auto_pr, test_runs[run_id]["requirement_id"])
-            test_runs[run_id]["job_id"] = job.id
+            job = q.enqueue("backend.api.worker.run_tests_job", run_id, req.session_id, req.ui_mode, req.api_mode, req.auto_pr, run["requirement_id"],
+                            _shard_count(req), req.shard_mode)
+            run_store.update_run(run_id, {"job_id": job.id})
             use_rq = True
             logger.info(f"✅ Queued job {job.id} for run {run_id}")
         except Exception as e:
@@ -425,8 +574,7 @@ async def execute_tests(run_id: str, req: RunRequest):
     import subprocess
     
     try:
-        test_runs[run_id]["status"] = "running"
-        test_runs[run_id]["started_at"] = datetime.utcnow()
+        run_events.status(run_store.update_run(run_id, {"status": "running", "started_at": datetime.utcnow()}))
         
         # Run pytest from framework tests/ root
         test_dir = Path("tests")
@@ -443,183 +591,186 @@ async def execute_tests(run_id: str, req: RunRequest):
         # Ensure strict BDD by default (no generic steps)
         env = os.environ.copy()
         env.setdefault("ALLOW_GENERIC_STEPS", "0")
-        result = subprocess.run(cmd, capture_output=True, text=True, env=env)
+        # Split across local pytest processes by historical duration when sharding applies
+        shards = _shard_count(req)
+        plan = await run_in_threadpool(prepare_shards, cmd, run_id, shards, env) if shards > 1 else []
+        if len(plan) > 1:
+            run_store.update_run(run_id, {"shard_count": len(plan), "shard_plan": shard_plan(plan), "shard_mode": "local"})
+            fields = await run_in_threadpool(run_sharded, cmd, run_id, plan, env)
+        else:
+            # Output is tailed into artifacts/logs and run events as pytest writes it
+            result = await run_in_threadpool(run_streaming, [*cmd, f"--junitxml=reports/junit_{run_id}.xml"],
+                                             Path("artifacts/logs") / f"pytest_{run_id}.log", run_id=run_id, env=env,
+                                             timeout=run_timeout())
+            # Tails only; the full output stays in log_file
+            fields = {
+                "status": "completed" if result.returncode == 0 else "failed",
+                "output": result.stdout_tail,
+                "errors": result.stderr_tail,
+                "log_file": result.log_file,
+                "junit_report": f"reports/junit_{run_id}.xml",
+                "output_lines": result.line_count,
+                "output_truncated": result.truncated,
+                "exit_code": result.returncode
+            }
         
         # Update run status
-        test_runs[run_id]["status"] = "completed" if result.returncode == 0 else "failed"
-        test_runs[run_id]["completed_at"] = datetime.utcnow()
-        test_runs[run_id]["output"] = result.stdout
-        test_runs[run_id]["errors"] = result.stderr
-        test_runs[run_id]["exit_code"] = result.returncode
-        _save_runs()
+        run = run_store.update_run(run_id, {**fields, "completed_at": datetime.utcnow()})
+        run_events.status(run)
 
         # Append metrics summary
-        _append_metrics({
-            "run_id": run_id,
-            "session_id": req.session_id,
-            "status": test_runs[run_id]["status"],
-            "created_at": _serialize_run(test_runs[run_id])["created_at"],
-            "completed_at": _serialize_run(test_runs[run_id]).get("completed_at"),
-        })
+        metrics_log.record(run_summary(run))
 
         # Auto-PR on pass
-        if test_runs[run_id]["status"] == "completed" and test_runs[run_id].get("auto_pr"):
+        if run["status"] == "completed" and run.get("auto_pr"):
             try:
-                story_id = test_runs[run_id].get("requirement_id") or req.session_id
+                story_id = run.get("requirement_id") or req.session_id
                 subprocess.run(["bash", "scripts/auto_pr.sh", str(story_id)], check=False)
             except Exception:
                 logger.exception("Auto-PR script failed")
     except Exception as e:
-        test_runs[run_id]["status"] = "error"
-        test_runs[run_id]["error"] = str(e)
-        _save_runs()
+        run_events.status(run_store.update_run(run_id, {"status": "error", "error": str(e)}))
 
 
 @app.get("/api/runs/{run_id}")
 async def get_run_status(run_id: str):
     """Get test run status with logs and reports"""
-    if run_id not in test_runs:
+    run_data = run_store.get_run(run_id)
+    if run_data is None:
         raise HTTPException(status_code=404, detail="Run not found")
     
-    # Attempt to refresh from persisted file to avoid stale "queued" status
-    try:
-        if RUNS_FILE.exists():
-            data = json.loads(RUNS_FILE.read_text())
-            if run_id in data:
-                # Coerce timestamps
-                for ts in ["created_at", "started_at", "completed_at"]:
-                    if data[run_id].get(ts):
-                        try:
-                            data[run_id][ts] = datetime.fromisoformat(data[run_id][ts])
-                        except Exception:
-                            pass
-                test_runs[run_id].update(data[run_id])
-    except Exception:
-        logger.exception("Failed to refresh run status in get_run_status")
-    
-    run_data = test_runs[run_id].copy()
-    run_data['logs'] = _get_run_logs(run_id)
-    run_data['reports'] = _get_run_reports(run_id)
+    run_data['logs'] = _get_run_logs(run_data)
+    run_data['reports'] = _get_run_reports(run_data)
     return run_data
 
 
+@app.get("/api/runs/{run_id}/events")
+async def stream_run_events(run_id: str, request: Request, after: int = 0):
+    """
+    Push run status transitions and log lines as server-sent events until the run finishes
+
+    Starts with a "snapshot" of the run, then replays buffered events after `after`
+    (or the Last-Event-ID header on reconnect) and streams new ones as they are published.
+    """
+    run = run_store.get_run(run_id)
+    if run is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        after = int(last_event_id)
+
+    async def events():
+        yield _sse("snapshot", {"id": run_id, **{field: run.get(field) for field in STATUS_FIELDS if field in run}})
+        # A finished run only has its buffered events left to replay
+        finished = run.get("status") in TERMINAL_STATUSES
+        poll = run_events.backend == "memory" and bool(run.get("job_id"))
+        status = run.get("status")
+        last_keepalive = time.monotonic()
+        stream = run_events.subscribe(run_id, after)
+        pending = asyncio.ensure_future(stream.__anext__())
+        try:
+            while True:
+                timeout = 1.0 if finished else RUN_STATUS_POLL_SECONDS if poll else RUN_EVENTS_HEARTBEAT_SECONDS
+                done, _ = await asyncio.wait({pending}, timeout=timeout)
+                if not done:
+                    if finished or await request.is_disconnected():
+                        break
+                    if poll:
+                        current = await run_in_threadpool(run_store.get_run, run_id) or {}
+                        if current.get("status") != status:
+                            status = current.get("status")
+                            yield _sse("status", {field: current.get(field) for field in STATUS_FIELDS if field in current})
+                            if status in TERMINAL_STATUSES:
+                                break
+                    if time.monotonic() - last_keepalive >= RUN_EVENTS_HEARTBEAT_SECONDS:
+                        last_keepalive = time.monotonic()
+                        yield ": keepalive\n\n"
+                    continue
+                event = pending.result()
+                yield _sse(event["type"], event["data"], event_id=event["id"])
+                if event["type"] == "status":
+                    status = event["data"].get("status")
+                    if status in TERMINAL_STATUSES:
+                        break
+                pending = asyncio.ensure_future(stream.__anext__())
+        finally:
+            # The pending __anext__ must finish before the generator can be closed
+            pending.cancel()
+            with contextlib.suppress(asyncio.CancelledError, StopAsyncIteration):
+                await pending
+            await stream.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.post("/api/runs/{run_id}/refresh")
 async def refresh_run_status(run_id: str):
-    """Refresh run status from artifacts/run_status.json (for RQ worker updates)"""
-    if not RUNS_FILE.exists() or run_id not in test_runs:
-        return test_runs.get(run_id, {"id": run_id, "status": "unknown"})
-    try:
-        data = json.loads(RUNS_FILE.read_text())
-        if run_id in data:
-            for ts in ["created_at", "started_at", "completed_at"]:
-                if data[run_id].get(ts):
-                    try:
-                        data[run_id][ts] = datetime.fromisoformat(data[run_id][ts])
-                    except Exception:
-                        pass
-            test_runs[run_id].update(data[run_id])
-    except Exception:
-        logger.exception("Failed to refresh run status")
-    return test_runs[run_id]
+    """Current run status as written by the API or an RQ worker"""
+    return run_store.get_run(run_id) or {"id": run_id, "status": "unknown"}
+
 
+def _read_tail(path: Path, size: int = 5000) -> str:
+    """Last `size` bytes of a log without reading the whole file (logs hold the full pytest output)"""
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        f.seek(max(f.tell() - size, 0))
+        return f.read().decode("utf-8", errors="replace")
 
-def _get_run_logs(run_id: str) -> List[Dict[str, Any]]:
-    """Get execution logs for a run"""
+
+def _run_paths(run: Dict[str, Any], key: str, shard_key: Optional[str] = None) -> List[Path]:
+    """Files the run record lists under key, then its shards' files under shard_key (default: key)"""
+    paths = [run.get(key)] + [shard.get(shard_key or key) for shard in run.get("shards") or []]
+    return [Path(path) for path in dict.fromkeys(paths) if path]
+
+
+def _get_run_logs(run: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Tails of the run's pytest logs (one per shard for sharded runs)"""
     logs = []
-    logs_dir = Path("artifacts/logs")
-    
-    # Look for log files related to this run
-    if logs_dir.exists():
-        for log_file in logs_dir.glob(f"*{run_id}*.log"):
-            try:
-                with open(log_file, 'r') as f:
-                    content = f.read()
-                    logs.append({
-                        "file": log_file.name,
-                        "content": content[-5000:] if len(content) > 5000 else content,  # Last 5KB
-                        "size": log_file.stat().st_size,
-                        "modified": log_file.stat().st_mtime
-                    })
-            except Exception as e:
-                logger.error(f"Error reading log file {log_file}: {e}")
-    
-    # Also check for pytest output logs
-    pytest_log = Path("artifacts") / f"pytest_{run_id}.log"
-    if pytest_log.exists():
+    for log_file in _run_paths(run, "log_file"):
         try:
-            with open(pytest_log, 'r') as f:
-                content = f.read()
+            if log_file.exists():
                 logs.append({
-                    "file": f"pytest_{run_id}.log",
-                    "content": content[-5000:] if len(content) > 5000 else content,
-                    "size": pytest_log.stat().st_size,
-                    "modified": pytest_log.stat().st_mtime
+                    "file": log_file.name,
+                    "content": _read_tail(log_file),  # Last 5KB
+                    "size": log_file.stat().st_size,
+                    "modified": log_file.stat().st_mtime
                 })
         except Exception as e:
-            logger.error(f"Error reading pytest log: {e}")
-    
+            logger.error(f"Error reading log file {log_file}: {e}")
     return logs
 
 
-def _get_run_reports(run_id: str) -> List[Dict[str, Any]]:
-    """Get test reports for a run"""
+def _get_run_reports(run: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """The run's HTML and JUnit XML reports, as recorded when it finished"""
     reports = []
-    reports_dir = Path("reports")
-    
-    # Look for Allure reports
-    allure_dir = reports_dir / "allure-results"
-    if allure_dir.exists():
-        allure_files = list(allure_dir.glob("*.json")) + list(allure_dir.glob("*.txt"))
-        if allure_files:
+    for report_type, key, shard_key in (("html", "html_report", "html_report"), ("junit", "junit_report", "junit")):
+        for path in _run_paths(run, key, shard_key):
+            if not path.exists():
+                continue
             reports.append({
-                "type": "allure",
-                "name": "Allure Test Results",
-                "path": str(allure_dir),
-                "files": [f.name for f in allure_files],
-                "url": f"/reports/allure-results/"
+                "type": report_type,
+                "name": path.stem.replace('_', ' ').title(),
+                "path": str(path),
+                "url": f"/reports/{path.name}",
+                "size": path.stat().st_size,
+                "modified": path.stat().st_mtime
             })
-    
-    # Look for HTML reports
-    for html_file in reports_dir.glob("*.html"):
-        reports.append({
-            "type": "html",
-            "name": html_file.stem.replace('_', ' ').title(),
-            "path": str(html_file),
-            "url": f"/reports/{html_file.name}",
-            "size": html_file.stat().st_size,
-            "modified": html_file.stat().st_mtime
-        })
-    
-    # Look for JUnit XML reports
-    for xml_file in reports_dir.glob("*.xml"):
-        reports.append({
-            "type": "junit",
-            "name": xml_file.stem.replace('_', ' ').title(),
-            "path": str(xml_file),
-            "url": f"/reports/{xml_file.name}",
-            "size": xml_file.stat().st_size,
-            "modified": xml_file.stat().st_mtime
-        })
-    
     return reports
 
 
 @app.get("/api/metrics")
 async def get_metrics():
     """Get dashboard metrics"""
-    total_requirements = len(sessions)
-    total_runs = len(test_runs)
+    total_requirements = run_store.count_sessions()
+    stats = run_store.run_stats()
+    total_runs = stats["total"]
     
     # Calculate pass rate
-    completed_runs = [r for r in test_runs.values() if r["status"] == "completed"]
-    pass_rate = len(completed_runs) / total_runs * 100 if total_runs > 0 else 0
+    pass_rate = stats["by_status"].get("completed", 0) / total_runs * 100 if total_runs > 0 else 0
     
     # Get recent runs
-    recent_runs = sorted(
-        test_runs.values(),
-        key=lambda x: x["created_at"],
-        reverse=True
-    )[:5]
+    recent_runs = run_store.list_runs(limit=5)
     
     return {
         "total_requirements": total_requirements,
@@ -629,20 +780,103 @@ async def get_metrics():
             {
                 "id": r["id"],
                 "status": r["status"],
-                "created_at": r["created_at"].isoformat()
+                "created_at": r["created_at"]
             }
             for r in recent_runs
         ],
         "test_types": {
-            "ui_real": sum(1 for r in test_runs.values() if r.get("ui_mode") == "real"),
-            "ui_mock": sum(1 for r in test_runs.values() if r.get("ui_mode") == "mock"),
-            "api_real": sum(1 for r in test_runs.values() if r.get("api_mode") == "real"),
-            "api_mock": sum(1 for r in test_runs.values() if r.get("api_mode") == "mock")
+            "ui_real": stats["by_ui_mode"].get("real", 0),
+            "ui_mock": stats["by_ui_mode"].get("mock", 0),
+            "api_real": stats["by_api_mode"].get("real", 0),
+            "api_mock": stats["by_api_mode"].get("mock", 0)
         },
-        "history": _read_metrics_history()
+        # Bounded tail of the metrics log plus pre-aggregated rollups; older history via /api/metrics/history
+        "history": metrics_log.recent(limit=50),
+        "rollups": {
+            "overall": metrics_log.overall(),
+            "days": metrics_log.rollups(scope="day", limit=30)
+        }
     }
 
 
+@app.get("/api/metrics/history")
+async def get_metrics_history(since: Optional[str] = None,
+                              until: Optional[str] = None,
+                              session_id: Optional[str] = None,
+                              status: Optional[str] = None,
+                              limit: int = 100,
+                              cursor: Optional[str] = None):
+    """Page through run metrics recorded in [since, until] (ISO dates or timestamps), oldest first"""
+    if not 1 <= limit <= 1000:
+        raise HTTPException(status_code=400, detail="limit must be between 1 and 1000")
+    try:
+        return await run_in_threadpool(metrics_log.query, since=since, until=until, session_id=session_id,
+                                       status=status, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@app.get("/api/metrics/rollups")
+async def get_metrics_rollups(scope: str = "day",
+                              since: Optional[str] = None,
+                              until: Optional[str] = None,
+                              key: Optional[str] = None,
+                              limit: int = 30):
+    """Runs, pass rate and duration percentiles per day, per session or overall, most recent first"""
+    if scope not in ("day", "session", "all"):
+        raise HTTPException(status_code=400, detail="scope must be day, session or all")
+    return await run_in_threadpool(metrics_log.rollups, scope=scope, since=since, until=until,
+                                   key=key, limit=min(max(limit, 1), 1000))
+
+
+@app.get("/api/llm/cache")
+async def get_llm_cache_stats():
+    """LLM response cache hit/miss counters and size"""
+    return components.orchestrator.cache_stats()
+
+
+@app.get("/api/llm/providers")
+async def get_llm_provider_health():
+    """Circuit breaker state and adaptive routing scores per LLM provider"""
+    return components.orchestrator.health_snapshot()
+
+
+@app.get("/api/llm/structured-output")
+async def get_llm_structured_output_stats():
+    """How often structured LLM responses were valid, fixed locally or still needed an LLM repair"""
+    return components.orchestrator.structured_output_stats()
+
+
+@app.get("/api/scraper/browser-pool")
+async def get_browser_pool_stats():
+    """Warm browser, open contexts and lease/recycle counters of the scraping browser pool"""
+    return browser_pool.stats()
+
+
+@app.get("/api/scraper/cache")
+async def get_scrape_cache_stats():
+    """Number, size and freshness of cached page snapshots"""
+    return await run_in_threadpool(scrape_cache.stats)
+
+
+@app.delete("/api/scraper/cache")
+async def clear_scrape_cache():
+    """Drop every cached page snapshot so the next generation scrapes live"""
+    await run_in_threadpool(scrape_cache.clear)
+    return {"cleared": True}
+
+
+@app.get("/api/metrics/llm")
+async def get_llm_metrics(format: str = "json"):
+    """LLM latency histograms, tokens and estimated cost per provider/model/task_type"""
+    if format == "prometheus":
+        return PlainTextResponse(components.orchestrator.telemetry.prometheus(),
+                                 media_type="text/plain; version=0.0.4")
+    if format != "json":
+        raise HTTPException(status_code=400, detail="format must be json or prometheus")
+    return components.orchestrator.usage_metrics()
+
+
 @app.get("/api/artifacts/{session_id}/{filename}")
 async def download_artifact(session_id: str, filename: str):
     """Download generated artifact"""
@@ -674,7 +908,7 @@ async def preview_tests(session_id: str, body: Dict[str, Any]):
 
         # Synthesize into artifacts preview dir
         preview_dir = ARTIFACTS_DIR / session_id / "preview"
-        synthesizer = CodeSynthesizer()
+        synthesizer = components.synthesizer
         files = synthesizer.synthesize(requirement, preview_suite, ExecutionConfig(), preview_dir)
 
         diffs: List[Dict[str, Any]] = []
@@ -4,42 +4,25 @@ RQ Worker job to execute tests and persist results
 from pathlib import Path
 from datetime import datetime
 import subprocess
-import json
-from typing import Dict
+from typing import Dict, List, Tuple, Any
 
-ARTIFACTS_DIR = Path("artifacts")
-RUNS_FILE = ARTIFACTS_DIR / "run_status.json"
-METRICS_FILE = ARTIFACTS_DIR / "metrics.json"
+from backend.core.run_store import run_store
+from backend.core.metrics_log import metrics_log, run_summary
+from backend.core.run_events import run_events
+from backend.core.streaming_subprocess import run_streaming
+from backend.core.test_sharding import (
+    prepare_shards, shard_plan, run_shard, run_sharded, merge_shards, failed_shard, run_timeout
+)
 
 
 def _persist_run(run_id: str, record: Dict) -> None:
-    ARTIFACTS_DIR.mkdir(exist_ok=True)
-    data = {}
-    if RUNS_FILE.exists():
-        try:
-            data = json.loads(RUNS_FILE.read_text())
-        except Exception:
-            data = {}
-    data[run_id] = record
-    RUNS_FILE.write_text(json.dumps(data, indent=2))
-
-    # Append metrics
-    try:
-        metrics = []
-        if METRICS_FILE.exists():
-            metrics = json.loads(METRICS_FILE.read_text())
-        metrics.append({
-            "run_id": run_id,
-            "status": record.get("status"),
-            "created_at": record.get("created_at"),
-            "completed_at": record.get("completed_at"),
-        })
-        METRICS_FILE.write_text(json.dumps(metrics, indent=2))
-    except Exception:
-        pass
-
-
-def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, auto_pr: bool = False, requirement_id: str | None = None) -> Dict:
+    run = run_store.update_run(run_id, record)
+    run_events.status(run)
+    metrics_log.record(run_summary(run))
+
+
+def _pytest_command(ui_mode: str, api_mode: str) -> Tuple[List[str], Dict[str, str]]:
+    """pytest command (without per-run report paths) and environment for a run"""
     import os
     
     # Use framework structure: write and run from tests/ root
@@ -51,10 +34,6 @@ def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, aut
     timeout = os.getenv("BROWSER_TIMEOUT", "30000")
     
     # Build pytest command with proper browser configuration
-    # Create logs directory
-    logs_dir = Path("artifacts/logs")
-    logs_dir.mkdir(parents=True, exist_ok=True)
-    
     cmd = [
         "pytest", str(test_dir),
         "-v", "--tb=long",
@@ -64,10 +43,7 @@ def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, aut
         f"--timeout={timeout}",
         f"--ui-mode={ui_mode}",
         f"--api-mode={api_mode}",
-        "--alluredir=reports/allure-results",
-        f"--junitxml=reports/junit_{run_id}.xml",
-        f"--html=reports/report_{run_id}.html",
-        "--self-contained-html"
+        "--alluredir=reports/allure-results"
     ]
     
     # Set environment variables for test execution
@@ -79,49 +55,16 @@ def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, aut
         "HEADLESS": str(headless),
         "BROWSER_TIMEOUT": timeout
     })
-    
-    # Create log file for this run
-    log_file = logs_dir / f"pytest_{run_id}.log"
-    
-    try:
-        # Run with output capture to both console and log file
-        with open(log_file, 'w') as f:
-            f.write(f"=== Test Execution Log for Run {run_id} ===\n")
-            f.write(f"Command: {' '.join(cmd)}\n")
-            f.write(f"Environment: UI_MODE={ui_mode}, API_MODE={api_mode}\n")
-            f.write("=" * 50 + "\n\n")
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, env=env, timeout=300)
-            
-            # Write output to log file
-            f.write("STDOUT:\n")
-            f.write(result.stdout)
-            f.write("\n\nSTDERR:\n")
-            f.write(result.stderr)
-            f.write(f"\n\nExit Code: {result.returncode}\n")
-    
-    except subprocess.TimeoutExpired:
-        result = type('Result', (), {
-            'returncode': -1, 
-            'stdout': 'Test execution timed out after 300 seconds', 
-            'stderr': 'Timeout'
-        })()
-    except Exception as e:
-        result = type('Result', (), {
-            'returncode': -2, 
-            'stdout': '', 
-            'stderr': f'Execution error: {str(e)}'
-        })()
-    
+    return cmd, env
+
+
+def _finish_run(run_id: str, session_id: str, fields: Dict[str, Any], ui_mode: str, api_mode: str,
+                auto_pr: bool, requirement_id: str | None) -> Dict:
     record = {
         "id": run_id,
         "session_id": session_id,
-        "status": "completed" if result.returncode == 0 else "failed",
-        "created_at": datetime.utcnow().isoformat(),
         "completed_at": datetime.utcnow().isoformat(),
-        "output": result.stdout,
-        "errors": result.stderr,
-        "exit_code": result.returncode,
+        **fields,
         "ui_mode": ui_mode,
         "api_mode": api_mode,
         "auto_pr": auto_pr,
@@ -138,3 +81,111 @@ def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, aut
             pass
 
     return record
+
+
+def run_tests_job(run_id: str, session_id: str, ui_mode: str, api_mode: str, auto_pr: bool = False,
+                  requirement_id: str | None = None, shards: int = 1, shard_mode: str = "local") -> Dict:
+    """
+    Run the tests/ suite for a run. With shards > 1 the collected tests are split by
+    historical duration and run as parallel local pytest processes (shard_mode "local")
+    or as one RQ job per shard (shard_mode "rq"); shard results merge into this run.
+    """
+    cmd, env = _pytest_command(ui_mode, api_mode)
+    
+    # Create logs directory
+    logs_dir = Path("artifacts/logs")
+    logs_dir.mkdir(parents=True, exist_ok=True)
+    
+    run_events.status(run_store.update_run(run_id, {"status": "running", "started_at": datetime.utcnow().isoformat()}))
+    
+    plan = prepare_shards(cmd, run_id, shards, env) if shards > 1 else []
+    if len(plan) > 1:
+        run_store.update_run(run_id, {"shard_count": len(plan), "shard_plan": shard_plan(plan), "shard_mode": shard_mode})
+        if shard_mode == "rq" and _fan_out(run_id, plan, session_id, ui_mode, api_mode, auto_pr, requirement_id):
+            return {"id": run_id, "status": "running", "shard_plan": shard_plan(plan)}
+        return _finish_run(run_id, session_id, run_sharded(cmd, run_id, plan, env),
+                           ui_mode, api_mode, auto_pr, requirement_id)
+    
+    # Create log file for this run
+    log_file = logs_dir / f"pytest_{run_id}.log"
+    cmd += [
+        f"--junitxml=reports/junit_{run_id}.xml",
+        f"--html=reports/report_{run_id}.html",
+        "--self-contained-html"
+    ]
+    
+    # Output is tailed into the log file and run events as pytest writes it
+    header = (f"=== Test Execution Log for Run {run_id} ===\n"
+              f"Command: {' '.join(cmd)}\n"
+              f"Environment: UI_MODE={ui_mode}, API_MODE={api_mode}\n"
+              + "=" * 50 + "\n\n")
+    result = run_streaming(cmd, log_file, run_id=run_id, env=env, timeout=run_timeout(), header=header)
+    
+    return _finish_run(run_id, session_id, {
+        "status": "completed" if result.returncode == 0 else "failed",
+        # Tails only; the full output stays in log_file
+        "output": result.stdout_tail,
+        "errors": result.stderr_tail,
+        "log_file": result.log_file,
+        "junit_report": f"reports/junit_{run_id}.xml",
+        "html_report": f"reports/report_{run_id}.html",
+        "output_lines": result.line_count,
+        "output_truncated": result.truncated,
+        "exit_code": result.returncode,
+    }, ui_mode, api_mode, auto_pr, requirement_id)
+
+
+def _fan_out(run_id: str, plan: List[Dict[str, Any]], session_id: str, ui_mode: str, api_mode: str,
+             auto_pr: bool, requirement_id: str | None) -> bool:
+    """Enqueue one run_shard_job per shard on this job's queue; False outside an RQ worker"""
+    from rq import Queue, get_current_job
+    
+    job = get_current_job()
+    if job is None:
+        return False
+    queue = Queue(job.origin, connection=job.connection)
+    run_events.publish(run_id, "shards", {"plan": shard_plan(plan)})
+    job_ids = [
+        queue.enqueue("backend.api.worker.run_shard_job", run_id, shard, session_id, ui_mode, api_mode,
+                      auto_pr, requirement_id, job_timeout=int(run_timeout()) + 600,
+                      on_failure=shard_job_failed).id
+        for shard in plan
+    ]
+    run_store.update_run(run_id, {"shard_jobs": job_ids})
+    return True
+
+
+def run_shard_job(run_id: str, shard: Dict[str, Any], session_id: str, ui_mode: str, api_mode: str,
+                  auto_pr: bool = False, requirement_id: str | None = None) -> Dict:
+    """Run one shard of a fanned-out run; the last shard to finish merges the run"""
+    cmd, env = _pytest_command(ui_mode, api_mode)
+    result = run_shard(cmd, run_id, shard, env)
+    _record_shard(run_id, result, session_id, ui_mode, api_mode, auto_pr, requirement_id)
+    return result
+
+
+def shard_job_failed(job, connection, exc_type, exc_value, traceback) -> None:
+    """
+    RQ on_failure callback of run_shard_job (exception, job timeout, killed work horse):
+    records the shard as failed so the run still merges instead of staying "running"
+    """
+    run_id, shard, session_id, ui_mode, api_mode, auto_pr, requirement_id = job.args
+    run = run_store.get_run(run_id) or {}
+    if str(shard["index"]) in (run.get("shard_results") or {}) or run.get("status") != "running":
+        return  # failed after its result was recorded, e.g. while merging
+    timed_out = exc_type is not None and exc_type.__name__ == "JobTimeoutException"
+    error = f"Shard job {job.id} failed: {exc_type.__name__ if exc_type else 'killed'}: {exc_value}"
+    run_events.log(run_id, [error], stream="stderr", shard=shard["index"])
+    _record_shard(run_id, failed_shard(run_id, shard, error, timed_out), session_id, ui_mode, api_mode,
+                  auto_pr, requirement_id)
+
+
+def _record_shard(run_id: str, result: Dict[str, Any], session_id: str, ui_mode: str, api_mode: str,
+                  auto_pr: bool, requirement_id: str | None) -> None:
+    run = run_store.record_shard(run_id, result["index"], result)
+    results = run.get("shard_results") or {}
+    if len(results) < run.get("shard_count", 0):
+        return
+    fields = merge_shards(run_id, list(results.values()))
+    fields["shard_results"] = None  # merged into output/errors/shards
+    _finish_run(run_id, session_id, fields, ui_mode, api_mode, auto_pr, requirement_id)
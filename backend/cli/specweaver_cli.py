@@ -9,13 +9,9 @@ from typing import Optional
 import typer
 from rich.console import Console
 from rich.table import Table
-from rich.progress import track
 
-from backend.core.schemas import ExecutionConfig, RequirementGraph, TestSuite
-from backend.core.llm_orchestrator import LLMOrchestrator, LLMProvider
-from backend.core.requirement_parser import RequirementParser  
-from backend.core.test_generator import TestCaseGenerator
-from backend.core.code_synthesizer import CodeSynthesizer
+# backend.core modules are imported inside each command: they pull in pydantic,
+# Jinja, Playwright and the LLM SDKs, which `--help` and unrelated commands never need
 
 # Setup
 app = typer.Typer(help="SpecWeaver - Automated Test Generation from Requirements")
@@ -34,6 +30,8 @@ def parse(
     """Parse user story into RequirementGraph"""
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.llm_orchestrator import LLMOrchestrator, LLMProvider
+    from backend.core.requirement_parser import RequirementParser
     
     console.print(f"[bold blue]Parsing story:[/bold blue] {story}")
     
@@ -61,6 +59,44 @@ def parse(
     console.print(f"  Output: {req_file}")
 
 
+@app.command("parse-batch")
+def parse_batch(
+    stories_dir: Path = typer.Argument(..., help="Directory of user story files"),
+    output: Path = typer.Option(Path("artifacts/requirements.jsonl"), help="JSONL output (also the resume checkpoint)"),
+    pattern: str = typer.Option("*.md", help="Glob for story files inside the directory"),
+    workers: int = typer.Option(4, help="Stories parsed concurrently"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output")
+):
+    """Parse a directory of user stories into RequirementGraphs (JSONL, resumable)"""
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.llm_orchestrator import LLMOrchestrator
+    from backend.core.requirement_parser import RequirementParser
+
+    files = sorted(p for p in stories_dir.rglob(pattern) if p.is_file())
+    if not files:
+        console.print(f"[red]No stories matching {pattern} in {stories_dir}[/red]")
+        raise typer.Exit(1)
+    console.print(f"[bold blue]Parsing {len(files)} stories:[/bold blue] {stories_dir} -> {output}")
+
+    # Batch work yields to interactive API calls at the rate limiter
+    parser = RequirementParser(LLMOrchestrator({"priority": "batch"}))
+    stories = ((str(p.relative_to(stories_dir)), p.read_text()) for p in files)
+
+    ok = failed = 0
+    for result in parser.parse_many(stories, max_workers=workers, checkpoint_path=output):
+        if result["status"] == "ok":
+            ok += 1
+            console.print(f"[green]✓[/green] {result['story_id']}: {result['requirement']['title']}")
+        else:
+            failed += 1
+            console.print(f"[red]✗[/red] {result['story_id']}: {result['error']}")
+
+    skipped = len(files) - ok - failed
+    console.print(f"\n[green]✓[/green] Parsed {ok} stories ({failed} failed, {skipped} already done)")
+    console.print(f"  Output: {output}")
+
+
 @app.command()
 def generate(
     requirement: Path = typer.Argument(..., help="Path to requirement_graph.json"),
@@ -71,6 +107,9 @@ def generate(
     """Generate test cases from RequirementGraph"""
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.schemas import RequirementGraph
+    from backend.core.llm_orchestrator import LLMOrchestrator
+    from backend.core.test_generator import TestCaseGenerator
     
     console.print(f"[bold blue]Generating test cases:[/bold blue] {requirement}")
     
@@ -116,6 +155,8 @@ def synthesize(
     """Synthesize executable test code"""
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.schemas import ExecutionConfig, RequirementGraph, TestSuite
+    from backend.core.code_synthesizer import CodeSynthesizer
     
     console.print(f"[bold blue]Synthesizing test code:[/bold blue]")
     
@@ -155,12 +196,18 @@ def full(
     """Full pipeline: parse -> generate -> synthesize"""
     if verbose:
         logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.schemas import ExecutionConfig
+    from backend.core.llm_orchestrator import LLMOrchestrator
+    from backend.core.requirement_parser import RequirementParser
+    from backend.core.test_generator import TestCaseGenerator
+    from backend.core.code_synthesizer import CodeSynthesizer
     
     console.print("[bold green]Running full SpecWeaver pipeline[/bold green]\n")
     
     # Step 1: Parse
     console.print("[bold]Step 1: Parsing requirement...[/bold]")
-    orchestrator = LLMOrchestrator()
+    # Batch priority: interactive API calls are served first when provider budgets run out
+    orchestrator = LLMOrchestrator({"priority": "batch"})
     parser = RequirementParser(orchestrator)
     requirement = parser.parse(story_path=story)
     
@@ -198,12 +245,89 @@ def full(
     console.print(f"\n[yellow]Run tests with:[/yellow] pytest {test_dir}")
 
 
+@app.command()
+def crawl(
+    url: str = typer.Argument(..., help="Start page of the site"),
+    output: Path = typer.Option(Path("artifacts"), help="Output directory"),
+    max_depth: int = typer.Option(2, help="Link hops followed from the start page"),
+    max_pages: int = typer.Option(50, help="Maximum pages analyzed"),
+    concurrency: int = typer.Option(4, help="Pages analyzed in parallel"),
+    ignore_robots: bool = typer.Option(False, "--ignore-robots", help="Do not honor robots.txt"),
+    offline: bool = typer.Option(False, "--offline", help="Use cached page snapshots only; never load pages"),
+    backend: str = typer.Option("auto", help="auto, browser or parser (static HTML without a browser)"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output")
+):
+    """Crawl a site's same-origin navigation and generate BDD features for it"""
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.site_crawler import crawl_site
+    from backend.core.dynamic_test_generator import DynamicTestGenerator
+
+    console.print(f"[bold blue]Crawling site:[/bold blue] {url}")
+    site = crawl_site(url, max_depth=max_depth, max_pages=max_pages,
+                      concurrency=concurrency, respect_robots=not ignore_robots,
+                      offline=offline or None, backend=backend)
+
+    output.mkdir(parents=True, exist_ok=True)
+    site_file = output / "site_analysis.json"
+    site_file.write_text(json.dumps(site, indent=2))
+    if site.get("error"):
+        console.print(f"[red]{site['error']}[/red]")
+        raise typer.Exit(1)
+
+    features = DynamicTestGenerator().generate_tests_from_analysis(site)
+    features_file = output / "site_features.json"
+    features_file.write_text(json.dumps(features, indent=2))
+
+    stats = site["crawl"]
+    console.print(f"[green]✓[/green] Analyzed {stats['pages_analyzed']} pages "
+                  f"({stats['pages_failed']} failed, {len(site['skipped'])} skipped) in {stats['duration_ms'] / 1000:.1f}s")
+    console.print(f"  Elements: {len(site['elements'])}  Forms: {len(site['forms'])}")
+    console.print(f"  Features: {len(features)}")
+    console.print(f"  Output: {site_file}, {features_file}")
+
+
+@app.command()
+def rescrape(
+    url: str = typer.Argument(..., help="Page scraped before (its cached snapshot is the baseline)"),
+    features: Path = typer.Argument(..., help="JSON features generated from the earlier scrape"),
+    output: Path = typer.Option(Path("artifacts"), help="Output directory"),
+    locators: Optional[Path] = typer.Option(None, help="JSON locator repository to update for moved locators"),
+    backend: str = typer.Option("auto", help="auto, browser or parser (static HTML without a browser)"),
+    verbose: bool = typer.Option(False, "--verbose", "-v", help="Verbose output")
+):
+    """Re-scrape a page and regenerate only the features whose part of the page changed"""
+    if verbose:
+        logging.getLogger().setLevel(logging.DEBUG)
+    from backend.core.dynamic_test_generator import DynamicTestGenerator
+
+    console.print(f"[bold blue]Re-scraping:[/bold blue] {url}")
+    previous = json.loads(features.read_text())
+    result = DynamicTestGenerator().regenerate_tests_from_website(url, previous, locator_file=locators,
+                                                                   backend=backend)
+
+    output.mkdir(parents=True, exist_ok=True)
+    features_file = output / "page_features.json"
+    features_file.write_text(json.dumps(result["features"], indent=2))
+    diff_file = output / "page_diff.json"
+    diff_file.write_text(json.dumps(result["diff"], indent=2))
+    if result["diff"] is None:
+        console.print("[yellow]Re-scrape failed; previous features kept[/yellow]")
+    else:
+        console.print(f"  Changed areas: {', '.join(result['diff']['changed_areas']) or 'none'}")
+    console.print(f"[green]✓[/green] Regenerated {len(result['regenerated'])} of {len(result['features'])} features")
+    for healed in result["healed"]:
+        console.print(f"  Locator {healed.element_name}: {healed.original_selector} -> {healed.auto_applied}")
+    console.print(f"  Output: {features_file}, {diff_file}")
+
+
 @app.command()
 def validate(
     requirement: Path = typer.Argument(..., help="Path to requirement_graph.json"),
     tests: Path = typer.Argument(..., help="Path to test_cases.json")
 ):
     """Validate artifacts for completeness and consistency"""
+    from backend.core.schemas import RequirementGraph, TestSuite
     console.print("[bold blue]Validating artifacts...[/bold blue]")
     
     # Load artifacts
@@ -0,0 +1,263 @@
+"""
+Browser Pool - long-lived Chromium shared by every scrape in the process
+"""
+import asyncio
+import concurrent.futures
+import logging
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class _PooledBrowser:
+    """A launched browser and its lease bookkeeping"""
+
+    def __init__(self, browser: Any, generation: int):
+        self.browser = browser
+        self.generation = generation
+        self.launched_at = time.time()
+        self.uses = 0
+        self.active = 0
+        self.retired = False
+
+
+class BrowserPool:
+    """
+    Keeps Chromium warm on a dedicated event-loop thread. Every scrape leases a fresh
+    browser context (own cookies and storage) instead of launching a browser; at most
+    `max_concurrency` contexts are open at once. A browser is replaced once it has
+    served `max_uses_per_browser` leases or stops responding, after its open
+    contexts are done.
+
+    Playwright objects belong to the loop that created them, so all browser work runs
+    on the pool loop: sync callers use run(), async callers (FastAPI handlers) use
+    arun(), and neither starts an event loop of its own.
+    """
+
+    def __init__(self,
+                 max_concurrency: int = 4,
+                 max_uses_per_browser: int = 50,
+                 headless: bool = True,
+                 viewport: Optional[Dict[str, int]] = None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_uses_per_browser = max(1, max_uses_per_browser)
+        self.headless = headless
+        self.viewport = viewport or {"width": 1280, "height": 720}
+        self._thread_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        # Created on the pool loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._playwright = None
+        self._current: Optional[_PooledBrowser] = None
+        self._retiring: List[_PooledBrowser] = []
+        self._generation = 0
+        self._stats = {"leases": 0, "launches": 0, "recycled": 0, "unhealthy": 0,
+                       "lease_wait_ms": 0.0, "launch_ms": 0.0}
+
+    @classmethod
+    def from_env(cls, headless: bool = True) -> "BrowserPool":
+        return cls(max_concurrency=int(os.getenv("BROWSER_POOL_MAX_CONCURRENCY", "4")),
+                   max_uses_per_browser=int(os.getenv("BROWSER_POOL_MAX_USES", "50")),
+                   headless=headless)
+
+    # -- event loop thread -------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="browser-pool", daemon=True)
+                thread.start()
+                self._loop, self._thread = loop, thread
+            return self._loop
+
+    def _on_pool_loop(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+    def submit(self, factory: Callable[[], Awaitable[T]]) -> "concurrent.futures.Future[T]":
+        """Schedule factory() on the pool loop"""
+        return asyncio.run_coroutine_threadsafe(factory(), self._ensure_loop())
+
+    def run(self, factory: Callable[[], Awaitable[T]], timeout: Optional[float] = None) -> T:
+        """Run factory() on the pool loop and block for the result (for sync callers)"""
+        if self._on_pool_loop():
+            raise RuntimeError("BrowserPool.run() called from the pool loop; await the coroutine instead")
+        return self.submit(factory).result(timeout)
+
+    async def arun(self, factory: Callable[[], Awaitable[T]]) -> T:
+        """Await factory() on the pool loop from any event loop"""
+        if self._on_pool_loop():
+            return await factory()
+        return await asyncio.wrap_future(self.submit(factory))
+
+    # -- leases (pool loop only) -------------------------------------------
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[Any]:
+        """A fresh browser context on a warm browser, closed when the block exits"""
+        if not self._on_pool_loop():
+            raise RuntimeError("BrowserPool.lease() must run on the pool loop; use run() or arun()")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._launch_lock = asyncio.Lock()
+        start = time.time()
+        async with self._semaphore:
+            self._stats["lease_wait_ms"] += (time.time() - start) * 1000
+            pooled = await self._acquire_browser()
+            pooled.active += 1
+            try:
+                context = await pooled.browser.new_context(viewport=self.viewport)
+            except Exception:
+                pooled.active -= 1
+                await self._mark_unhealthy(pooled)
+                raise
+            self._stats["leases"] += 1
+            try:
+                yield context
+            finally:
+                pooled.active -= 1
+                try:
+                    await context.close()
+                except Exception as e:
+                    logger.debug(f"Closing leased context failed: {e}")
+                if pooled.retired and pooled.active == 0:
+                    await self._close_browser(pooled)
+
+    async def _acquire_browser(self) -> _PooledBrowser:
+        async with self._launch_lock:
+            current = self._current
+            if current is not None and not current.browser.is_connected():
+                await self._mark_unhealthy(current)
+            elif current is not None and current.uses >= self.max_uses_per_browser:
+                logger.info(f"Recycling browser #{current.generation} after {current.uses} leases")
+                self._stats["recycled"] += 1
+                await self._retire(current)
+            if self._current is None:
+                self._current = await self._launch()
+            self._current.uses += 1
+            return self._current
+
+    async def _launch(self) -> _PooledBrowser:
+        start = time.time()
+        if self._playwright is None:
+            # Imported here so processes that never scrape don't load Playwright
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        browser = await self._playwright.chromium.launch(headless=self.headless)
+        self._generation += 1
+        launch_ms = (time.time() - start) * 1000
+        self._stats["launches"] += 1
+        self._stats["launch_ms"] += launch_ms
+        logger.info(f"Launched pooled browser #{self._generation} in {launch_ms:.0f}ms")
+        return _PooledBrowser(browser, self._generation)
+
+    async def _retire(self, pooled: _PooledBrowser) -> None:
+        """Stop leasing from a browser; it closes once its open contexts are done"""
+        pooled.retired = True
+        if self._current is pooled:
+            self._current = None
+        if pooled.active == 0:
+            await self._close_browser(pooled)
+        elif pooled not in self._retiring:
+            self._retiring.append(pooled)
+
+    async def _mark_unhealthy(self, pooled: _PooledBrowser) -> None:
+        if pooled.retired:
+            return
+        logger.warning(f"Pooled browser #{pooled.generation} is unhealthy; replacing it")
+        self._stats["unhealthy"] += 1
+        await self._retire(pooled)
+
+    async def _close_browser(self, pooled: _PooledBrowser) -> None:
+        if pooled in self._retiring:
+            self._retiring.remove(pooled)
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.debug(f"Closing browser #{pooled.generation} failed: {e}")
+
+    # -- lifecycle ---------------------------------------------------------
+
+    async def _health_check(self) -> bool:
+        async with self.lease() as context:
+            page = await context.new_page()
+            return await page.evaluate("1 + 1") == 2
+
+    def warmup(self) -> bool:
+        """Launch the browser and open one context so the first scrape doesn't pay for it"""
+        try:
+            return self.run(self._health_check, timeout=60)
+        except Exception as e:
+            logger.warning(f"Browser pool warmup failed: {e}")
+            return False
+
+    async def _shutdown(self) -> None:
+        for pooled in [self._current, *self._retiring]:
+            if pooled is not None:
+                await self._close_browser(pooled)
+        self._current = None
+        self._retiring = []
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    def close(self) -> None:
+        """Close browsers and stop the pool loop; the pool restarts on next use"""
+        with self._thread_lock:
+            loop, thread = self._loop, self._thread
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), loop).result(30)
+        except Exception as e:
+            logger.warning(f"Browser pool shutdown failed: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+        with self._thread_lock:
+            self._loop = self._thread = None
+            self._semaphore = self._launch_lock = None
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool configuration, current browser and lease counters"""
+        current = self._current
+        return {
+            "headless": self.headless,
+            "max_concurrency": self.max_concurrency,
+            "max_uses_per_browser": self.max_uses_per_browser,
+            "running": self._loop is not None,
+            "browser": {
+                "generation": current.generation,
+                "uses": current.uses,
+                "active_contexts": current.active,
+                "uptime_s": round(time.time() - current.launched_at, 1),
+                "connected": current.browser.is_connected(),
+            } if current else None,
+            "retiring_browsers": len(self._retiring),
+            **self._stats,
+        }
+
+
+browser_pool = BrowserPool.from_env()
+_headed_pool: Optional[BrowserPool] = None
+
+
+def pool_for(headless: bool = True) -> BrowserPool:
+    """The shared pool, or a separate headed one for scrapes run with a visible browser"""
+    global _headed_pool
+    if headless:
+        return browser_pool
+    if _headed_pool is None:
+        _headed_pool = BrowserPool.from_env(headless=False)
+    return _headed_pool
@@ -0,0 +1,172 @@
+"""
+Component Container - application-scoped pipeline components with warmup and config/ hot reload
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+
+from .llm_orchestrator import LLMOrchestrator
+from .requirement_parser import RequirementParser
+from .test_generator import TestCaseGenerator
+from .code_synthesizer import CodeSynthesizer
+from .domain_detector import DomainDetector
+from .prompt_loader import PromptLoader
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Components:
+    """One consistent generation of components built from the same config/ snapshot"""
+    orchestrator: LLMOrchestrator
+    batch_orchestrator: LLMOrchestrator
+    parser: RequirementParser
+    batch_parser: RequirementParser
+    synthesizer: CodeSynthesizer
+    domain_detector: DomainDetector
+    prompt_loader: PromptLoader
+
+
+class ComponentContainer:
+    """
+    Builds the orchestrator, parser, synthesizer, domain detector and prompt loader once
+    per process so requests no longer re-read YAML, prompts, domains or templates.
+    A polling watcher rebuilds them when anything under config/ changes; requests that
+    already hold a component keep using it until they finish.
+    """
+
+    def __init__(self, config_dir: str = "config", poll_seconds: float = 2.0):
+        self.config_dir = Path(config_dir)
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+        self._current: Optional[_Components] = None
+        self._snapshot: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+        self.reloads = 0
+
+    def _build(self) -> _Components:
+        orchestrator = LLMOrchestrator()
+        batch_orchestrator = LLMOrchestrator({"priority": "batch"})
+        return _Components(
+            orchestrator=orchestrator,
+            batch_orchestrator=batch_orchestrator,
+            parser=RequirementParser(orchestrator),
+            batch_parser=RequirementParser(batch_orchestrator),
+            synthesizer=CodeSynthesizer(orchestrator=orchestrator),
+            domain_detector=DomainDetector(str(self.config_dir / "domains")),
+            prompt_loader=PromptLoader(str(self.config_dir / "prompts")),
+        )
+
+    def _get(self) -> _Components:
+        current = self._current
+        if current is None:
+            with self._lock:
+                if self._current is None:
+                    self._snapshot = self._config_snapshot()
+                    self._current = self._build()
+                current = self._current
+        return current
+
+    @property
+    def orchestrator(self) -> LLMOrchestrator:
+        return self._get().orchestrator
+
+    @property
+    def batch_orchestrator(self) -> LLMOrchestrator:
+        """Orchestrator whose calls queue behind interactive ones at the rate limiter"""
+        return self._get().batch_orchestrator
+
+    @property
+    def parser(self) -> RequirementParser:
+        return self._get().parser
+
+    @property
+    def batch_parser(self) -> RequirementParser:
+        return self._get().batch_parser
+
+    @property
+    def synthesizer(self) -> CodeSynthesizer:
+        return self._get().synthesizer
+
+    @property
+    def domain_detector(self) -> DomainDetector:
+        return self._get().domain_detector
+
+    @property
+    def prompt_loader(self) -> PromptLoader:
+        return self._get().prompt_loader
+
+    def generator(self) -> TestCaseGenerator:
+        """A fresh generator (it numbers test cases per run) wired to the shared components"""
+        current = self._get()
+        return TestCaseGenerator(current.orchestrator,
+                                 domain_detector=current.domain_detector,
+                                 prompt_loader=current.prompt_loader)
+
+    def warmup(self) -> Dict[str, float]:
+        """Build every component and preload Jinja templates; returns timings in ms"""
+        timings: Dict[str, float] = {}
+        start = time.time()
+        current = self._get()
+        timings["components_ms"] = (time.time() - start) * 1000
+        start = time.time()
+        for name in current.synthesizer.env.list_templates():
+            current.synthesizer.env.get_template(name)
+        timings["templates_ms"] = (time.time() - start) * 1000
+        logger.info(f"Components warmed up: {', '.join(f'{k}={v:.0f}' for k, v in timings.items())}")
+        return timings
+
+    def reload(self) -> None:
+        """Rebuild all components from the current config/ contents"""
+        start = time.time()
+        snapshot = self._config_snapshot()
+        try:
+            components = self._build()
+        except Exception as e:
+            logger.error(f"Component reload failed, keeping previous components: {e}")
+            return
+        with self._lock:
+            self._current = components
+            self._snapshot = snapshot
+            self.reloads += 1
+        logger.info(f"Components reloaded from {self.config_dir} in {(time.time() - start) * 1000:.0f}ms")
+
+    def _config_snapshot(self) -> Dict[str, int]:
+        if not self.config_dir.exists():
+            return {}
+        snapshot: Dict[str, int] = {}
+        for path in self.config_dir.rglob("*"):
+            try:
+                if path.is_file():
+                    snapshot[str(path)] = path.stat().st_mtime_ns
+            except OSError:
+                continue  # file removed while scanning
+        return snapshot
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            if self._current is not None and self._config_snapshot() != self._snapshot:
+                logger.info(f"Change detected under {self.config_dir}; reloading components")
+                self.reload()
+
+    def start_watching(self) -> None:
+        """Poll config/ mtimes in a daemon thread and hot-reload on change"""
+        if self._watcher and self._watcher.is_alive():
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="config-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._stop.set()
+        if self._watcher:
+            self._watcher.join(timeout=self.poll_seconds + 1)
+            self._watcher = None
+
+
+# One container per process (API server, MCP server)
+components = ComponentContainer()
@@ -2,38 +2,63 @@
 Dynamic Test Generator - Creates BDD tests based on actual website structure
 """
 import logging
+from pathlib import Path
 from typing import Dict, List, Any, Optional
-from .url_scraper import scrape_website
 
 logger = logging.getLogger(__name__)
 
+# Feature built from each analysis area that a scrape diff can report as changed
+AREA_FEATURES = {
+    "page": "Page Loading and Basic Structure",
+    "navigation": "Navigation and Menu System",
+    "search": "Search Functionality",
+    "forms": "Forms and Input Validation",
+    "elements": "Interactive Elements",
+    "content": "Content and Accessibility"
+}
+
 class DynamicTestGenerator:
     """Generates BDD tests based on actual website structure discovered by Playwright"""
     
     def __init__(self):
         self.logger = logging.getLogger(__name__)
     
-    def generate_tests_from_website(self, url: str, headless: bool = True) -> List[Dict[str, Any]]:
+    def generate_tests_from_website(self, url: str, headless: bool = True, **scrape_options) -> List[Dict[str, Any]]:
         """
         Generate BDD tests based on actual website structure
         
         Args:
             url: Website URL to analyze
             headless: Whether to run browser in headless mode
+            scrape_options: scrape_page options (backend, extraction, readiness, profile, offline, ...)
             
         Returns:
             List of BDD features with scenarios based on discovered elements
         """
+        self.logger.info(f"Starting dynamic test generation for: {url}")
+        try:
+            # Imported here so Playwright only loads when a URL is actually scraped
+            from .url_scraper import scrape_website
+            website_analysis = scrape_website(url, headless=headless, **scrape_options)
+        except Exception as e_scrape:
+            self.logger.warning(f"Scrape failed: {e_scrape}; using fallback pack.")
+            return self._generate_fallback_tests(url)
+        return self._features_for_page(url, website_analysis)
+    
+    async def agenerate_tests_from_website(self, url: str, headless: bool = True, **scrape_options) -> List[Dict[str, Any]]:
+        """Async variant of generate_tests_from_website for callers inside an event loop (API handlers)"""
+        self.logger.info(f"Starting dynamic test generation for: {url}")
+        try:
+            from .url_scraper import scrape_website_async
+            website_analysis = await scrape_website_async(url, headless=headless, **scrape_options)
+        except Exception as e_scrape:
+            self.logger.warning(f"Scrape failed: {e_scrape}; using fallback pack.")
+            return self._generate_fallback_tests(url)
+        return self._features_for_page(url, website_analysis)
+    
+    def _features_for_page(self, url: str, website_analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Features from one page analysis, or the fallback pack when it failed"""
         try:
-            self.logger.info(f"Starting dynamic test generation for: {url}")
-            
-            # In threadpool context, call the synchronous wrapper which uses asyncio.run under the hood
-            try:
-                self.logger.info("Starting website scraping (synchronous wrapper)...")
-                website_analysis = scrape_website(url, headless=headless)
-            except Exception as e_scrape:
-                self.logger.warning(f"Scrape failed: {e_scrape}; using fallback pack.")
-                return self._generate_fallback_tests(url)
             self.logger.info(f"Website analysis completed: {website_analysis.keys()}")
             
             if website_analysis.get("error"):
@@ -53,6 +78,110 @@ class DynamicTestGenerator:
             self.logger.error(f"Traceback: {traceback.format_exc()}")
             return self._generate_fallback_tests(url)
     
+    def regenerate_tests_from_website(self,
+                                      url: str,
+                                      previous_features: List[Dict[str, Any]],
+                                      headless: bool = True,
+                                      locator_file: Optional[Path] = None,
+                                      **scrape_options) -> Dict[str, Any]:
+        """
+        Re-scrape url in diff mode and rebuild only the features whose area changed
+        
+        Args:
+            url: Website URL scraped before (its cached snapshot is the baseline)
+            previous_features: Features generated from the earlier scrape; unchanged ones are kept as-is
+            headless: Whether to run browser in headless mode
+            locator_file: JSON locator repository to update for locators that moved
+            scrape_options: scrape_page options
+            
+        Returns:
+            features, names of the regenerated features, the scrape diff and the
+            SelfHealingResults for moved locators
+        """
+        from .url_scraper import scrape_website
+        try:
+            analysis = scrape_website(url, headless=headless, diff=True, **scrape_options)
+        except Exception as e_scrape:
+            analysis = {"error": str(e_scrape)}
+        if analysis.get("error"):
+            self.logger.warning(f"Re-scrape of {url} failed: {analysis['error']}; keeping previous features")
+            return {"features": previous_features, "regenerated": [], "diff": None, "healed": []}
+        
+        diff = analysis["diff"]
+        fresh = self._features_for_page(url, analysis)
+        if not diff["baseline"] or not previous_features:
+            return {"features": fresh, "regenerated": [f["feature_name"] for f in fresh], "diff": diff,
+                    "healed": self._heal_moved_locators(diff, locator_file)}
+        
+        stale = {AREA_FEATURES[area] for area in diff["changed_areas"]}
+        fresh_by_name = {feature["feature_name"]: feature for feature in fresh}
+        features, regenerated = [], []
+        for feature in previous_features:
+            name = feature.get("feature_name")
+            if name not in stale:
+                features.append(feature)
+            elif name in fresh_by_name:  # an area that is gone entirely drops its feature
+                features.append(fresh_by_name[name])
+                regenerated.append(name)
+        previous_names = {feature.get("feature_name") for feature in previous_features}
+        for feature in fresh:
+            if feature["feature_name"] in stale and feature["feature_name"] not in previous_names:
+                features.append(feature)
+                regenerated.append(feature["feature_name"])
+        self.logger.info(f"Regenerated {len(regenerated)} of {len(features)} features for {url}: {regenerated}")
+        return {"features": features, "regenerated": regenerated, "diff": diff,
+                "healed": self._heal_moved_locators(diff, locator_file)}
+    
+    def _heal_moved_locators(self, diff: Dict[str, Any], locator_file: Optional[Path]) -> List[Any]:
+        """Run self-healing for the locators the diff saw move, and nothing else"""
+        if not diff.get("moved_locators"):
+            return []
+        from .self_healing import SelfHealingEngine
+        return SelfHealingEngine().heal_moved_locators(diff["moved_locators"], locator_file)
+    
+    def generate_tests_from_site(self,
+                                 url: str,
+                                 max_depth: int = 2,
+                                 max_pages: int = 50,
+                                 concurrency: int = 4,
+                                 headless: bool = True,
+                                 **scrape_options) -> List[Dict[str, Any]]:
+        """
+        Generate BDD tests for a whole site by crawling its same-origin navigation
+        
+        Args:
+            url: Start page of the crawl
+            max_depth: Link hops followed from the start page
+            max_pages: Upper bound on analyzed pages
+            concurrency: Pages analyzed in parallel
+            headless: Whether to run browser in headless mode
+            scrape_options: scrape_page options applied to every page
+            
+        Returns:
+            List of BDD features built from the merged site analysis
+        """
+        try:
+            self.logger.info(f"Starting site crawl for: {url}")
+            from .site_crawler import crawl_site
+            site_analysis = crawl_site(url, max_depth=max_depth, max_pages=max_pages,
+                                       concurrency=concurrency, headless=headless, **scrape_options)
+        except Exception as e:
+            self.logger.warning(f"Site crawl failed: {e}; using fallback pack.")
+            return self._generate_fallback_tests(url)
+        
+        return self.generate_tests_from_analysis(site_analysis)
+    
+    def generate_tests_from_analysis(self, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Generate BDD tests from an existing page or site analysis"""
+        if analysis.get("error"):
+            self.logger.warning(f"Website analysis failed: {analysis['error']}")
+            return self._generate_fallback_tests(analysis.get("url", ""))
+        
+        features = self._create_features_from_analysis(analysis)
+        pages = len(analysis.get("pages", [])) or 1
+        self.logger.info(f"Generated {len(features)} features from {pages} page(s)")
+        return features
+    
     def _create_features_from_analysis(self, analysis: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Create BDD features based on website analysis"""
         features = []
@@ -96,34 +225,52 @@ class DynamicTestGenerator:
         domain = analysis.get("domain", "website")
         title = analysis.get("title", "Website")
         
+        scenarios = [
+            {
+                "type": "scenario",
+                "name": "Load homepage successfully",
+                "steps": [
+                    "Given I navigate to the website",
+                    f"When I access {domain}",
+                    f"Then I should see the page title \"{title}\"",
+                    "And the page should load completely",
+                    "And all main elements should be visible"
+                ]
+            },
+            {
+                "type": "scenario",
+                "name": "Verify page responsiveness",
+                "steps": [
+                    "Given I am on the homepage",
+                    "When I resize the browser window",
+                    "Then the layout should adapt appropriately",
+                    "And content should remain accessible"
+                ]
+            }
+        ]
+        
+        # Site crawls: every analyzed page besides the start page should load too
+        crawled = [page for page in analysis.get("pages", [])
+                   if not page.get("error") and page.get("url") != analysis.get("url")]
+        if crawled:
+            scenarios.append({
+                "type": "scenario_outline",
+                "name": "Load crawled pages successfully",
+                "steps": [
+                    "Given I navigate to \"<page_url>\"",
+                    "Then I should see the page title \"<page_title>\"",
+                    "And the page should load completely"
+                ],
+                "examples": [{"page_url": page["url"], "page_title": page.get("title", "")}
+                             for page in crawled[:10]]  # Limit to first 10 pages
+            })
+        
         return {
             "feature_name": "Page Loading and Basic Structure",
             "actor": "user",
             "goal": "access and interact with the website",
             "benefit": "successfully use the website functionality",
-            "scenarios": [
-                {
-                    "type": "scenario",
-                    "name": "Load homepage successfully",
-                    "steps": [
-                        "Given I navigate to the website",
-                        f"When I access {domain}",
-                        f"Then I should see the page title \"{title}\"",
-                        "And the page should load completely",
-                        "And all main elements should be visible"
-                    ]
-                },
-                {
-                    "type": "scenario",
-                    "name": "Verify page responsiveness",
-                    "steps": [
-                        "Given I am on the homepage",
-                        "When I resize the browser window",
-                        "Then the layout should adapt appropriately",
-                        "And content should remain accessible"
-                    ]
-                }
-            ]
+            "scenarios": scenarios
         }
     
     def _create_navigation_feature(self, analysis: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,202 @@
+"""
+HTML Analyzer - browserless page analysis from saved or fetched HTML with lxml
+"""
+import logging
+import re
+from typing import Dict, List, Any, Optional
+from urllib.parse import urljoin
+
+import lxml.html
+from lxml.cssselect import CSSSelector
+
+logger = logging.getLogger(__name__)
+
+# Markers of pages whose content only exists after JavaScript runs
+SPA_MOUNT_IDS = ("root", "app", "__next", "__nuxt", "svelte", "main-app")
+SPA_MARKERS = "[data-reactroot], [ng-app], [ng-version], [data-server-rendered='false']"
+MIN_STATIC_TEXT = 200  # visible characters below which a page with scripts is treated as client-rendered
+
+_INPUT_TYPES = {
+    "hidden", "text", "search", "tel", "url", "email", "password", "date", "month", "week",
+    "time", "datetime-local", "number", "range", "color", "checkbox", "radio", "file",
+    "submit", "image", "reset", "button"
+}
+_selectors: Dict[str, CSSSelector] = {}
+
+
+def _select(root, selector: str) -> List[Any]:
+    """querySelectorAll: matches in document order, compiled selectors reused across pages"""
+    compiled = _selectors.get(selector)
+    if compiled is None:
+        compiled = _selectors[selector] = CSSSelector(selector)
+    return compiled(root)
+
+
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+
+def parse(html: str) -> Any:
+    """Document root of html, with <html>/<head>/<body> filled in as a browser would"""
+    # lxml refuses str input that still declares an encoding (XHTML pages); the text is already decoded
+    html = _XML_DECLARATION.sub("", html or "", count=1)
+    return lxml.html.document_fromstring(html if html.strip() else "<html></html>")
+
+
+def _text(el) -> str:
+    """textContent().trim()"""
+    return el.text_content().strip()
+
+
+def _element_type(el) -> str:
+    """The DOM `type` property, including the browser defaults"""
+    tag, declared = el.tag, (el.get("type") or "").strip().lower()
+    if tag == "input":
+        return declared if declared in _INPUT_TYPES else "text"
+    if tag == "button":
+        return declared if declared in ("submit", "reset", "button") else "submit"
+    if tag == "select":
+        return "select-multiple" if el.get("multiple") is not None else "select-one"
+    if tag == "textarea":
+        return "textarea"
+    if tag in ("a", "area", "link", "object", "embed", "source", "ol", "script", "style"):
+        return el.get("type") or ""
+    return ""
+
+
+def dom_path(el) -> str:
+    """Python twin of url_scraper.DOM_PATH_FUNCTION (tag:nth-of-type chain from <html>)"""
+    parts = []
+    node = el
+    while node is not None:
+        position = 1 + sum(1 for sibling in node.itersiblings(preceding=True) if sibling.tag == node.tag)
+        parts.append(f"{node.tag}:nth-of-type({position})")
+        node = node.getparent()
+    return " > ".join(reversed(parts))
+
+
+def client_rendered_reason(root) -> Optional[str]:
+    """Why the HTML looks rendered by JavaScript (so a browser is needed), or None for static pages"""
+    for mount_id in SPA_MOUNT_IDS:
+        mount = root.get_element_by_id(mount_id, None)
+        if mount is not None and len(mount) == 0 and not _text(mount):
+            return f"empty #{mount_id} mount point"
+    if _select(root, SPA_MARKERS):
+        return "client-side framework markers"
+    for noscript in root.iter("noscript"):
+        if "javascript" in _text(noscript).lower():
+            return "page asks for JavaScript"
+    body = root.find("body")
+    scripts = len(list(root.iter("script")))
+    if body is not None and scripts:
+        visible = " ".join(
+            text for el in body.iter() if isinstance(el.tag, str)
+            and el.tag not in ("script", "style", "noscript", "template")
+            for text in (el.text, el.tail if el is not body else None) if text
+        )
+        if len(re.sub(r"\s+", "", visible)) < MIN_STATIC_TEXT:
+            return f"little server-rendered text next to {scripts} scripts"
+    return None
+
+
+def extract_payload(root, url: str, clickable: List[str], inputs: List[str]) -> Dict[str, Any]:
+    """
+    Same payload as url_scraper.SINGLE_PASS_SCRIPT, read from parsed HTML
+
+    There is no layout without a browser, so element positions are zero and load
+    timings are empty; URLs are resolved against url (or the page's <base href>).
+    """
+    base_tag = root.find(".//base")
+    base = urljoin(url, base_tag.get("href", "")) if base_tag is not None else url
+    nodes: List[Dict[str, Any]] = []
+    index: Dict[Any, int] = {}
+
+    def ref(el) -> int:
+        if el in index:
+            return index[el]
+        tag = el.tag
+        classes = (el.get("class") or "").split()
+        selector = f"{tag}:nth-child(n)"
+        if el.get("id"):
+            selector = "#" + el.get("id")
+        elif classes:
+            selector = tag + "." + ".".join(classes)
+        href = el.get("href")
+        nodes.append({
+            "tag": tag,
+            "type": _element_type(el),
+            "text": _text(el),
+            "placeholder": (el.get("placeholder") or "") if tag in ("input", "textarea") else "",
+            "aria_label": el.get("aria-label") or "",
+            "role": el.get("role") or "",
+            "selector": selector,
+            "href": urljoin(base, href) if href is not None and tag in ("a", "area") else "",
+            "path": dom_path(el),
+            "position": {"x": 0, "y": 0, "width": 0, "height": 0}
+        })
+        index[el] = len(nodes) - 1
+        return index[el]
+
+    def refs(scope, selector: str, selector_type: str) -> List[List[Any]]:
+        return [[ref(el), selector_type] for el in _select(scope, selector)]
+
+    def links(containers: str, selector_type: str) -> List[List[Any]]:
+        return [[ref(el), selector_type] for container in _select(root, containers)
+                for el in container.iterdescendants("a")]
+
+    forms = []
+    for form in _select(root, "form"):
+        submit = next(iter(_select(form, "input[type='submit'], button[type='submit'], button:not([type])")), None)
+        method = (form.get("method") or "").strip().lower()
+        forms.append({
+            "action": urljoin(base, form.get("action") or ""),
+            "method": method if method in ("get", "post", "dialog") else "get",
+            "fields": [[ref(el), "form_field"] for el in form.iterdescendants("input", "textarea", "select")],
+            "submit_button": ref(submit) if submit is not None else None
+        })
+
+    return {
+        "title": re.sub(r"\s+", " ", root.findtext(".//title") or "").strip(),
+        "nodes": nodes,
+        "elements": {
+            "clickable": [entry for selector in clickable for entry in refs(root, selector, selector)],
+            "input": [entry for selector in inputs for entry in refs(root, selector, selector)]
+        },
+        "forms": forms,
+        "navigation": {
+            "main_menu": links("nav, [role='navigation'], .nav, .navigation, .menu", "navigation"),
+            "breadcrumbs": links("[role='breadcrumb'], .breadcrumb, .breadcrumbs", "breadcrumb"),
+            "pagination": links(".pagination, .pager, [role='navigation']", "pagination"),
+            "tabs": refs(root, "[role='tab'], .tab, .tabs", "tab")
+        },
+        "interactions": [
+            [ref(el), "interactive", [name for name in ("onclick", "onchange", "onsubmit") if el.get(name) is not None]]
+            for el in _select(root, "[onclick], [onchange], [onsubmit], [onload]")
+        ],
+        "content": {
+            "headings": [
+                {"text": _text(el), "level": int(el.tag[1])}
+                for el in _select(root, "h1, h2, h3, h4, h5, h6") if _text(el)
+            ],
+            "paragraphs": [],
+            "lists": [],
+            "images": [
+                {"src": urljoin(base, el.get("src")), "alt": el.get("alt") or ""}
+                for el in root.iter("img") if el.get("src")
+            ],
+            "tables": []
+        },
+        "accessibility": {
+            "aria_labels": [
+                {"aria_label": el.get("aria-label") or "", "aria_labelledby": el.get("aria-labelledby") or ""}
+                for el in _select(root, "[aria-label], [aria-labelledby]")
+                if el.get("aria-label") or el.get("aria-labelledby")
+            ],
+            "roles": [el.get("role") for el in _select(root, "[role]") if el.get("role")],
+            "landmarks": []
+        },
+        "performance": {
+            "load_time": 0,
+            "resource_count": 0,
+            "dom_size": sum(1 for el in root.iter() if isinstance(el.tag, str))
+        }
+    }
@@ -0,0 +1,175 @@
+"""
+LLM Response Cache - content-addressed on-disk cache for orchestrator calls
+"""
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """SQLite-backed response cache with TTL expiry and size-based LRU eviction"""
+
+    def __init__(self,
+                 path: str = "artifacts/llm_cache.sqlite",
+                 ttl_seconds: int = 86400,
+                 max_entries: int = 5000,
+                 max_size_mb: float = 100):
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_db()
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(str(self.path), timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    task_type TEXT,
+                    provider TEXT,
+                    model TEXT,
+                    content TEXT,
+                    token_count INTEGER,
+                    size_bytes INTEGER,
+                    created_at REAL,
+                    expires_at REAL,
+                    last_accessed REAL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_lru ON responses(last_accessed)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS counters (
+                    task_type TEXT PRIMARY KEY,
+                    hits INTEGER DEFAULT 0,
+                    misses INTEGER DEFAULT 0
+                )
+            """)
+
+    @staticmethod
+    def make_key(prompt: str, system: str, provider: str, model: str,
+                 response_schema: Optional[Dict[str, Any]] = None) -> str:
+        """Content-addressed key over everything that determines the response"""
+        parts: list = [provider, model, system, prompt]
+        if response_schema:
+            parts.append(response_schema)
+        payload = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _count(self, conn: sqlite3.Connection, task_type: str, column: str) -> None:
+        conn.execute("INSERT OR IGNORE INTO counters(task_type) VALUES (?)", (task_type,))
+        conn.execute(f"UPDATE counters SET {column} = {column} + 1 WHERE task_type = ?", (task_type,))
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached entry for key, or None on miss/expiry"""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT provider, model, content, token_count, expires_at FROM responses WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if row and row[4] is not None and row[4] < now:
+                    conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                    row = None
+                if not row:
+                    return None
+                conn.execute("UPDATE responses SET last_accessed = ? WHERE key = ?", (now, key))
+                return {"provider": row[0], "model": row[1], "content": row[2], "token_count": row[3]}
+        except Exception as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+    def record(self, task_type: str, hit: bool) -> None:
+        """Count one cache hit or miss for a task_type"""
+        try:
+            with self._lock, self._connect() as conn:
+                self._count(conn, task_type, "hits" if hit else "misses")
+        except Exception as e:
+            logger.warning(f"LLM cache counter update failed: {e}")
+
+    def put(self,
+            key: str,
+            content: str,
+            provider: str,
+            model: str,
+            task_type: str = "general",
+            token_count: Optional[int] = None,
+            ttl_seconds: Optional[int] = None) -> None:
+        """Store a response and evict expired/least recently used entries"""
+        now = time.time()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, task_type, provider, model, content, token_count,
+                     len(content.encode("utf-8")), now, now + ttl if ttl else None, now)
+                )
+                self._evict(conn, now)
+        except Exception as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at < ?", (now,))
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size_bytes FROM responses ORDER BY last_accessed ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            count -= 1
+            total -= size or 0
+            evicted += 1
+        logger.info(f"LLM cache evicted {evicted} least recently used entries")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters per task_type plus current cache size"""
+        try:
+            with self._lock, self._connect() as conn:
+                count, total = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM responses"
+                ).fetchone()
+                by_task = {
+                    task: {"hits": hits, "misses": misses}
+                    for task, hits, misses in conn.execute("SELECT task_type, hits, misses FROM counters")
+                }
+        except Exception as e:
+            logger.warning(f"LLM cache stats failed: {e}")
+            return {}
+        hits = sum(v["hits"] for v in by_task.values())
+        misses = sum(v["misses"] for v in by_task.values())
+        return {
+            "entries": count,
+            "size_bytes": total,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "by_task_type": by_task,
+        }
+
+    def clear(self) -> None:
+        """Drop all cached responses (counters are kept)"""
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM responses")
@@ -4,7 +4,12 @@ LLM Orchestrator with hybrid routing (local + cloud fallbacks)
 import os
 import json
 import logging
-from typing import Optional, Dict, Any, List
+import asyncio
+import threading
+import weakref
+from collections import deque
+from collections.abc import Mapping
+from typing import Optional, Dict, Any, List, Deque, Callable, Awaitable, AsyncIterator, Tuple, Iterator
 from enum import Enum
 from dataclasses import dataclass
 import time
@@ -14,6 +19,14 @@ try:
 except Exception:
     yaml = None
 
+from .llm_cache import LLMResponseCache
+from .provider_health import provider_health
+from .provider_registry import provider_registry
+from .llm_telemetry import llm_telemetry
+from .rate_limiter import rate_limiter, RateLimitTimeout
+from . import structured_output
+from .structured_output import structured_stats
+
 logger = logging.getLogger(__name__)
 
 
@@ -35,56 +48,67 @@ class LLMResponse:
     latency_ms: float
     token_count: Optional[int] = None
     confidence: Optional[float] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
     error: Optional[str] = None
+    cached: bool = False
+
+
+class ProviderClients(Mapping):
+    """LLMProvider -> SDK client view over the process-wide provider registry"""
+    
+    def __init__(self, enabled: List[LLMProvider]):
+        self._enabled = enabled
+    
+    def __contains__(self, provider: object) -> bool:
+        return provider in self._enabled and provider_registry.configured(provider.value)
+    
+    def __getitem__(self, provider: LLMProvider) -> Any:
+        if provider not in self:
+            raise KeyError(provider)
+        return provider_registry.get(provider.value)
+    
+    def __iter__(self) -> Iterator[LLMProvider]:
+        return (provider for provider in self._enabled if provider in self)
+    
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
 
 
 class LLMOrchestrator:
     """Orchestrates LLM calls with hybrid routing and fallbacks"""
     
+    # Recent successful latencies per provider (process-wide), used for hedging delays
+    _latency_history: Dict[str, Deque[float]] = {}
+    # Event loop thread that sync call() runs hedged races on (like BrowserPool's); one long-lived
+    # loop, so the async SDK clients cached for it are reused instead of leaking one set per call
+    _sync_loop: Optional[asyncio.AbstractEventLoop] = None
+    _sync_loop_lock = threading.Lock()
+    
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         self.config = config or {}
         self.model_config = self._load_model_config()
         self.providers = self._initialize_providers()
+        self.cache = self._initialize_cache()
+        self.health = provider_health
+        self.health.configure(self.model_config.get("circuit_breaker", {}),
+                              self.model_config.get("adaptive_routing", {}))
+        self.rate_limiter = rate_limiter
+        self.rate_limiter.configure(self.model_config.get("rate_limits", {}))
+        self.telemetry = llm_telemetry
+        self.telemetry.configure(self.model_config.get("telemetry", {}))
+        # "interactive" (API) calls are served before "batch" (CLI full runs) when over budget
+        self.priority = self.config.get("priority", "interactive")
         self.sensitive_patterns = ["password", "ssn", "credit", "medical"]
+        # Async SDK clients are bound to the event loop they were created on
+        self._async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[LLMProvider, Any]]" = weakref.WeakKeyDictionary()
         
-    def _initialize_providers(self) -> Dict[LLMProvider, Any]:
-        """Initialize available providers"""
-        providers = {}
-        
-        # Local model (Ollama)
+    def _initialize_providers(self) -> "ProviderClients":
+        """Providers this orchestrator may use; SDK clients are created lazily and shared process-wide"""
+        enabled = [LLMProvider.GROQ, LLMProvider.GEMINI, LLMProvider.OPENAI]
         if self.config.get("enable_local", True):
-            try:
-                import ollama
-                providers[LLMProvider.LOCAL] = ollama.Client()
-            except ImportError:
-                logger.warning("Ollama not available for local model")
-        
-        # Groq
-        if groq_key := os.getenv("GROQ_API_KEY"):
-            try:
-                from groq import Groq
-                providers[LLMProvider.GROQ] = Groq(api_key=groq_key)
-            except ImportError:
-                logger.warning("Groq SDK not available")
-        
-        # Gemini
-        if gemini_key := os.getenv("GOOGLE_API_KEY"):
-            try:
-                import google.generativeai as genai
-                genai.configure(api_key=gemini_key)
-                providers[LLMProvider.GEMINI] = genai  # keep module; instantiate model per call
-            except ImportError:
-                logger.warning("Google Generative AI not available")
-        
-        # OpenAI
-        if openai_key := os.getenv("OPENAI_API_KEY"):
-            try:
-                from openai import OpenAI
-                providers[LLMProvider.OPENAI] = OpenAI(api_key=openai_key)
-            except ImportError:
-                logger.warning("OpenAI SDK not available")
-        
-        return providers
+            enabled.insert(0, LLMProvider.LOCAL)
+        return ProviderClients(enabled)
 
     def _load_model_config(self) -> Dict[str, Any]:
         """Load model names and routing config from config/llm.yml and/or env vars."""
@@ -99,7 +123,48 @@ class LLMOrchestrator:
                 "enable_local": False,
                 "order": ["groq", "gemini", "openai"],
                 "max_retries": 3,
-                "timeout_seconds": 30
+                "timeout_seconds": 30,
+                "mode": "sequential",
+                "hedge_percentile": 0.9,
+                "hedge_min_samples": 5,
+                "hedge_delay_ms": 3000
+            },
+            "circuit_breaker": {
+                "failure_threshold": 3,
+                "recovery_seconds": 60,
+                "half_open_max_calls": 1
+            },
+            "adaptive_routing": {
+                "enabled": True,
+                "alpha": 0.3,
+                "error_penalty_ms": 30000,
+                "min_samples": 3
+            },
+            "rate_limits": {
+                "backend": "memory",
+                "max_wait_seconds": 120,
+                "estimated_output_tokens": 1000,
+                "providers": {}
+            },
+            "telemetry": {
+                "enabled": True,
+                "path": "artifacts/llm_telemetry.jsonl",
+                "max_file_mb": 10,
+                "backup_count": 5,
+                "pricing": {}
+            },
+            "structured_output": {
+                "enabled": True,
+                "llm_repair": True,
+                "modes": {"openai": "json_schema", "groq": "json_object", "gemini": "json_schema", "local": "json_schema"}
+            },
+            "cache": {
+                "enabled": True,
+                "path": "artifacts/llm_cache.sqlite",
+                "ttl_seconds": 86400,
+                "max_entries": 5000,
+                "max_size_mb": 100,
+                "task_types": {}
             }
         }
         cfg_path = Path("config/llm.yml")
@@ -110,11 +175,91 @@ class LLMOrchestrator:
                     defaults["models"].update(data["models"])
                 if "routing" in data:
                     defaults["routing"].update(data["routing"])
+                for section in ("cache", "circuit_breaker", "adaptive_routing", "rate_limits", "structured_output", "telemetry"):
+                    if section in data:
+                        defaults[section].update(data[section] or {})
                 logger.info(f"Loaded LLM config with order: {defaults['routing']['order']}")
             except Exception as e:
                 logger.warning(f"Failed to load config/llm.yml: {e}; using env/defaults")
         return defaults
     
+    def _initialize_cache(self) -> Optional[LLMResponseCache]:
+        """Create the on-disk response cache unless disabled in config"""
+        cache_cfg = {**self.model_config.get("cache", {}), **self.config.get("cache", {})}
+        if not cache_cfg.get("enabled", True):
+            return None
+        try:
+            return LLMResponseCache(
+                path=cache_cfg.get("path", "artifacts/llm_cache.sqlite"),
+                ttl_seconds=cache_cfg.get("ttl_seconds", 86400),
+                max_entries=cache_cfg.get("max_entries", 5000),
+                max_size_mb=cache_cfg.get("max_size_mb", 100)
+            )
+        except Exception as e:
+            logger.warning(f"LLM response cache unavailable: {e}")
+            return None
+
+    def _cache_policy(self, task_type: str) -> Dict[str, Any]:
+        """Resolve cache settings for a task_type (per-task overrides win)"""
+        cache_cfg = self.model_config.get("cache", {})
+        policy = {"enabled": self.cache is not None, "ttl_seconds": cache_cfg.get("ttl_seconds", 86400)}
+        policy.update((cache_cfg.get("task_types") or {}).get(task_type) or {})
+        policy["enabled"] = bool(policy["enabled"]) and self.cache is not None
+        return policy
+
+    def _model_name(self, provider_name: str) -> str:
+        """Configured model for a provider"""
+        return self.model_config["models"].get(provider_name, "")
+
+    def _cache_lookup(self, provider_names: List[str], prompt: str, system: str, task_type: str,
+                      response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Return a cached response for the first candidate provider that has one"""
+        if not self._cache_policy(task_type)["enabled"]:
+            return None
+        start = time.time()
+        available = {provider.value for provider in self.providers}
+        for name in provider_names:
+            if name not in available:
+                continue
+            key = LLMResponseCache.make_key(prompt, system, name, self._model_name(name), response_schema)
+            if entry := self.cache.get(key):
+                logger.info(f"LLM cache hit for {name} ({task_type})")
+                self.cache.record(task_type, hit=True)
+                self.telemetry.record_cache_hit(entry["provider"], entry["model"], task_type)
+                return LLMResponse(
+                    content=entry["content"],
+                    provider=LLMProvider(entry["provider"]),
+                    model=entry["model"],
+                    latency_ms=(time.time() - start) * 1000,
+                    token_count=entry["token_count"],
+                    cached=True
+                )
+        self.cache.record(task_type, hit=False)
+        return None
+
+    def _cache_store(self, response: LLMResponse, prompt: str, system: str, task_type: str,
+                     response_schema: Optional[Dict[str, Any]] = None) -> None:
+        """Persist a successful provider response"""
+        policy = self._cache_policy(task_type)
+        if not policy["enabled"] or response.cached or not response.content:
+            return
+        key = LLMResponseCache.make_key(prompt, system, response.provider.value, response.model, response_schema)
+        self.cache.put(
+            key,
+            content=response.content,
+            provider=response.provider.value,
+            model=response.model,
+            task_type=task_type,
+            token_count=response.token_count,
+            ttl_seconds=policy.get("ttl_seconds")
+        )
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and size of the response cache"""
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
     def _is_sensitive(self, text: str) -> bool:
         """Check if text contains sensitive data"""
         text_lower = text.lower()
@@ -146,7 +291,39 @@ class LLMOrchestrator:
             return True
         return False
     
-    def _call_local(self, prompt: str, system: str) -> Optional[LLMResponse]:
+    def _structured_request(self, provider: LLMProvider, response_schema: Optional[Dict[str, Any]],
+                            system: str) -> Tuple[Dict[str, Any], str]:
+        """Provider-native JSON mode arguments for a response schema, plus the system prompt to send"""
+        cfg = self.model_config.get("structured_output", {})
+        if not response_schema or not cfg.get("enabled", True):
+            return {}, system
+        mode = (cfg.get("modes") or {}).get(provider.value, "none")
+        if mode not in ("json_schema", "json_object"):
+            return {}, system
+        if provider in (LLMProvider.GROQ, LLMProvider.OPENAI):
+            request_schema = structured_output.object_root(structured_output.request_schema(response_schema))
+            if mode == "json_object":
+                # Plain JSON mode does not enforce a schema, so describe it
+                system += f"\n\nRespond with JSON only, matching this schema:\n{json.dumps(request_schema)}"
+                return {"response_format": {"type": "json_object"}}, system
+            if response_schema.get("type") == "array":
+                system += f'\n\nReturn the JSON array wrapped in an object under the key "{structured_output.ARRAY_WRAPPER_KEY}".'
+            return {"response_format": {"type": "json_schema",
+                                        "json_schema": {"name": "response", "schema": request_schema}}}, system
+        if provider == LLMProvider.GEMINI:
+            generation_config: Dict[str, Any] = {"response_mime_type": "application/json"}
+            request_schema = structured_output.request_schema(response_schema, free_form_objects=False)
+            if mode == "json_schema" and request_schema is not None:
+                generation_config["response_schema"] = request_schema
+            else:
+                system += f"\n\nRespond with JSON only, matching this schema:\n{json.dumps(response_schema)}"
+            return {"generation_config": generation_config}, system
+        if provider == LLMProvider.LOCAL:
+            return {"format": structured_output.request_schema(response_schema) if mode == "json_schema" else "json"}, system
+        return {}, system
+    
+    def _call_local(self, prompt: str, system: str,
+                    response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
         """Call local Ollama model"""
         if LLMProvider.LOCAL not in self.providers:
             return None
@@ -155,9 +332,11 @@ class LLMOrchestrator:
             start = time.time()
             client = self.providers[LLMProvider.LOCAL]
             model_name = self.model_config["models"].get("local", "llama3.2")
+            structured, system = self._structured_request(LLMProvider.LOCAL, response_schema, system)
             response = client.generate(
                 model=model_name,
-                prompt=f"{system}\n\n{prompt}"
+                prompt=f"{system}\n\n{prompt}",
+                **structured
             )
             latency = (time.time() - start) * 1000
             
@@ -165,13 +344,16 @@ class LLMOrchestrator:
                 content=response['response'],
                 provider=LLMProvider.LOCAL,
                 model=model_name,
-                latency_ms=latency
+                latency_ms=latency,
+                prompt_tokens=response.get('prompt_eval_count'),
+                completion_tokens=response.get('eval_count')
             )
         except Exception as e:
             logger.error(f"Local model error: {e}")
             return None
     
-    def _call_groq(self, prompt: str, system: str) -> Optional[LLMResponse]:
+    def _call_groq(self, prompt: str, system: str,
+                   response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
         """Call Groq API"""
         if LLMProvider.GROQ not in self.providers:
             return None
@@ -179,6 +361,7 @@ class LLMOrchestrator:
         try:
             start = time.time()
             client = self.providers[LLMProvider.GROQ]
+            structured, system = self._structured_request(LLMProvider.GROQ, response_schema, system)
             response = client.chat.completions.create(
                 model=self.model_config["models"].get("groq", "compound-beta"),
                 messages=[
@@ -186,7 +369,8 @@ class LLMOrchestrator:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=4000
+                max_tokens=4000,
+                **structured
             )
             latency = (time.time() - start) * 1000
             
@@ -195,13 +379,16 @@ class LLMOrchestrator:
                 provider=LLMProvider.GROQ,
                 model=self.model_config["models"].get("groq", "compound-beta"),
                 latency_ms=latency,
-                token_count=response.usage.total_tokens if response.usage else None
+                token_count=response.usage.total_tokens if response.usage else None,
+                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
+                completion_tokens=response.usage.completion_tokens if response.usage else None
             )
         except Exception as e:
             logger.error(f"Groq error: {e}")
             return None
     
-    def _call_gemini(self, prompt: str, system: str) -> Optional[LLMResponse]:
+    def _call_gemini(self, prompt: str, system: str,
+                     response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
         """Call Google Gemini API"""
         if LLMProvider.GEMINI not in self.providers:
             return None
@@ -211,20 +398,26 @@ class LLMOrchestrator:
             genai = self.providers[LLMProvider.GEMINI]
             model_name = self.model_config["models"].get("gemini", "gemini-1.5-flash")
             model = genai.GenerativeModel(model_name)
-            response = model.generate_content(f"{system}\n\n{prompt}")
+            structured, system = self._structured_request(LLMProvider.GEMINI, response_schema, system)
+            response = model.generate_content(f"{system}\n\n{prompt}", **structured)
             latency = (time.time() - start) * 1000
             
+            usage = getattr(response, "usage_metadata", None)
             return LLMResponse(
                 content=response.text,
                 provider=LLMProvider.GEMINI,
                 model=model_name,
-                latency_ms=latency
+                latency_ms=latency,
+                token_count=getattr(usage, "total_token_count", None),
+                prompt_tokens=getattr(usage, "prompt_token_count", None),
+                completion_tokens=getattr(usage, "candidates_token_count", None)
             )
         except Exception as e:
             logger.error(f"Gemini error: {e}")
             return None
     
-    def _call_openai(self, prompt: str, system: str) -> Optional[LLMResponse]:
+    def _call_openai(self, prompt: str, system: str,
+                     response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
         """Call OpenAI API"""
         if LLMProvider.OPENAI not in self.providers:
             return None
@@ -232,6 +425,7 @@ class LLMOrchestrator:
         try:
             start = time.time()
             client = self.providers[LLMProvider.OPENAI]
+            structured, system = self._structured_request(LLMProvider.OPENAI, response_schema, system)
             response = client.chat.completions.create(
                 model=self.model_config["models"].get("openai", "gpt-4o-mini"),
                 messages=[
@@ -239,7 +433,8 @@ class LLMOrchestrator:
                     {"role": "user", "content": prompt}
                 ],
                 temperature=0.1,
-                max_tokens=4000
+                max_tokens=4000,
+                **structured
             )
             latency = (time.time() - start) * 1000
             
@@ -248,17 +443,227 @@ class LLMOrchestrator:
                 provider=LLMProvider.OPENAI,
                 model=self.model_config["models"].get("openai", "gpt-4o-mini"),
                 latency_ms=latency,
-                token_count=response.usage.total_tokens if response.usage else None
+                token_count=response.usage.total_tokens if response.usage else None,
+                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
+                completion_tokens=response.usage.completion_tokens if response.usage else None
             )
         except Exception as e:
             logger.error(f"OpenAI error: {e}")
             return None
     
+    def _async_client(self, provider: LLMProvider) -> Any:
+        """Async SDK client for a provider, cached per running event loop"""
+        clients = self._async_clients.setdefault(asyncio.get_running_loop(), {})
+        if provider not in clients:
+            if provider == LLMProvider.LOCAL:
+                import ollama
+                clients[provider] = ollama.AsyncClient()
+            elif provider == LLMProvider.GROQ:
+                from groq import AsyncGroq
+                clients[provider] = AsyncGroq(api_key=os.getenv("GROQ_API_KEY"))
+            elif provider == LLMProvider.OPENAI:
+                from openai import AsyncOpenAI
+                clients[provider] = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+            else:
+                # Gemini: the configured module exposes generate_content_async per model
+                clients[provider] = self.providers[provider]
+        return clients[provider]
+    
+    async def _acall_local(self, prompt: str, system: str,
+                           response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Call local Ollama model (async)"""
+        if LLMProvider.LOCAL not in self.providers:
+            return None
+        
+        try:
+            start = time.time()
+            client = self._async_client(LLMProvider.LOCAL)
+            model_name = self.model_config["models"].get("local", "llama3.2")
+            structured, system = self._structured_request(LLMProvider.LOCAL, response_schema, system)
+            response = await client.generate(
+                model=model_name,
+                prompt=f"{system}\n\n{prompt}",
+                **structured
+            )
+            latency = (time.time() - start) * 1000
+            
+            return LLMResponse(
+                content=response['response'],
+                provider=LLMProvider.LOCAL,
+                model=model_name,
+                latency_ms=latency,
+                prompt_tokens=response.get('prompt_eval_count'),
+                completion_tokens=response.get('eval_count')
+            )
+        except Exception as e:
+            logger.error(f"Local model error: {e}")
+            return None
+    
+    async def _acall_chat_completion(self, provider: LLMProvider, default_model: str,
+                                     prompt: str, system: str,
+                                     response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Call an OpenAI-compatible chat completions API (Groq/OpenAI) asynchronously"""
+        if provider not in self.providers:
+            return None
+        
+        try:
+            start = time.time()
+            client = self._async_client(provider)
+            model_name = self.model_config["models"].get(provider.value, default_model)
+            structured, system = self._structured_request(provider, response_schema, system)
+            response = await client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=4000,
+                **structured
+            )
+            latency = (time.time() - start) * 1000
+            
+            return LLMResponse(
+                content=response.choices[0].message.content,
+                provider=provider,
+                model=model_name,
+                latency_ms=latency,
+                token_count=response.usage.total_tokens if response.usage else None,
+                prompt_tokens=response.usage.prompt_tokens if response.usage else None,
+                completion_tokens=response.usage.completion_tokens if response.usage else None
+            )
+        except Exception as e:
+            logger.error(f"{provider.value} error: {e}")
+            return None
+    
+    async def _acall_groq(self, prompt: str, system: str,
+                          response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Call Groq API (async)"""
+        return await self._acall_chat_completion(LLMProvider.GROQ, "compound-beta", prompt, system, response_schema)
+    
+    async def _acall_openai(self, prompt: str, system: str,
+                            response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Call OpenAI API (async)"""
+        return await self._acall_chat_completion(LLMProvider.OPENAI, "gpt-4o-mini", prompt, system, response_schema)
+    
+    async def _acall_gemini(self, prompt: str, system: str,
+                            response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """Call Google Gemini API (async)"""
+        if LLMProvider.GEMINI not in self.providers:
+            return None
+        
+        try:
+            start = time.time()
+            genai = self._async_client(LLMProvider.GEMINI)
+            model_name = self.model_config["models"].get("gemini", "gemini-1.5-flash")
+            model = genai.GenerativeModel(model_name)
+            structured, system = self._structured_request(LLMProvider.GEMINI, response_schema, system)
+            response = await model.generate_content_async(f"{system}\n\n{prompt}", **structured)
+            latency = (time.time() - start) * 1000
+            
+            usage = getattr(response, "usage_metadata", None)
+            return LLMResponse(
+                content=response.text,
+                provider=LLMProvider.GEMINI,
+                model=model_name,
+                latency_ms=latency,
+                token_count=getattr(usage, "total_token_count", None),
+                prompt_tokens=getattr(usage, "prompt_token_count", None),
+                completion_tokens=getattr(usage, "candidates_token_count", None)
+            )
+        except Exception as e:
+            logger.error(f"Gemini error: {e}")
+            return None
+    
+    def _provider_ready(self, provider_name: str) -> bool:
+        """Provider is configured and its circuit breaker lets the call through"""
+        try:
+            if LLMProvider(provider_name) not in self.providers:
+                return False
+        except ValueError:
+            return False
+        if not self.health.allow(provider_name):
+            logger.info(f"Skipping {provider_name}: circuit open")
+            return False
+        return True
+    
+    def health_snapshot(self) -> Dict[str, Any]:
+        """Circuit breaker state and routing scores per provider"""
+        return {
+            "order": self.model_config["routing"]["order"],
+            "effective_order": self._routing_candidates("", "general"),
+            "providers": self.health.snapshot(),
+            "clients_loaded": sorted(provider_registry.loaded()),
+            "rate_limits": self.rate_limiter.snapshot()
+        }
+    
+    def _record_success(self, response: LLMResponse, prompt: str, system: str, task_type: str) -> None:
+        """Feed a live (non-cached) response into hedging, health and usage telemetry"""
+        if response.cached:
+            return
+        self.health.record_success(response.provider.value, response.latency_ms)
+        history = self._latency_history.setdefault(response.provider.value, deque(maxlen=200))
+        history.append(response.latency_ms)
+        # Providers that don't report usage get the same ≈4 chars/token estimate as the rate limiter
+        prompt_tokens = response.prompt_tokens
+        completion_tokens = response.completion_tokens
+        estimated = prompt_tokens is None or completion_tokens is None
+        if prompt_tokens is None:
+            prompt_tokens = (len(prompt) + len(system)) // 4
+        if completion_tokens is None:
+            completion_tokens = (max(response.token_count - prompt_tokens, 0) if response.token_count
+                                 else len(response.content or "") // 4)
+        self.telemetry.record(response.provider.value, response.model, task_type,
+                              response.latency_ms, prompt_tokens, completion_tokens, estimated)
+    
+    def _record_failure(self, provider_name: str, task_type: str) -> None:
+        """A provider call failed or timed out"""
+        self.health.record_failure(provider_name)
+        self.telemetry.record_error(provider_name, self._model_name(provider_name), task_type)
+    
+    def _hedge_delay(self, provider_name: str) -> float:
+        """Seconds to wait on a provider before hedging to the next one"""
+        routing = self.model_config["routing"]
+        samples = sorted(self._latency_history.get(provider_name, ()))
+        if len(samples) < routing.get("hedge_min_samples", 5):
+            return routing.get("hedge_delay_ms", 3000) / 1000
+        percentile = routing.get("hedge_percentile", 0.9)
+        return samples[min(len(samples) - 1, int(percentile * len(samples)))] / 1000
+    
+    def _routing_candidates(self,
+                            prompt: str,
+                            task_type: str,
+                            force_provider: Optional[LLMProvider] = None) -> List[str]:
+        """Provider names to try, in order: forced, hybrid local, then configured order"""
+        candidates: List[str] = []
+        # Forced provider
+        if force_provider and force_provider != LLMProvider.CURSOR:
+            candidates.append(force_provider.value)
+        # Hybrid routing
+        if self._should_use_local(prompt, task_type):
+            candidates.append(LLMProvider.LOCAL.value)
+        # Cloud fallback chain - configured order, reordered by recent health
+        order = list(self.model_config["routing"]["order"])
+        if self.model_config.get("adaptive_routing", {}).get("enabled", True):
+            order = self.health.rank(order)
+        candidates.extend(order)
+        return list(dict.fromkeys(candidates))
+    
+    @classmethod
+    def _hedging_loop(cls) -> asyncio.AbstractEventLoop:
+        with cls._sync_loop_lock:
+            if cls._sync_loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="llm-hedging", daemon=True).start()
+                cls._sync_loop = loop
+            return cls._sync_loop
+    
     def call(self, 
              prompt: str, 
              system: str = "You are a helpful assistant.",
              task_type: str = "general",
-             force_provider: Optional[LLMProvider] = None) -> LLMResponse:
+             force_provider: Optional[LLMProvider] = None,
+             response_schema: Optional[Dict[str, Any]] = None) -> LLMResponse:
         """
         Call LLM with hybrid routing and fallbacks
         
@@ -267,45 +672,54 @@ class LLMOrchestrator:
             system: System prompt
             task_type: Type of task (affects routing)
             force_provider: Override routing to use specific provider
+            response_schema: JSON schema for provider-native structured output
+                (see call_json for validated results)
         """
-        # Forced provider
-        if force_provider:
-            handlers = {
-                LLMProvider.LOCAL: self._call_local,
-                LLMProvider.GROQ: self._call_groq,
-                LLMProvider.GEMINI: self._call_gemini,
-                LLMProvider.OPENAI: self._call_openai
-            }
-            if handler := handlers.get(force_provider):
-                if response := handler(prompt, system):
-                    return response
-        
-        # Hybrid routing
-        if self._should_use_local(prompt, task_type):
-            if response := self._call_local(prompt, system):
-                return response
+        # Hedged routing needs an event loop; use one when this thread has none
+        if self.model_config["routing"].get("mode") == "hedged":
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                return asyncio.run_coroutine_threadsafe(
+                    self.acall(prompt, system, task_type, force_provider, response_schema), self._hedging_loop()
+                ).result()
         
-        # Cloud fallback chain - use configured order
         provider_handlers = {
             "groq": self._call_groq,
             "gemini": self._call_gemini,
             "openai": self._call_openai,
             "local": self._call_local
         }
+        candidates = self._routing_candidates(prompt, task_type, force_provider)
         
-        fallback_order = self.model_config["routing"]["order"]
-        logger.info(f"Using LLM fallback order: {fallback_order}")
+        if cached := self._cache_lookup(candidates, prompt, system, task_type, response_schema):
+            return cached
         
-        for provider_name in fallback_order:
+        logger.info(f"Using LLM fallback order: {candidates}")
+        for provider_name in candidates:
             if handler := provider_handlers.get(provider_name):
+                if not self._provider_ready(provider_name):
+                    continue
+                estimated = self._estimate_tokens(prompt, system)
+                if not self.rate_limiter.acquire(provider_name, estimated, self.priority):
+                    self.health.record_cancelled(provider_name)
+                    continue
                 logger.info(f"Trying LLM provider: {provider_name}")
-                if response := handler(prompt, system):
+                if response := handler(prompt, system, response_schema):
+                    self.rate_limiter.settle(provider_name, estimated, response.token_count)
                     logger.info(f"✅ {provider_name} succeeded")
+                    self._record_success(response, prompt, system, task_type)
+                    self._cache_store(response, prompt, system, task_type, response_schema)
                     return response
                 else:
+                    self.rate_limiter.release(provider_name, estimated)
+                    self._record_failure(provider_name, task_type)
                     logger.warning(f"❌ {provider_name} failed, trying next provider")
         
-        # All failed
+        return self._failed_response()
+    
+    def _failed_response(self) -> LLMResponse:
+        """Response returned when every provider failed"""
         return LLMResponse(
             content="",
             provider=LLMProvider.LOCAL,
@@ -314,18 +728,270 @@ class LLMOrchestrator:
             error="All LLM providers failed"
         )
     
+    def _async_handlers(self) -> Dict[str, Callable[..., Awaitable[Optional[LLMResponse]]]]:
+        return {
+            "groq": self._acall_groq,
+            "gemini": self._acall_gemini,
+            "openai": self._acall_openai,
+            "local": self._acall_local
+        }
+    
+    def _estimate_tokens(self, prompt: str, system: str) -> int:
+        """Rough token estimate (≈4 chars/token) plus expected completion size for TPM budgets"""
+        expected_output = self.model_config.get("rate_limits", {}).get("estimated_output_tokens", 1000)
+        return (len(prompt) + len(system)) // 4 + expected_output
+    
+    async def _aguarded_call(self, provider_name: str,
+                             handler: Callable[..., Awaitable[Optional[LLMResponse]]],
+                             prompt: str, system: str, timeout: float,
+                             response_schema: Optional[Dict[str, Any]] = None) -> Optional[LLMResponse]:
+        """
+        Wait for rate-limit budget, then call the provider bounded by the routing timeout;
+        the reservation goes back when the call fails, times out or is cancelled (hedging)
+        """
+        estimated = self._estimate_tokens(prompt, system)
+        if not await self.rate_limiter.aacquire(provider_name, estimated, self.priority):
+            self.health.record_cancelled(provider_name)
+            raise RateLimitTimeout(provider_name)
+        try:
+            response = await asyncio.wait_for(handler(prompt, system, response_schema), timeout)
+        except BaseException:
+            self.rate_limiter.release(provider_name, estimated)
+            raise
+        if response:
+            self.rate_limiter.settle(provider_name, estimated, response.token_count)
+        else:
+            self.rate_limiter.release(provider_name, estimated)
+        return response
+    
+    async def _acall_sequential(self, candidates: List[str], prompt: str, system: str,
+                                response_schema: Optional[Dict[str, Any]] = None,
+                                task_type: str = "general") -> Optional[LLMResponse]:
+        """Try providers one at a time, each bounded by the routing timeout"""
+        handlers = self._async_handlers()
+        timeout = self.model_config["routing"].get("timeout_seconds", 30)
+        for provider_name in candidates:
+            if handler := handlers.get(provider_name):
+                if not self._provider_ready(provider_name):
+                    continue
+                logger.info(f"Trying LLM provider: {provider_name}")
+                try:
+                    response = await self._aguarded_call(provider_name, handler, prompt, system, timeout, response_schema)
+                except RateLimitTimeout:
+                    continue
+                except asyncio.TimeoutError:
+                    self._record_failure(provider_name, task_type)
+                    logger.warning(f"❌ {provider_name} timed out after {timeout}s")
+                    continue
+                if response and response.content:
+                    logger.info(f"✅ {provider_name} succeeded")
+                    return response
+                self._record_failure(provider_name, task_type)
+                logger.warning(f"❌ {provider_name} failed, trying next provider")
+        return None
+    
+    async def _acall_hedged(self, candidates: List[str], prompt: str, system: str,
+                            response_schema: Optional[Dict[str, Any]] = None,
+                            task_type: str = "general") -> Optional[LLMResponse]:
+        """
+        Race providers: fire the next one when the current one exceeds its latency
+        percentile (or fails), return the first valid response and cancel the rest.
+        """
+        handlers = self._async_handlers()
+        queue = [name for name in candidates if name in handlers]
+        timeout = self.model_config["routing"].get("timeout_seconds", 30)
+        pending: Dict["asyncio.Task[Optional[LLMResponse]]", str] = {}
+        last_launched = ""
+        
+        def launch() -> str:
+            while queue and not self._provider_ready(queue[0]):
+                queue.pop(0)
+            if not queue:
+                return last_launched
+            name = queue.pop(0)
+            logger.info(f"Hedged routing: firing {name}")
+            task = asyncio.ensure_future(
+                self._aguarded_call(name, handlers[name], prompt, system, timeout, response_schema)
+            )
+            pending[task] = name
+            return name
+        
+        try:
+            while queue or pending:
+                if not pending:
+                    last_launched = launch()
+                    if not pending:
+                        break
+                delay = self._hedge_delay(last_launched) if queue else None
+                done, _ = await asyncio.wait(list(pending), timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    logger.info(f"Hedged routing: {last_launched} slower than {delay:.2f}s, hedging")
+                    last_launched = launch()
+                    continue
+                for task in done:
+                    name = pending.pop(task)
+                    error = task.exception() if not task.cancelled() else None
+                    response = task.result() if not task.cancelled() and error is None else None
+                    if response and response.content:
+                        logger.info(f"✅ {name} won hedged race")
+                        return response
+                    if not isinstance(error, RateLimitTimeout):
+                        self._record_failure(name, task_type)
+                    logger.warning(f"❌ {name} failed in hedged race")
+                if queue:
+                    last_launched = launch()
+            return None
+        finally:
+            for task, name in pending.items():
+                task.cancel()
+                self.health.record_cancelled(name)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+    
+    async def acall(self,
+                    prompt: str,
+                    system: str = "You are a helpful assistant.",
+                    task_type: str = "general",
+                    force_provider: Optional[LLMProvider] = None,
+                    response_schema: Optional[Dict[str, Any]] = None) -> LLMResponse:
+        """
+        Async LLM call using the providers' async clients
+        
+        Honors routing.mode from config/llm.yml: "sequential" walks routing.order,
+        "hedged" races providers after a latency-percentile delay.
+        """
+        candidates = self._routing_candidates(prompt, task_type, force_provider)
+        
+        if cached := await asyncio.to_thread(self._cache_lookup, candidates, prompt, system, task_type, response_schema):
+            return cached
+        
+        logger.info(f"Using LLM fallback order: {candidates}")
+        if self.model_config["routing"].get("mode") == "hedged":
+            response = await self._acall_hedged(candidates, prompt, system, response_schema, task_type)
+        else:
+            response = await self._acall_sequential(candidates, prompt, system, response_schema, task_type)
+        
+        if not response:
+            return self._failed_response()
+        self._record_success(response, prompt, system, task_type)
+        await asyncio.to_thread(self._cache_store, response, prompt, system, task_type, response_schema)
+        return response
+    
+    async def _astream_provider(self, provider: LLMProvider, prompt: str, system: str) -> AsyncIterator[str]:
+        """Yield text chunks from a provider's streaming API"""
+        client = self._async_client(provider)
+        model_name = self._model_name(provider.value)
+        if provider == LLMProvider.LOCAL:
+            stream = await client.generate(model=model_name, prompt=f"{system}\n\n{prompt}", stream=True)
+            async for part in stream:
+                if text := part.get("response"):
+                    yield text
+        elif provider == LLMProvider.GEMINI:
+            model = client.GenerativeModel(model_name)
+            stream = await model.generate_content_async(f"{system}\n\n{prompt}", stream=True)
+            async for chunk in stream:
+                if text := getattr(chunk, "text", ""):
+                    yield text
+        else:
+            stream = await client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": system},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                max_tokens=4000,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and (text := chunk.choices[0].delta.content):
+                    yield text
+    
+    async def astream(self,
+                      prompt: str,
+                      system: str = "You are a helpful assistant.",
+                      task_type: str = "general",
+                      force_provider: Optional[LLMProvider] = None) -> AsyncIterator[str]:
+        """
+        Stream the response as text chunks
+        
+        Providers are tried in routing order until one produces its first chunk
+        (bounded by routing.timeout_seconds); after that the stream is committed to
+        that provider. Cache hits are yielded as a single chunk and complete
+        streams are written back to the cache.
+        """
+        candidates = self._routing_candidates(prompt, task_type, force_provider)
+        if cached := await asyncio.to_thread(self._cache_lookup, candidates, prompt, system, task_type):
+            yield cached.content
+            return
+        
+        timeout = self.model_config["routing"].get("timeout_seconds", 30)
+        for provider_name in candidates:
+            if not self._provider_ready(provider_name):
+                continue
+            estimated = self._estimate_tokens(prompt, system)
+            if not await self.rate_limiter.aacquire(provider_name, estimated, self.priority):
+                self.health.record_cancelled(provider_name)
+                continue
+            
+            logger.info(f"Streaming from LLM provider: {provider_name}")
+            start = time.time()
+            provider = LLMProvider(provider_name)
+            stream = self._astream_provider(provider, prompt, system)
+            try:
+                first = await asyncio.wait_for(stream.__anext__(), timeout)
+            except asyncio.CancelledError:
+                self.rate_limiter.release(provider_name, estimated)
+                await stream.aclose()
+                raise
+            except Exception as e:
+                self.rate_limiter.release(provider_name, estimated)
+                await stream.aclose()
+                self._record_failure(provider_name, task_type)
+                logger.warning(f"❌ {provider_name} stream failed to start ({e or type(e).__name__}), trying next provider")
+                continue
+            
+            parts = [first]
+            # Streams report no usage; same ≈4 chars/token estimate as the reservation
+            used = lambda: (len(prompt) + len(system) + sum(len(part) for part in parts)) // 4
+            try:
+                yield first
+                async for text in stream:
+                    parts.append(text)
+                    yield text
+            except BaseException as e:
+                # Interrupted, or the consumer stopped reading: pay for what was streamed
+                self.rate_limiter.settle(provider_name, estimated, used())
+                if isinstance(e, Exception):
+                    self._record_failure(provider_name, task_type)
+                    logger.error(f"{provider_name} stream interrupted: {e}")
+                raise
+            
+            response = LLMResponse(
+                content="".join(parts),
+                provider=provider,
+                model=self._model_name(provider_name),
+                latency_ms=(time.time() - start) * 1000,
+                token_count=used()
+            )
+            self.rate_limiter.settle(provider_name, estimated, response.token_count)
+            logger.info(f"✅ {provider_name} stream completed")
+            self._record_success(response, prompt, system, task_type)
+            await asyncio.to_thread(self._cache_store, response, prompt, system, task_type)
+            return
+        
+        raise RuntimeError("All LLM providers failed")
+    
     def validate_json_response(self, response: str, schema: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """Validate JSON response against schema"""
         try:
             data = json.loads(response)
-            # Basic validation - would use jsonschema in production
-            required_fields = schema.get("required", [])
-            for field in required_fields:
-                if field not in data:
-                    return False, f"Missing required field: {field}"
-            return True, None
         except json.JSONDecodeError as e:
             return False, f"Invalid JSON: {e}"
+        errors = structured_output.validate(data, schema)
+        if errors:
+            return False, "; ".join(errors)
+        return True, None
     
     def repair_json(self, invalid_json: str, error: str, schema: Dict[str, Any]) -> Optional[str]:
         """Attempt to repair invalid JSON using LLM"""
@@ -343,11 +1009,52 @@ Required schema:
         response = self.call(
             prompt=repair_prompt,
             system="You are a JSON repair expert. Return only valid JSON.",
-            task_type="schema_fix"
+            task_type="schema_fix",
+            response_schema=schema
         )
         
-        if response.content:
-            valid, _ = self.validate_json_response(response.content, schema)
-            if valid:
-                return response.content
+        data, errors, _ = structured_output.coerce(response.content, schema)
+        if data is not None and not errors:
+            return json.dumps(data)
         return None
+    
+    def call_json(self,
+                  prompt: str,
+                  schema: Dict[str, Any],
+                  system: str = "You are a helpful assistant.",
+                  task_type: str = "general",
+                  force_provider: Optional[LLMProvider] = None) -> Tuple[Optional[Any], LLMResponse]:
+        """
+        Call the LLM for a JSON value matching schema
+        
+        Providers are asked for native structured output (structured_output.modes in
+        config/llm.yml); the result is validated and fixed locally, and repair_json
+        (a second LLM call) only runs when that is not enough.
+        
+        Returns:
+            (parsed value or None, provider response)
+        """
+        response = self.call(prompt, system, task_type, force_provider, response_schema=schema)
+        if not response.content:
+            structured_stats.record(task_type, "no_response")
+            return None, response
+        data, errors, fixed = structured_output.coerce(response.content, schema)
+        if data is not None and not errors:
+            structured_stats.record(task_type, "fixed_locally" if fixed else "valid")
+            return data, response
+        if self.model_config.get("structured_output", {}).get("llm_repair", True):
+            logger.info(f"Structured output for {task_type} invalid after local fix ({'; '.join(errors[:3])}); asking LLM to repair")
+            snippet = json.dumps(data) if data is not None else response.content
+            if repaired := self.repair_json(snippet, "; ".join(errors), schema):
+                structured_stats.record(task_type, "repaired")
+                return json.loads(repaired), response
+        structured_stats.record(task_type, "failed")
+        return None, response
+    
+    def usage_metrics(self) -> Dict[str, Any]:
+        """Latency histograms, tokens and estimated cost per provider/model/task_type"""
+        return self.telemetry.snapshot()
+    
+    def structured_output_stats(self) -> Dict[str, Any]:
+        """How often structured responses were valid, fixed locally or still needed an LLM repair"""
+        return structured_stats.snapshot()
@@ -0,0 +1,221 @@
+"""
+LLM Telemetry - per provider/model/task_type latency histograms, token counts and estimated cost
+"""
+import json
+import logging
+import logging.handlers
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS_MS = [100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000]
+
+# (provider, model, task_type)
+SeriesKey = Tuple[str, str, str]
+
+
+def _label_value(value: Any) -> str:
+    """Escape a Prometheus label value"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class LLMTelemetry:
+    """
+    Process-wide aggregation of LLM calls. Every call is also appended as one JSON
+    line to a size-rotated local file for offline analysis.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.enabled = True
+        self.buckets_ms: List[float] = list(DEFAULT_BUCKETS_MS)
+        self.pricing: Dict[str, Dict[str, float]] = {}
+        self._series: Dict[SeriesKey, Dict[str, Any]] = {}
+        self._file_cfg: Optional[Tuple[str, int, int]] = None
+        self._file_logger = logging.getLogger("specweaver.llm_telemetry")
+        self._file_logger.propagate = False
+        self._file_logger.setLevel(logging.INFO)
+
+    def configure(self, cfg: Dict[str, Any]) -> None:
+        """Apply the telemetry section of config/llm.yml"""
+        with self._lock:
+            self.enabled = cfg.get("enabled", True)
+            self.pricing = {model: dict(price or {}) for model, price in (cfg.get("pricing") or {}).items()}
+            buckets = sorted(cfg.get("buckets_ms") or DEFAULT_BUCKETS_MS)
+            if buckets != self.buckets_ms:
+                self.buckets_ms = buckets
+                self._series.clear()  # histograms with different buckets cannot be merged
+            path = cfg.get("path", "artifacts/llm_telemetry.jsonl")
+            file_cfg = (path, int(cfg.get("max_file_mb", 10) * 1024 * 1024), int(cfg.get("backup_count", 5)))
+            if self.enabled and path and file_cfg != self._file_cfg:
+                self._open_file(*file_cfg)
+
+    def _open_file(self, path: str, max_bytes: int, backup_count: int) -> None:
+        for handler in list(self._file_logger.handlers):
+            self._file_logger.removeHandler(handler)
+            handler.close()
+        try:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backup_count)
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._file_logger.addHandler(handler)
+            self._file_cfg = (path, max_bytes, backup_count)
+        except OSError as e:
+            logger.warning(f"LLM telemetry file unavailable ({e}); keeping in-memory metrics only")
+            self._file_cfg = None
+
+    def _series_for(self, key: SeriesKey) -> Dict[str, Any]:
+        if key not in self._series:
+            self._series[key] = {
+                "requests": 0, "errors": 0, "cache_hits": 0,
+                "latency_buckets": [0] * (len(self.buckets_ms) + 1),  # last bucket is +Inf
+                "latency_sum_ms": 0.0,
+                "prompt_tokens": 0, "completion_tokens": 0, "estimated_tokens": 0,
+                "cost_usd": 0.0,
+            }
+        return self._series[key]
+
+    def cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        """Estimated USD cost from per-million-token prices; unpriced models cost 0"""
+        price = self.pricing.get(model) or {}
+        return (prompt_tokens * price.get("input_per_1m", 0.0)
+                + completion_tokens * price.get("output_per_1m", 0.0)) / 1_000_000
+
+    def record(self,
+               provider: str,
+               model: str,
+               task_type: str,
+               latency_ms: float,
+               prompt_tokens: int,
+               completion_tokens: int,
+               estimated: bool = False) -> None:
+        """One successful provider call"""
+        if not self.enabled:
+            return
+        cost = self.cost(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            series = self._series_for((provider, model, task_type))
+            series["requests"] += 1
+            series["latency_sum_ms"] += latency_ms
+            bucket = next((i for i, bound in enumerate(self.buckets_ms) if latency_ms <= bound), len(self.buckets_ms))
+            series["latency_buckets"][bucket] += 1
+            series["prompt_tokens"] += prompt_tokens
+            series["completion_tokens"] += completion_tokens
+            series["estimated_tokens"] += (prompt_tokens + completion_tokens) if estimated else 0
+            series["cost_usd"] += cost
+        self._write({"outcome": "success", "provider": provider, "model": model, "task_type": task_type,
+                     "latency_ms": round(latency_ms, 1), "prompt_tokens": prompt_tokens,
+                     "completion_tokens": completion_tokens, "estimated_tokens": estimated,
+                     "cost_usd": round(cost, 6)})
+
+    def record_error(self, provider: str, model: str, task_type: str) -> None:
+        """A provider call that failed or timed out"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._series_for((provider, model, task_type))["errors"] += 1
+        self._write({"outcome": "error", "provider": provider, "model": model, "task_type": task_type})
+
+    def record_cache_hit(self, provider: str, model: str, task_type: str) -> None:
+        """A call answered from the response cache (no provider cost)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._series_for((provider, model, task_type))["cache_hits"] += 1
+        self._write({"outcome": "cache_hit", "provider": provider, "model": model, "task_type": task_type})
+
+    def _write(self, event: Dict[str, Any]) -> None:
+        if self._file_logger.handlers:
+            try:
+                self._file_logger.info(json.dumps({"ts": time.time(), **event}))
+            except Exception as e:
+                logger.debug(f"LLM telemetry write failed: {e}")
+
+    def _quantile(self, buckets: List[int], q: float) -> Optional[float]:
+        """Upper bucket bound containing the q-quantile (None if beyond the largest bucket)"""
+        total = sum(buckets)
+        running = 0
+        for bound, count in zip(self.buckets_ms, buckets):
+            running += count
+            if total and running >= q * total:
+                return bound
+        return None
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-series metrics plus totals by task_type and provider"""
+        with self._lock:
+            series = [(key, dict(value, latency_buckets=list(value["latency_buckets"])))
+                      for key, value in self._series.items()]
+        rows = []
+        by_task: Dict[str, Dict[str, float]] = {}
+        by_provider: Dict[str, Dict[str, float]] = {}
+        for (provider, model, task_type), value in sorted(series, key=lambda item: item[0]):
+            rows.append({
+                "provider": provider, "model": model, "task_type": task_type,
+                **{k: v for k, v in value.items() if k != "latency_buckets"},
+                "avg_latency_ms": value["latency_sum_ms"] / value["requests"] if value["requests"] else None,
+                "p50_latency_ms": self._quantile(value["latency_buckets"], 0.5),
+                "p95_latency_ms": self._quantile(value["latency_buckets"], 0.95),
+                "latency_histogram_ms": dict(zip([str(b) for b in self.buckets_ms] + ["+Inf"], value["latency_buckets"])),
+            })
+            for group, name in ((by_task, task_type), (by_provider, provider)):
+                totals = group.setdefault(name, {"requests": 0, "errors": 0, "cache_hits": 0, "tokens": 0,
+                                                 "cost_usd": 0.0, "latency_sum_ms": 0.0})
+                totals["requests"] += value["requests"]
+                totals["errors"] += value["errors"]
+                totals["cache_hits"] += value["cache_hits"]
+                totals["tokens"] += value["prompt_tokens"] + value["completion_tokens"]
+                totals["cost_usd"] += value["cost_usd"]
+                totals["latency_sum_ms"] += value["latency_sum_ms"]
+        return {
+            "series": rows,
+            "by_task_type": by_task,
+            "by_provider": by_provider,
+            "total_cost_usd": sum(row["cost_usd"] for row in rows),
+            "log_file": self._file_cfg[0] if self._file_cfg else None,
+        }
+
+    def prometheus(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        with self._lock:
+            series = sorted(((key, dict(value, latency_buckets=list(value["latency_buckets"])))
+                             for key, value in self._series.items()), key=lambda item: item[0])
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def labels(key: SeriesKey, **extra: str) -> str:
+            pairs = dict(zip(("provider", "model", "task_type"), key), **extra)
+            return ",".join(f'{k}="{_label_value(v)}"' for k, v in pairs.items())
+
+        metric("specweaver_llm_requests_total", "counter", "LLM calls by outcome")
+        for key, value in series:
+            for outcome, field in (("success", "requests"), ("error", "errors"), ("cache_hit", "cache_hits")):
+                lines.append(f"specweaver_llm_requests_total{{{labels(key, outcome=outcome)}}} {value[field]}")
+
+        metric("specweaver_llm_latency_ms", "histogram", "Latency of successful provider calls in milliseconds")
+        for key, value in series:
+            cumulative = 0
+            for bound, count in zip([str(b) for b in self.buckets_ms] + ["+Inf"], value["latency_buckets"]):
+                cumulative += count
+                lines.append(f"specweaver_llm_latency_ms_bucket{{{labels(key, le=bound)}}} {cumulative}")
+            lines.append(f"specweaver_llm_latency_ms_sum{{{labels(key)}}} {value['latency_sum_ms']:.1f}")
+            lines.append(f"specweaver_llm_latency_ms_count{{{labels(key)}}} {value['requests']}")
+
+        metric("specweaver_llm_tokens_total", "counter", "Tokens sent and received")
+        for key, value in series:
+            lines.append(f"specweaver_llm_tokens_total{{{labels(key, kind='prompt')}}} {value['prompt_tokens']}")
+            lines.append(f"specweaver_llm_tokens_total{{{labels(key, kind='completion')}}} {value['completion_tokens']}")
+
+        metric("specweaver_llm_cost_usd_total", "counter", "Estimated spend in USD")
+        for key, value in series:
+            lines.append(f"specweaver_llm_cost_usd_total{{{labels(key)}}} {value['cost_usd']:.6f}")
+        return "\n".join(lines) + "\n"
+
+
+llm_telemetry = LLMTelemetry()
@@ -0,0 +1,333 @@
+"""
+Metrics Log - append-only run metrics with incrementally maintained rollups
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the run duration histogram kept per rollup; percentiles
+# are interpolated inside a bucket, so they stay O(1) however many runs there are
+DURATION_BUCKETS = (1, 2, 5, 10, 20, 30, 60, 120, 300, 600, 1200, 1800, 3600, float("inf"))
+PERCENTILES = (50, 90, 95, 99)
+
+PASSED_STATUSES = ("completed",)
+FAILED_STATUSES = ("failed", "error")
+
+
+def _parse_time(value: Any) -> Optional[datetime]:
+    if isinstance(value, datetime):
+        return value
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        return None
+
+
+def run_summary(run: Dict[str, Any]) -> Dict[str, Any]:
+    """The metrics entry for a finished run record (as returned by run_store.update_run)"""
+    started = _parse_time(run.get("started_at")) or _parse_time(run.get("created_at"))
+    completed = _parse_time(run.get("completed_at"))
+    return {
+        "run_id": run.get("id"),
+        "session_id": run.get("session_id"),
+        "status": run.get("status"),
+        "created_at": run.get("created_at"),
+        "completed_at": run.get("completed_at"),
+        "duration_seconds": round((completed - started).total_seconds(), 3) if started and completed else None,
+        "ui_mode": run.get("ui_mode"),
+        "api_mode": run.get("api_mode")
+    }
+
+
+def _percentiles(histogram: List[int], count: int, maximum: float) -> Dict[str, Optional[float]]:
+    """Percentiles estimated from the bucket counts, linear inside a bucket"""
+    result: Dict[str, Optional[float]] = {}
+    for percentile in PERCENTILES:
+        if not count:
+            result[f"p{percentile}"] = None
+            continue
+        rank = count * percentile / 100
+        seen = 0
+        for index, bucket_count in enumerate(histogram):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = DURATION_BUCKETS[index - 1] if index else 0
+                upper = min(DURATION_BUCKETS[index], maximum)
+                result[f"p{percentile}"] = round(lower + (upper - lower) * (rank - seen) / bucket_count, 3)
+                break
+            seen += bucket_count
+    return result
+
+
+class MetricsLog:
+    """
+    Run metrics as append-only JSONL segments, one file per UTC day
+    (metrics-YYYY-MM-DD.jsonl), so a write is a single appended line and a
+    time-windowed read only opens the days in the window. Rollups per day, per
+    session and overall (runs, pass rate, duration percentiles) live in
+    rollups.sqlite and are updated with each entry; rebuild_rollups() replays the log.
+    """
+
+    def __init__(self, root: str = "artifacts/metrics"):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @classmethod
+    def from_env(cls) -> "MetricsLog":
+        return cls(root=os.getenv("METRICS_LOG_DIR", "artifacts/metrics"))
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._ready:
+            self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.root / "rollups.sqlite"), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            if not self._ready:
+                with self._lock:
+                    conn.execute("""
+                        CREATE TABLE IF NOT EXISTS rollups (
+                            scope TEXT NOT NULL,
+                            key TEXT NOT NULL,
+                            runs INTEGER NOT NULL DEFAULT 0,
+                            passed INTEGER NOT NULL DEFAULT 0,
+                            failed INTEGER NOT NULL DEFAULT 0,
+                            duration_count INTEGER NOT NULL DEFAULT 0,
+                            duration_sum REAL NOT NULL DEFAULT 0,
+                            duration_max REAL NOT NULL DEFAULT 0,
+                            histogram TEXT NOT NULL,
+                            first_at TEXT,
+                            last_at TEXT,
+                            PRIMARY KEY (scope, key)
+                        )
+                    """)
+                    conn.execute("CREATE INDEX IF NOT EXISTS idx_rollups_last_at ON rollups(scope, last_at)")
+                    self._ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    def _segment(self, day: str) -> Path:
+        return self.root / f"metrics-{day}.jsonl"
+
+    def _segments(self, since: Optional[str] = None, until: Optional[str] = None) -> List[Tuple[str, Path]]:
+        """(day, path) of the segments overlapping [since, until], oldest first"""
+        if not self.root.exists():
+            return []
+        days = sorted(path.stem[len("metrics-"):] for path in self.root.glob("metrics-*.jsonl"))
+        return [(day, self._segment(day)) for day in days
+                if (not since or day >= since[:10]) and (not until or day <= until[:10])]
+
+    # -- writing -----------------------------------------------------------
+
+    def record(self, summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Append one metrics entry and fold it into the rollups"""
+        recorded_at = _parse_time(summary.get("completed_at")) or _parse_time(summary.get("created_at")) \
+            or datetime.utcnow()
+        entry = {**summary, "recorded_at": recorded_at.isoformat()}
+        line = json.dumps(entry, default=str) + "\n"
+        if not self._ready:
+            self.root.mkdir(parents=True, exist_ok=True)
+        # One write() per line on an O_APPEND file: concurrent writers never interleave lines
+        with open(self._segment(entry["recorded_at"][:10]), "a", encoding="utf-8") as f:
+            f.write(line)
+        try:
+            with self._connect() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    self._fold(conn, entry)
+                except Exception:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+        except Exception:
+            logger.exception(f"Failed to update metrics rollups for run {summary.get('run_id')}")
+        return entry
+
+    def _fold(self, conn: sqlite3.Connection, entry: Dict[str, Any]) -> None:
+        status = entry.get("status")
+        duration = entry.get("duration_seconds")
+        recorded_at = entry["recorded_at"]
+        keys = [("all", "all"), ("day", recorded_at[:10])]
+        if entry.get("session_id"):
+            keys.append(("session", str(entry["session_id"])))
+        for scope, key in keys:
+            row = conn.execute("SELECT * FROM rollups WHERE scope = ? AND key = ?", (scope, key)).fetchone()
+            histogram = json.loads(row["histogram"]) if row else [0] * len(DURATION_BUCKETS)
+            values = dict(row) if row else {"runs": 0, "passed": 0, "failed": 0, "duration_count": 0,
+                                            "duration_sum": 0.0, "duration_max": 0.0,
+                                            "first_at": recorded_at, "last_at": recorded_at}
+            values["runs"] += 1
+            values["passed"] += status in PASSED_STATUSES
+            values["failed"] += status in FAILED_STATUSES
+            if isinstance(duration, (int, float)) and duration >= 0:
+                histogram[bisect_left(DURATION_BUCKETS, duration)] += 1
+                values["duration_count"] += 1
+                values["duration_sum"] += duration
+                values["duration_max"] = max(values["duration_max"], duration)
+            values["first_at"] = min(values["first_at"] or recorded_at, recorded_at)
+            values["last_at"] = max(values["last_at"] or recorded_at, recorded_at)
+            conn.execute(
+                """INSERT OR REPLACE INTO rollups (scope, key, runs, passed, failed, duration_count,
+                       duration_sum, duration_max, histogram, first_at, last_at)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (scope, key, values["runs"], values["passed"], values["failed"], values["duration_count"],
+                 values["duration_sum"], values["duration_max"], json.dumps(histogram),
+                 values["first_at"], values["last_at"])
+            )
+
+    def rebuild_rollups(self) -> int:
+        """Recompute every rollup from the log (after a crash between append and rollup update)"""
+        entries = 0
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM rollups")
+                for _, path in self._segments():
+                    with open(path, encoding="utf-8") as f:
+                        for line in f:
+                            if line.strip():
+                                self._fold(conn, json.loads(line))
+                                entries += 1
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        logger.info(f"Rebuilt metrics rollups from {entries} entries")
+        return entries
+
+    # -- reading -----------------------------------------------------------
+
+    def query(self,
+              since: Optional[str] = None,
+              until: Optional[str] = None,
+              session_id: Optional[str] = None,
+              status: Optional[str] = None,
+              limit: int = 100,
+              cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Entries recorded in [since, until], oldest first; bounds are ISO timestamps or
+        dates (an `until` date includes that whole day)
+
+        Returns:
+            {"items": [...], "next_cursor": str or None}; pass next_cursor back to
+            continue where the page ended. Only the segments inside the window are read.
+        """
+        start_day, start_offset = None, 0
+        if cursor:
+            start_day, _, offset = cursor.partition(":")
+            if len(start_day) != 10 or not offset.isdigit():
+                raise ValueError(f"Invalid metrics cursor {cursor!r}")
+            start_offset = int(offset)
+        items: List[Dict[str, Any]] = []
+        for day, path in self._segments(since=max(filter(None, (since, start_day)), default=None), until=until):
+            with open(path, "rb") as f:
+                if day == start_day:
+                    f.seek(start_offset)
+                for raw in iter(f.readline, b""):
+                    if len(items) >= limit:
+                        return {"items": items, "next_cursor": f"{day}:{f.tell() - len(raw)}"}
+                    if not raw.strip():
+                        continue
+                    try:
+                        entry = json.loads(raw)
+                    except ValueError:  # torn line from a crashed writer
+                        continue
+                    recorded_at = entry.get("recorded_at", "")
+                    if since and recorded_at < since:
+                        continue
+                    if until and recorded_at[:len(until)] > until:
+                        continue
+                    if session_id and entry.get("session_id") != session_id:
+                        continue
+                    if status and entry.get("status") != status:
+                        continue
+                    items.append(entry)
+        return {"items": items, "next_cursor": None}
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """The last `limit` entries, oldest first, read backwards from the newest segments"""
+        lines: List[bytes] = []
+        for _, path in reversed(self._segments()):
+            with open(path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                end, data = f.tell(), b""
+                while end > 0 and data.count(b"\n") <= limit - len(lines):
+                    step = min(65536, end)
+                    end -= step
+                    f.seek(end)
+                    data = f.read(step) + data
+            segment_lines = [line for line in data.splitlines() if line.strip()]
+            if end > 0:  # the first line may be cut in half
+                segment_lines = segment_lines[1:]
+            lines = segment_lines[-(limit - len(lines)):] + lines
+            if len(lines) >= limit:
+                break
+        return [json.loads(line) for line in lines]
+
+    def rollups(self,
+                scope: str = "day",
+                since: Optional[str] = None,
+                until: Optional[str] = None,
+                key: Optional[str] = None,
+                limit: int = 30) -> List[Dict[str, Any]]:
+        """
+        Rollups for scope "day" (keyed by YYYY-MM-DD), "session" or "all", most recent first,
+        each with runs, passed, failed, pass_rate and duration avg/max/p50/p90/p95/p99
+        """
+        clauses, params = ["scope = ?"], [scope]
+        if key:
+            clauses.append("key = ?")
+            params.append(key)
+        if since:
+            clauses.append("last_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("substr(first_at, 1, ?) <= ?")
+            params += [len(until), until]
+        order = "key DESC" if scope == "day" else "last_at DESC"
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM rollups WHERE {' AND '.join(clauses)} ORDER BY {order} LIMIT ?",
+                                (*params, limit)).fetchall()
+        return [self._rollup(row) for row in rows]
+
+    def overall(self) -> Dict[str, Any]:
+        rows = self.rollups(scope="all", limit=1)
+        return rows[0] if rows else self._rollup(None)
+
+    @staticmethod
+    def _rollup(row: Optional[sqlite3.Row]) -> Dict[str, Any]:
+        if row is None:
+            return {"key": "all", "runs": 0, "passed": 0, "failed": 0, "pass_rate": 0,
+                    "duration": {"avg": None, "max": None, **_percentiles([], 0, 0)},
+                    "first_at": None, "last_at": None}
+        count = row["duration_count"]
+        return {
+            "key": row["key"],
+            "runs": row["runs"],
+            "passed": row["passed"],
+            "failed": row["failed"],
+            "pass_rate": round(row["passed"] / row["runs"] * 100, 2) if row["runs"] else 0,
+            "duration": {
+                "avg": round(row["duration_sum"] / count, 3) if count else None,
+                "max": row["duration_max"] if count else None,
+                **_percentiles(json.loads(row["histogram"]), count, row["duration_max"])
+            },
+            "first_at": row["first_at"],
+            "last_at": row["last_at"]
+        }
+
+
+metrics_log = MetricsLog.from_env()
@@ -0,0 +1,184 @@
+"""
+Provider Health - per-provider circuit breakers and EWMA scores for adaptive routing
+"""
+import threading
+import time
+import logging
+from enum import Enum
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitState(Enum):
+    """Circuit breaker states"""
+    CLOSED = "closed"        # normal operation
+    OPEN = "open"            # failing; calls are skipped until recovery timeout
+    HALF_OPEN = "half_open"  # probing with a limited number of calls
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for a single provider"""
+
+    def __init__(self, failure_threshold: int = 3, recovery_seconds: float = 60, half_open_max_calls: int = 1):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at: Optional[float] = None
+        self.half_open_calls = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go to the provider right now"""
+        if self.state == CircuitState.OPEN:
+            if time.time() - (self.opened_at or 0) < self.recovery_seconds:
+                return False
+            self.state = CircuitState.HALF_OPEN
+            self.half_open_calls = 0
+        if self.state == CircuitState.HALF_OPEN:
+            if self.half_open_calls >= self.half_open_max_calls:
+                return False
+            self.half_open_calls += 1
+        return True
+
+    def record_success(self) -> None:
+        self.state = CircuitState.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.half_open_calls = 0
+
+    def release(self) -> None:
+        """Return a half-open probe slot for a call that was cancelled before finishing"""
+        if self.state == CircuitState.HALF_OPEN and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record_failure(self) -> None:
+        self.consecutive_failures += 1
+        if self.state == CircuitState.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            self.state = CircuitState.OPEN
+            self.opened_at = time.time()
+
+
+class ProviderHealthRegistry:
+    """Process-wide breaker state and rolling EWMA latency/error scores per provider"""
+
+    def __init__(self,
+                 failure_threshold: int = 3,
+                 recovery_seconds: float = 60,
+                 half_open_max_calls: int = 1,
+                 alpha: float = 0.3,
+                 error_penalty_ms: float = 30000,
+                 min_samples: int = 3):
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.half_open_max_calls = half_open_max_calls
+        self.alpha = alpha
+        self.error_penalty_ms = error_penalty_ms
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def configure(self, breaker_cfg: Dict[str, Any], adaptive_cfg: Dict[str, Any]) -> None:
+        """Apply settings from config/llm.yml (existing breakers keep their state)"""
+        with self._lock:
+            self.failure_threshold = breaker_cfg.get("failure_threshold", self.failure_threshold)
+            self.recovery_seconds = breaker_cfg.get("recovery_seconds", self.recovery_seconds)
+            self.half_open_max_calls = breaker_cfg.get("half_open_max_calls", self.half_open_max_calls)
+            self.alpha = adaptive_cfg.get("alpha", self.alpha)
+            self.error_penalty_ms = adaptive_cfg.get("error_penalty_ms", self.error_penalty_ms)
+            self.min_samples = adaptive_cfg.get("min_samples", self.min_samples)
+            for breaker in self._breakers.values():
+                breaker.failure_threshold = self.failure_threshold
+                breaker.recovery_seconds = self.recovery_seconds
+                breaker.half_open_max_calls = self.half_open_max_calls
+
+    def _breaker(self, provider: str) -> CircuitBreaker:
+        if provider not in self._breakers:
+            self._breakers[provider] = CircuitBreaker(
+                self.failure_threshold, self.recovery_seconds, self.half_open_max_calls
+            )
+        return self._breakers[provider]
+
+    def _stat(self, provider: str) -> Dict[str, Any]:
+        return self._stats.setdefault(provider, {
+            "ewma_latency_ms": None, "ewma_error_rate": 0.0, "samples": 0,
+            "successes": 0, "failures": 0, "skipped": 0,
+        })
+
+    def allow(self, provider: str) -> bool:
+        """Ask the provider's breaker for permission; skipped calls are counted"""
+        with self._lock:
+            allowed = self._breaker(provider).allow()
+            if not allowed:
+                self._stat(provider)["skipped"] += 1
+            return allowed
+
+    def record_success(self, provider: str, latency_ms: float) -> None:
+        with self._lock:
+            self._breaker(provider).record_success()
+            stat = self._stat(provider)
+            prev = stat["ewma_latency_ms"]
+            stat["ewma_latency_ms"] = latency_ms if prev is None else self.alpha * latency_ms + (1 - self.alpha) * prev
+            stat["ewma_error_rate"] = (1 - self.alpha) * stat["ewma_error_rate"]
+            stat["samples"] += 1
+            stat["successes"] += 1
+
+    def record_failure(self, provider: str) -> None:
+        with self._lock:
+            breaker = self._breaker(provider)
+            was_open = breaker.state == CircuitState.OPEN
+            breaker.record_failure()
+            if breaker.state == CircuitState.OPEN and not was_open:
+                logger.warning(f"Circuit opened for LLM provider {provider}")
+            stat = self._stat(provider)
+            stat["ewma_error_rate"] = self.alpha + (1 - self.alpha) * stat["ewma_error_rate"]
+            stat["samples"] += 1
+            stat["failures"] += 1
+
+    def record_cancelled(self, provider: str) -> None:
+        """A call lost a hedged race; neither success nor failure"""
+        with self._lock:
+            self._breaker(provider).release()
+
+    def _score(self, provider: str) -> Optional[float]:
+        """Lower is better; None until the provider has enough samples"""
+        stat = self._stats.get(provider)
+        if not stat or stat["samples"] < self.min_samples:
+            return None
+        return (stat["ewma_latency_ms"] or 0.0) + stat["ewma_error_rate"] * self.error_penalty_ms
+
+    def rank(self, order: List[str]) -> List[str]:
+        """
+        Reorder providers by score. Providers without enough samples keep their
+        configured slot; providers with an open circuit move to the end.
+        """
+        with self._lock:
+            scored = sorted(
+                (p for p in order if self._score(p) is not None),
+                key=lambda p: self._score(p)
+            )
+            ranked: List[str] = []
+            for provider in order:
+                ranked.append(scored.pop(0) if self._score(provider) is not None else provider)
+            open_ = [p for p in ranked if p in self._breakers and self._breakers[p].state == CircuitState.OPEN]
+        return [p for p in ranked if p not in open_] + open_
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Breaker state and scores for monitoring"""
+        with self._lock:
+            out: Dict[str, Any] = {}
+            for provider in sorted(set(self._breakers) | set(self._stats)):
+                breaker = self._breaker(provider)
+                out[provider] = {
+                    "state": breaker.state.value,
+                    "consecutive_failures": breaker.consecutive_failures,
+                    "opened_at": breaker.opened_at,
+                    "score": self._score(provider),
+                    **self._stat(provider),
+                }
+            return out
+
+
+provider_health = ProviderHealthRegistry()
@@ -0,0 +1,93 @@
+"""
+Provider Registry - process-wide LLM SDK clients, imported and built on first use
+"""
+import importlib.util
+import logging
+import os
+import threading
+from typing import Any, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# provider name -> (API key env var, SDK module); local needs no key
+PROVIDER_SDKS: Dict[str, Tuple[Optional[str], str]] = {
+    "local": (None, "ollama"),
+    "groq": ("GROQ_API_KEY", "groq"),
+    "gemini": ("GOOGLE_API_KEY", "google.generativeai"),
+    "openai": ("OPENAI_API_KEY", "openai"),
+}
+
+
+class ProviderRegistry:
+    """
+    Synchronous SDK clients shared by every LLMOrchestrator in the process. Whether a
+    provider is configured is decided from env vars and installed packages only; the
+    SDK itself is imported the first time a client is requested.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients: Dict[Tuple[str, Optional[str]], Any] = {}  # (provider, api key) -> client
+        self._installed: Dict[str, bool] = {}
+        self._failed: Set[Tuple[str, Optional[str]]] = set()
+
+    def _sdk_installed(self, module: str) -> bool:
+        if module not in self._installed:
+            try:
+                self._installed[module] = importlib.util.find_spec(module) is not None
+            except (ImportError, ValueError):
+                self._installed[module] = False
+        return self._installed[module]
+
+    def _key(self, name: str) -> Tuple[str, Optional[str]]:
+        env_var, _ = PROVIDER_SDKS[name]
+        return name, os.getenv(env_var) if env_var else None
+
+    def configured(self, name: str) -> bool:
+        """Provider has its API key (if any) and SDK installed, without importing the SDK"""
+        if name not in PROVIDER_SDKS:
+            return False
+        env_var, module = PROVIDER_SDKS[name]
+        if env_var and not os.getenv(env_var):
+            return False
+        return self._sdk_installed(module) and self._key(name) not in self._failed
+
+    def get(self, name: str) -> Any:
+        """Client for a configured provider, created on first use; KeyError if unavailable"""
+        key = self._key(name)
+        with self._lock:
+            if key in self._clients:
+                return self._clients[key]
+            if not self.configured(name):
+                raise KeyError(name)
+            try:
+                client = self._create(name, key[1])
+            except Exception as e:
+                self._failed.add(key)
+                logger.warning(f"LLM provider {name} unavailable: {e}")
+                raise KeyError(name) from e
+            self._clients[key] = client
+            logger.info(f"Initialized LLM provider client: {name}")
+            return client
+
+    def _create(self, name: str, api_key: Optional[str]) -> Any:
+        if name == "local":
+            import ollama
+            return ollama.Client()
+        if name == "groq":
+            from groq import Groq
+            return Groq(api_key=api_key)
+        if name == "gemini":
+            import google.generativeai as genai
+            genai.configure(api_key=api_key)
+            return genai  # keep module; instantiate model per call
+        from openai import OpenAI
+        return OpenAI(api_key=api_key)
+
+    def loaded(self) -> Set[str]:
+        """Providers whose SDK client has been created in this process"""
+        with self._lock:
+            return {name for name, _ in self._clients}
+
+
+provider_registry = ProviderRegistry()
@@ -0,0 +1,285 @@
+"""
+Rate Limiter - client-side token buckets (RPM + TPM) per LLM provider with a priority wait queue
+"""
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "batch": 10}
+
+
+class RateLimitTimeout(Exception):
+    """Provider budget did not free up within max_wait_seconds"""
+
+
+# (bucket name, capacity, refill per second, amount to take)
+BucketRequest = Tuple[str, float, float, float]
+
+
+class MemoryBucketStore:
+    """In-process token buckets"""
+
+    def __init__(self):
+        self._buckets: Dict[str, Tuple[float, float]] = {}  # key -> (tokens, last refill ts)
+
+    def _refill(self, key: str, capacity: float, rate: float, now: float) -> float:
+        tokens, ts = self._buckets.get(key, (capacity, now))
+        return min(capacity, tokens + (now - ts) * rate)
+
+    def take(self, requests: List[BucketRequest]) -> float:
+        """Take from all buckets atomically; return 0 on success or seconds to wait"""
+        now = time.time()
+        levels = {key: self._refill(key, cap, rate, now) for key, cap, rate, _ in requests}
+        wait = max(
+            ((amount - levels[key]) / rate if levels[key] < amount else 0.0)
+            for key, _, rate, amount in requests
+        )
+        for key, _, _, amount in requests:
+            self._buckets[key] = (levels[key] - amount if wait == 0 else levels[key], now)
+        return wait
+
+    def adjust(self, key: str, delta: float) -> None:
+        """Debit (positive delta) or credit a bucket after the real cost is known"""
+        if key in self._buckets:
+            tokens, ts = self._buckets[key]
+            self._buckets[key] = (tokens - delta, ts)
+
+
+class RedisBucketStore:
+    """Token buckets in Redis so the API process and RQ workers share budgets"""
+
+    _TAKE_SCRIPT = """
+local now = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local cap = tonumber(ARGV[2 + (i - 1) * 3])
+    local rate = tonumber(ARGV[3 + (i - 1) * 3])
+    local amount = tonumber(ARGV[4 + (i - 1) * 3])
+    local data = redis.call('HMGET', key, 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or cap
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(cap, tokens + (now - ts) * rate)
+    levels[i] = tokens
+    if tokens < amount then
+        wait = math.max(wait, (amount - tokens) / rate)
+    end
+end
+for i, key in ipairs(KEYS) do
+    local amount = tonumber(ARGV[4 + (i - 1) * 3])
+    local cap = tonumber(ARGV[2 + (i - 1) * 3])
+    local rate = tonumber(ARGV[3 + (i - 1) * 3])
+    local tokens = levels[i]
+    if wait == 0 then tokens = tokens - amount end
+    redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', key, math.ceil(cap / rate) * 2 + 60)
+end
+return tostring(wait)
+"""
+
+    def __init__(self, redis_url: str, prefix: str = "specweaver:ratelimit:"):
+        import redis
+        self.prefix = prefix
+        self.conn = redis.from_url(redis_url)
+        self.conn.ping()
+        self._take = self.conn.register_script(self._TAKE_SCRIPT)
+
+    def take(self, requests: List[BucketRequest]) -> float:
+        keys = [self.prefix + key for key, _, _, _ in requests]
+        args: List[Any] = [time.time()]
+        for _, cap, rate, amount in requests:
+            args.extend([cap, rate, amount])
+        return float(self._take(keys=keys, args=args))
+
+    def adjust(self, key: str, delta: float) -> None:
+        self.conn.hincrbyfloat(self.prefix + key, "tokens", -delta)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute budgets per provider. Callers over
+    budget wait in a per-provider priority queue (interactive before batch)
+    instead of failing; only the head of the queue may take from the buckets.
+
+    The condition lock only guards the queues; bucket store calls (a network round
+    trip with Redis) run under a per-provider lock, so providers do not wait on
+    each other. A reservation is corrected by settle() once usage is known, or
+    handed back by release() when the call failed or was cancelled.
+    """
+
+    def __init__(self):
+        self.limits: Dict[str, Dict[str, float]] = {}
+        self.max_wait_seconds = 120.0
+        self.store: Any = MemoryBucketStore()
+        self.backend = "memory"
+        self._cond = threading.Condition()
+        self._store_locks: Dict[str, threading.Lock] = {}
+        self._queues: Dict[str, List[Tuple[int, int]]] = {}
+        self._seq = itertools.count()
+        self._waited: Dict[str, Dict[str, float]] = {}
+
+    def configure(self, cfg: Dict[str, Any]) -> None:
+        """Apply the rate_limits section of config/llm.yml"""
+        with self._cond:
+            self.limits = {name: dict(v or {}) for name, v in (cfg.get("providers") or {}).items()}
+            self.max_wait_seconds = cfg.get("max_wait_seconds", self.max_wait_seconds)
+            backend = cfg.get("backend", "memory")
+            if backend == self.backend:
+                return
+            if backend == "redis" and os.getenv("REDIS_URL"):
+                try:
+                    self.store = RedisBucketStore(os.getenv("REDIS_URL"))
+                    self.backend = "redis"
+                    return
+                except Exception as e:
+                    logger.warning(f"Redis rate limit backend unavailable ({e}), using in-process buckets")
+            self.store = MemoryBucketStore()
+            self.backend = "memory"
+
+    def _requests(self, provider: str, tokens: int) -> List[BucketRequest]:
+        limit = self.limits.get(provider) or {}
+        requests: List[BucketRequest] = []
+        if rpm := limit.get("rpm"):
+            requests.append((f"{provider}:rpm", rpm, rpm / 60, 1))
+        if tpm := limit.get("tpm"):
+            requests.append((f"{provider}:tpm", tpm, tpm / 60, min(tokens, tpm)))
+        return requests
+
+    def _enqueue(self, provider: str, priority: str) -> Tuple[int, int]:
+        ticket = (PRIORITIES.get(priority, PRIORITIES["interactive"]), next(self._seq))
+        heapq.heappush(self._queues.setdefault(provider, []), ticket)
+        return ticket
+
+    def _dequeue(self, provider: str, ticket: Tuple[int, int]) -> None:
+        queue = self._queues.get(provider, [])
+        if ticket in queue:
+            queue.remove(ticket)
+            heapq.heapify(queue)
+        self._cond.notify_all()
+
+    def _store_lock(self, provider: str) -> threading.Lock:
+        with self._cond:
+            return self._store_locks.setdefault(provider, threading.Lock())
+
+    def _attempt(self, provider: str, requests: List[BucketRequest], ticket: Tuple[int, int]) -> float:
+        """0 when the budget was taken, otherwise seconds until the next attempt"""
+        with self._cond:
+            if self._queues[provider][0] != ticket:
+                return 0.05
+            store = self.store
+        try:
+            with self._store_lock(provider):
+                return store.take(requests)
+        except Exception as e:
+            logger.warning(f"Rate limiter backend error ({e}); letting {provider} call through")
+            return 0.0
+
+    def _record_wait(self, provider: str, priority: str, waited: float) -> None:
+        with self._cond:
+            stats = self._waited.setdefault(provider, {"acquired": 0, "timeouts": 0, "wait_seconds": 0.0})
+            stats["acquired"] += 1
+            stats["wait_seconds"] += waited
+        if waited > 0.5:
+            logger.info(f"Rate limiter: {priority} call to {provider} waited {waited:.1f}s")
+
+    def _record_timeout(self, provider: str) -> None:
+        with self._cond:
+            stats = self._waited.setdefault(provider, {"acquired": 0, "timeouts": 0, "wait_seconds": 0.0})
+            stats["timeouts"] += 1
+        logger.warning(f"Rate limiter: {provider} budget not available within {self.max_wait_seconds}s")
+
+    def acquire(self, provider: str, tokens: int, priority: str = "interactive") -> bool:
+        """Block until the provider budget allows the call; False if max_wait_seconds passes"""
+        requests = self._requests(provider, tokens)
+        if not requests:
+            return True
+        start = time.time()
+        with self._cond:
+            ticket = self._enqueue(provider, priority)
+        try:
+            while True:
+                wait = self._attempt(provider, requests, ticket)
+                if wait == 0:
+                    self._record_wait(provider, priority, time.time() - start)
+                    return True
+                remaining = self.max_wait_seconds - (time.time() - start)
+                if remaining <= 0:
+                    self._record_timeout(provider)
+                    return False
+                with self._cond:
+                    self._cond.wait(min(wait, remaining))
+        finally:
+            with self._cond:
+                self._dequeue(provider, ticket)
+
+    async def aacquire(self, provider: str, tokens: int, priority: str = "interactive") -> bool:
+        """Async variant of acquire; cancellation leaves the queue cleanly"""
+        requests = self._requests(provider, tokens)
+        if not requests:
+            return True
+        start = time.time()
+        with self._cond:
+            ticket = self._enqueue(provider, priority)
+        try:
+            while True:
+                wait = self._attempt(provider, requests, ticket)
+                if wait == 0:
+                    self._record_wait(provider, priority, time.time() - start)
+                    return True
+                remaining = self.max_wait_seconds - (time.time() - start)
+                if remaining <= 0:
+                    self._record_timeout(provider)
+                    return False
+                await asyncio.sleep(min(wait, remaining, 1.0))
+        finally:
+            with self._cond:
+                self._dequeue(provider, ticket)
+
+    def settle(self, provider: str, estimated_tokens: int, actual_tokens: Optional[int]) -> None:
+        """Correct the TPM bucket once the provider reports real usage"""
+        limit = self.limits.get(provider) or {}
+        if actual_tokens is None or not limit.get("tpm"):
+            return
+        self._adjust(provider, actual_tokens - min(estimated_tokens, limit["tpm"]))
+
+    def release(self, provider: str, estimated_tokens: int) -> None:
+        """
+        Hand back the TPM reservation of a call that failed, timed out or lost a hedged
+        race. The request itself stays counted: it reached the provider's RPM limit too.
+        """
+        limit = self.limits.get(provider) or {}
+        if limit.get("tpm"):
+            self._adjust(provider, -min(estimated_tokens, limit["tpm"]))
+
+    def _adjust(self, provider: str, delta: float) -> None:
+        try:
+            with self._store_lock(provider):
+                self.store.adjust(f"{provider}:tpm", delta)
+        except Exception as e:
+            logger.warning(f"Rate limiter adjust failed for {provider}: {e}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Configured limits, queue depth and wait statistics per provider"""
+        with self._cond:
+            return {
+                "backend": self.backend,
+                "providers": {
+                    name: {
+                        **limit,
+                        "queued": len(self._queues.get(name, [])),
+                        **self._waited.get(name, {"acquired": 0, "timeouts": 0, "wait_seconds": 0.0}),
+                    }
+                    for name, limit in self.limits.items()
+                },
+            }
+
+
+rate_limiter = RateLimiter()
@@ -3,7 +3,8 @@ Requirement Parser - Parses user stories into RequirementGraph
 """
 import json
 import re
-from typing import Optional, List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from typing import Optional, List, Dict, Any, Iterable, Iterator, Tuple
 from pathlib import Path
 import logging
 
@@ -21,7 +22,11 @@ class RequirementParser:
         self.schema = self._get_requirement_schema()
     
     def _get_requirement_schema(self) -> Dict[str, Any]:
-        """Get RequirementGraph JSON schema"""
+        """
+        JSON schema of what the LLM fills in: every RequirementGraph field except the ones
+        filled in by the parser or its callers (raw_text, domain, version, created_at, provider_metadata)
+        """
+        string_list = {"type": "array", "items": {"type": "string"}}
         return {
             "type": "object",
             "required": ["id", "title", "actor", "goal", "benefit", "acceptanceCriteria"],
@@ -31,6 +36,7 @@ class RequirementParser:
                 "actor": {"type": "string"},
                 "goal": {"type": "string"},
                 "benefit": {"type": "string"},
+                "preconditions": string_list,
                 "acceptanceCriteria": {
                     "type": "array",
                     "items": {
@@ -40,37 +46,30 @@ class RequirementParser:
                             "id": {"type": "string"},
                             "given": {"type": "string"},
                             "when": {"type": "string"},
-                            "then": {"type": "string"}
+                            "then": {"type": "string"},
+                            "notes": {"type": "string"}
                         }
                     }
-                }
+                },
+                "constraints": string_list,
+                "domainEntities": {
+                    "type": "array",
+                    "items": {
+                        "type": "object",
+                        "required": ["name"],
+                        "properties": {
+                            "name": {"type": "string"},
+                            "fields": string_list
+                        }
+                    }
+                },
+                "assumptions": string_list,
+                "risks": string_list,
+                "tags": string_list,
+                "url": {"type": "string"}
             }
         }
     
-    def _extract_json_snippet(self, raw: str) -> str:
-        """Extract a JSON object/array from raw LLM output (strips code fences, prefaces)."""
-        if not raw:
-            return ""
-        text = raw.strip()
-        # Strip code fences if present
-        if text.startswith("```"):
-            # remove first fence line and trailing fence
-            try:
-                first_nl = text.find("\n")
-                text = text[first_nl+1:]
-                if text.endswith("```"):
-                    text = text[: -3]
-            except Exception:
-                pass
-        # Find JSON object or array
-        s_obj, e_obj = text.find("{"), text.rfind("}")
-        s_arr, e_arr = text.find("["), text.rfind("]")
-        if s_obj != -1 and e_obj != -1 and e_obj > s_obj:
-            return text[s_obj: e_obj + 1]
-        if s_arr != -1 and e_arr != -1 and e_arr > s_arr:
-            return text[s_arr: e_arr + 1]
-        return text
-
     def _coerce_gwt_from_text(self, text: str) -> tuple[str, str, str]:
         """Best-effort extraction of Given/When/Then from a description string."""
         try:
@@ -219,31 +218,20 @@ Return ONLY valid JSON matching the RequirementGraph schema.
 Parse user stories into structured JSON following the RequirementGraph schema exactly.
 Focus on clarity, completeness, and testability of acceptance criteria."""
         
-        response = self.orchestrator.call(
+        # Schema-constrained call; validated and fixed locally, LLM repair only as a last resort
+        data, response = self.orchestrator.call_json(
             prompt=prompt,
+            schema=self.schema,
             system=system_prompt,
             task_type="parsing"
         )
-        
-        # Validate and repair if needed
-        snippet = self._extract_json_snippet(response.content or "")
-        valid, error = self.orchestrator.validate_json_response(snippet, self.schema)
-        if not valid:
-            logger.info("Parser: non-JSON/invalid JSON from LLM; attempting repair/fallback")
-            repaired = self.orchestrator.repair_json(snippet, error, self.schema)
-            if repaired:
-                snippet = self._extract_json_snippet(repaired)
-            else:
-                # Fallback: create minimal valid structure
-                snippet = self._create_fallback_graph(story_text, extracted)
+        if not isinstance(data, dict):
+            logger.info("Parser: no usable JSON from LLM; using fallback graph")
+            # Fallback: create minimal valid structure
+            data = json.loads(self._create_fallback_graph(story_text, extracted))
         
         # Parse to Pydantic model
         try:
-            raw = (snippet or "").strip()
-            if not raw:
-                raise ValueError("Empty LLM response")
-            data = json.loads(raw)
-            
             # Coerce/normalize common LLM schema deviations before validation
             try:
                 # actor, title, goal, benefit may come as objects
@@ -323,6 +311,75 @@ Focus on clarity, completeness, and testability of acceptance criteria."""
             # Return minimal valid graph
             return self._create_minimal_graph(story_text, extracted)
     
+    def parse_many(self,
+                   stories: Iterable[Tuple[str, str]],
+                   max_workers: int = 4,
+                   checkpoint_path: Optional[Path] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Parse many user stories concurrently with bounded parallelism
+        
+        Args:
+            stories: (story_id, story_text) pairs
+            max_workers: Maximum number of stories parsed at once
+            checkpoint_path: JSONL file each result is appended to as it completes;
+                stories already recorded there as "ok" are skipped, so an
+                interrupted run resumes where it stopped
+        
+        Yields:
+            {"story_id", "status": "ok", "requirement": {...}} or
+            {"story_id", "status": "error", "error": "..."} in completion order
+        """
+        done_ids = self._load_checkpoint(checkpoint_path) if checkpoint_path else set()
+        if done_ids:
+            logger.info(f"Resuming batch parse: {len(done_ids)} stories already done")
+        if checkpoint_path:
+            checkpoint_path.parent.mkdir(parents=True, exist_ok=True)
+        
+        def parse_one(story_id: str, text: str) -> Dict[str, Any]:
+            try:
+                requirement = self.parse(story_text=text)
+                return {"story_id": story_id, "status": "ok",
+                        "requirement": json.loads(requirement.model_dump_json())}
+            except Exception as e:
+                logger.error(f"Batch parse failed for {story_id}: {e}")
+                return {"story_id": story_id, "status": "error", "error": str(e)}
+        
+        pending_stories = ((sid, text) for sid, text in stories if sid not in done_ids)
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            in_flight: Dict[Future, str] = {}
+            # Keep at most max_workers stories queued beyond the running ones
+            for story_id, text in pending_stories:
+                in_flight[pool.submit(parse_one, story_id, text)] = story_id
+                if len(in_flight) >= max_workers * 2:
+                    yield from self._drain(in_flight, checkpoint_path)
+            while in_flight:
+                yield from self._drain(in_flight, checkpoint_path)
+    
+    def _drain(self, in_flight: Dict[Future, str], checkpoint_path: Optional[Path]) -> Iterator[Dict[str, Any]]:
+        """Collect finished batch futures and append their results to the checkpoint"""
+        done, _ = wait(list(in_flight), return_when=FIRST_COMPLETED)
+        for future in done:
+            in_flight.pop(future)
+            result = future.result()
+            if checkpoint_path:
+                with open(checkpoint_path, "a") as f:
+                    f.write(json.dumps(result) + "\n")
+            yield result
+    
+    def _load_checkpoint(self, checkpoint_path: Path) -> set:
+        """Story IDs already parsed successfully in a previous (interrupted) run"""
+        done = set()
+        if not checkpoint_path.exists():
+            return done
+        for line in checkpoint_path.read_text().splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # partial line from an interrupted write
+            if record.get("status") == "ok":
+                done.add(record.get("story_id"))
+        return done
+    
     def _create_fallback_graph(self, story: str, extracted: Dict[str, Any]) -> str:
         """Create fallback RequirementGraph JSON"""
         graph = {
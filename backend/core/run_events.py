@@ -0,0 +1,179 @@
+"""
+Run Events - push channel for test run state transitions and log lines
+"""
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Optional, Dict, Any, List, AsyncIterator, Deque, Tuple
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed", "error", "cancelled")
+# Run fields pushed with every status event (the rest of the run record stays in the run store)
+STATUS_FIELDS = ("status", "created_at", "started_at", "completed_at", "exit_code", "error", "job_id")
+
+HISTORY_PER_RUN = 2000  # events kept per run so late or reconnecting subscribers can catch up
+HISTORY_RUNS = 200      # runs kept by the in-process broker
+HISTORY_TTL_SECONDS = 86400
+
+
+class MemoryEventBroker:
+    """Events of runs executed in this process (BackgroundTasks); subscribers get them via their own loop"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._history: "OrderedDict[str, Deque[Dict[str, Any]]]" = OrderedDict()
+        self._seq: Dict[str, int] = {}
+        self._subscribers: Dict[str, List[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+
+    def publish(self, run_id: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        with self._lock:
+            self._seq[run_id] = self._seq.get(run_id, 0) + 1
+            event = {"id": self._seq[run_id], "run_id": run_id, "type": event_type, "data": data, "ts": time.time()}
+            history = self._history.setdefault(run_id, deque(maxlen=HISTORY_PER_RUN))
+            history.append(event)
+            self._history.move_to_end(run_id)
+            while len(self._history) > HISTORY_RUNS:
+                old_run, _ = self._history.popitem(last=False)
+                self._seq.pop(old_run, None)
+            subscribers = list(self._subscribers.get(run_id, []))
+        for loop, queue in subscribers:
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, event)
+            except RuntimeError:  # subscriber's loop already closed
+                pass
+        return event
+
+    async def subscribe(self, run_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        queue: asyncio.Queue = asyncio.Queue()
+        subscriber = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            backlog = [event for event in self._history.get(run_id, ()) if event["id"] > after]
+            self._subscribers.setdefault(run_id, []).append(subscriber)
+        try:
+            for event in backlog:
+                yield event
+            last = backlog[-1]["id"] if backlog else after
+            while True:
+                event = await queue.get()
+                if event["id"] > last:
+                    last = event["id"]
+                    yield event
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(run_id, [])
+                if subscriber in subscribers:
+                    subscribers.remove(subscriber)
+                if not subscribers:
+                    self._subscribers.pop(run_id, None)
+
+
+class RedisEventBroker:
+    """
+    Events through Redis pub/sub, so RQ workers in other processes reach API subscribers.
+    Each event is also appended to a capped per-run list that late subscribers replay.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "specweaver:runs:"):
+        import redis
+        self.redis_url = redis_url
+        self.prefix = prefix
+        self.conn = redis.from_url(redis_url)
+        self.conn.ping()
+
+    def publish(self, run_id: str, event_type: str, data: Dict[str, Any]) -> Dict[str, Any]:
+        key = self.prefix + run_id
+        event = {"id": self.conn.incr(key + ":seq"), "run_id": run_id, "type": event_type, "data": data,
+                 "ts": time.time()}
+        payload = json.dumps(event, default=str)
+        pipe = self.conn.pipeline()
+        pipe.rpush(key + ":events", payload)
+        pipe.ltrim(key + ":events", -HISTORY_PER_RUN, -1)
+        pipe.expire(key + ":events", HISTORY_TTL_SECONDS)
+        pipe.expire(key + ":seq", HISTORY_TTL_SECONDS)
+        pipe.publish(key, payload)
+        pipe.execute()
+        return event
+
+    async def subscribe(self, run_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        import redis.asyncio as aioredis
+        key = self.prefix + run_id
+        conn = aioredis.from_url(self.redis_url)
+        pubsub = conn.pubsub()
+        try:
+            # Subscribe before reading the backlog so nothing published in between is lost
+            await pubsub.subscribe(key)
+            last = after
+            for payload in await conn.lrange(key + ":events", 0, -1):
+                event = json.loads(payload)
+                if event["id"] > last:
+                    last = event["id"]
+                    yield event
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
+                event = json.loads(message["data"])
+                if event["id"] > last:
+                    last = event["id"]
+                    yield event
+        finally:
+            await pubsub.unsubscribe(key)
+            await pubsub.close()
+            await conn.close()
+
+
+class RunEvents:
+    """
+    Publishes run status transitions and log lines; subscribers (the SSE endpoint)
+    get them as they happen instead of polling the run store and log files.
+    Backend "redis" (when REDIS_URL is reachable) or "memory" for a single process.
+    """
+
+    def __init__(self, backend: str = "auto"):
+        self.backend = "memory"
+        self.broker: Any = MemoryEventBroker()
+        if backend in ("auto", "redis") and os.getenv("REDIS_URL"):
+            try:
+                self.broker = RedisEventBroker(os.getenv("REDIS_URL"))
+                self.backend = "redis"
+            except Exception as e:
+                logger.warning(f"Redis run events unavailable ({e}), publishing in-process only")
+        elif os.getenv("REDIS_URL"):
+            logger.warning("Run events are in-process only while REDIS_URL is set: events of runs executed by "
+                           "RQ workers do not reach subscribers, which poll the run store for their status instead")
+
+    @classmethod
+    def from_env(cls) -> "RunEvents":
+        return cls(backend=os.getenv("RUN_EVENTS_BACKEND", "auto"))
+
+    def publish(self, run_id: str, event_type: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Publish one event; a broker failure is logged and never fails the run"""
+        try:
+            return self.broker.publish(run_id, event_type, data)
+        except Exception as e:
+            logger.warning(f"Failed to publish {event_type} event for run {run_id}: {e}")
+            return None
+
+    def status(self, run: Dict[str, Any]) -> None:
+        """Publish a run's state transition (run as returned by run_store.update_run)"""
+        self.publish(run["id"], "status", {field: run.get(field) for field in STATUS_FIELDS if field in run})
+
+    def log(self, run_id: str, lines: List[str], stream: str = "stdout", shard: Optional[int] = None) -> None:
+        if lines:
+            data: Dict[str, Any] = {"stream": stream, "lines": lines}
+            if shard is not None:
+                data["shard"] = shard
+            self.publish(run_id, "log", data)
+
+    async def subscribe(self, run_id: str, after: int = 0) -> AsyncIterator[Dict[str, Any]]:
+        """Events of run_id with id > after (replayed from history first), then live ones, forever"""
+        async for event in self.broker.subscribe(run_id, after):
+            yield event
+
+
+run_events = RunEvents.from_env()
@@ -0,0 +1,322 @@
+"""
+Run Store - transactional persistence for sessions and test runs
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Iterator, Callable
+from urllib.parse import urlparse
+
+from .metrics_log import MetricsLog
+
+logger = logging.getLogger(__name__)
+
+# Run fields kept in their own indexed columns; everything else lives in the JSON document
+RUN_COLUMNS = ("session_id", "status", "created_at", "started_at", "completed_at")
+
+
+def _now() -> str:
+    return datetime.utcnow().isoformat()
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class RunStore(ABC):
+    """
+    Persistence for API sessions and test runs (metrics go to core.metrics_log). Updates
+    are per record, so the API and RQ workers can write concurrently. Subclass it
+    and register the class in RUN_STORES to plug in another backend.
+    """
+
+    @abstractmethod
+    def save_session(self, session_id: str, record: Dict[str, Any]) -> None:
+        ...
+
+    @abstractmethod
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def count_sessions(self) -> int:
+        ...
+
+    @abstractmethod
+    def update_run(self, run_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        """Merge fields into a run (created if missing) and return the whole run"""
+
+    @abstractmethod
+    def record_shard(self, run_id: str, index: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Store one shard's result under run["shard_results"][str(index)] and return the whole run"""
+
+    @abstractmethod
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    def list_runs(self,
+                  status: Optional[str] = None,
+                  session_id: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Runs newest first"""
+
+    @abstractmethod
+    def run_stats(self) -> Dict[str, Any]:
+        """Total runs and counts per status, ui_mode and api_mode"""
+
+    @abstractmethod
+    def get_meta(self, key: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    def set_meta(self, key: str, value: str) -> None:
+        ...
+
+
+class SQLiteRunStore(RunStore):
+    """RunStore in one SQLite file in WAL mode, so readers never block the writer"""
+
+    def __init__(self, path: str = "artifacts/specweaver.sqlite"):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._ready:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.path), timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if not self._ready:
+                with self._lock:
+                    self._init_db(conn)
+                    self._ready = True
+            yield conn
+        finally:
+            conn.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Write transaction; BEGIN IMMEDIATE takes the write lock up front so read-modify-write can't interleave"""
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id TEXT PRIMARY KEY,
+                status TEXT,
+                created_at TEXT,
+                updated_at TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_sessions_status ON sessions(status);
+            CREATE INDEX IF NOT EXISTS idx_sessions_created_at ON sessions(created_at);
+
+            CREATE TABLE IF NOT EXISTS runs (
+                id TEXT PRIMARY KEY,
+                session_id TEXT,
+                status TEXT,
+                created_at TEXT,
+                started_at TEXT,
+                completed_at TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_status ON runs(status);
+            CREATE INDEX IF NOT EXISTS idx_runs_session_id ON runs(session_id);
+            CREATE INDEX IF NOT EXISTS idx_runs_created_at ON runs(created_at);
+
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+
+    # -- sessions ----------------------------------------------------------
+
+    def save_session(self, session_id: str, record: Dict[str, Any]) -> None:
+        data = json.dumps(record, default=_json_default)
+        created_at = record.get("created_at")
+        if isinstance(created_at, datetime):
+            created_at = created_at.isoformat()
+        with self._transaction() as conn:
+            conn.execute(
+                """INSERT INTO sessions (id, status, created_at, updated_at, data) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT(id) DO UPDATE SET status = excluded.status, updated_at = excluded.updated_at,
+                                                 data = excluded.data""",
+                (session_id, record.get("status"), created_at or _now(), _now(), data)
+            )
+
+    def load_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM sessions WHERE id = ?", (session_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def count_sessions(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    # -- runs --------------------------------------------------------------
+
+    def _read_run(self, conn: sqlite3.Connection, run_id: str) -> Dict[str, Any]:
+        row = conn.execute("SELECT data FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(row["data"]) if row else {"id": run_id, "created_at": _now()}
+
+    def _write_run(self, conn: sqlite3.Connection, run_id: str, run: Dict[str, Any]) -> None:
+        conn.execute(
+            """INSERT OR REPLACE INTO runs (id, session_id, status, created_at, started_at, completed_at, data)
+               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+            (run_id, *(run.get(column) for column in RUN_COLUMNS), json.dumps(run))
+        )
+
+    def update_run(self, run_id: str, fields: Dict[str, Any]) -> Dict[str, Any]:
+        with self._transaction() as conn:
+            run = self._read_run(conn, run_id)
+            run.update(json.loads(json.dumps(fields, default=_json_default)))
+            self._write_run(conn, run_id, run)
+        return run
+
+    def record_shard(self, run_id: str, index: int, result: Dict[str, Any]) -> Dict[str, Any]:
+        # Same transaction as the read, so exactly one shard job sees the complete set
+        with self._transaction() as conn:
+            run = self._read_run(conn, run_id)
+            run.setdefault("shard_results", {})[str(index)] = json.loads(json.dumps(result, default=_json_default))
+            self._write_run(conn, run_id, run)
+        return run
+
+    def get_run(self, run_id: str) -> Optional[Dict[str, Any]]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT data FROM runs WHERE id = ?", (run_id,)).fetchone()
+        return json.loads(row["data"]) if row else None
+
+    def list_runs(self,
+                  status: Optional[str] = None,
+                  session_id: Optional[str] = None,
+                  limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        clauses, params = [], []
+        if status:
+            clauses.append("status = ?")
+            params.append(status)
+        if session_id:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        query = "SELECT data FROM runs"
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY created_at DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._connect() as conn:
+            return [json.loads(row["data"]) for row in conn.execute(query, params)]
+
+    def run_stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+            by_status = dict(conn.execute("SELECT status, COUNT(*) FROM runs GROUP BY status").fetchall())
+            by_ui_mode = dict(conn.execute(
+                "SELECT json_extract(data, '$.ui_mode'), COUNT(*) FROM runs GROUP BY 1").fetchall())
+            by_api_mode = dict(conn.execute(
+                "SELECT json_extract(data, '$.api_mode'), COUNT(*) FROM runs GROUP BY 1").fetchall())
+        return {"total": total, "by_status": by_status, "by_ui_mode": by_ui_mode, "by_api_mode": by_api_mode}
+
+    # -- meta --------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+# URL scheme -> RunStore factory taking the URL's path
+RUN_STORES: Dict[str, Callable[[str], RunStore]] = {
+    "sqlite": SQLiteRunStore,
+}
+
+
+def open_run_store(url: Optional[str] = None) -> RunStore:
+    """RunStore for url (RUN_STORE_URL by default), e.g. sqlite:///artifacts/specweaver.sqlite"""
+    url = url or os.getenv("RUN_STORE_URL", "sqlite:///artifacts/specweaver.sqlite")
+    parsed = urlparse(url)
+    factory = RUN_STORES.get(parsed.scheme)
+    if factory is None:
+        raise ValueError(f"Unknown run store {parsed.scheme!r}; expected one of {tuple(RUN_STORES)}")
+    # sqlite:///relative/path and sqlite:////absolute/path, as in SQLAlchemy URLs
+    path = parsed.path[1:] if parsed.path.startswith("/") else parsed.path
+    return factory(path)
+
+
+def migrate_json_artifacts(store: RunStore,
+                           metrics: MetricsLog,
+                           artifacts_dir: Path = Path("artifacts")) -> Dict[str, int]:
+    """
+    One-time import of the JSON files the API and worker used to rewrite: runs from
+    run_status.json, metrics from metrics.json (into the metrics log) and sessions from the per-session
+    requirement_graph.json/test_cases.json directories. Later calls are no-ops.
+    """
+    if store.get_meta("json_migrated_at"):
+        return {}
+    counts = {"runs": 0, "metrics": 0, "sessions": 0}
+    runs_file = artifacts_dir / "run_status.json"
+    if runs_file.exists():
+        try:
+            for run_id, run in json.loads(runs_file.read_text()).items():
+                if store.get_run(run_id) is None:
+                    store.update_run(run_id, run)
+                    counts["runs"] += 1
+        except Exception:
+            logger.exception(f"Failed to migrate {runs_file}")
+    metrics_file = artifacts_dir / "metrics.json"
+    if metrics_file.exists():
+        try:
+            for summary in json.loads(metrics_file.read_text()):
+                metrics.record(summary)
+                counts["metrics"] += 1
+        except Exception:
+            logger.exception(f"Failed to migrate {metrics_file}")
+    for requirement_file in artifacts_dir.glob("*/requirement_graph.json"):
+        session_id = requirement_file.parent.name
+        if store.load_session(session_id) is not None:
+            continue
+        try:
+            record: Dict[str, Any] = {
+                "requirement": json.loads(requirement_file.read_text()),
+                "created_at": datetime.utcfromtimestamp(requirement_file.stat().st_mtime).isoformat(),
+                "status": "parsed"
+            }
+            suite_file = requirement_file.parent / "test_cases.json"
+            if suite_file.exists():
+                record["test_suite"] = json.loads(suite_file.read_text())
+                record["status"] = "generated"
+            store.save_session(session_id, record)
+            counts["sessions"] += 1
+        except Exception:
+            logger.exception(f"Failed to migrate session {session_id}")
+    store.set_meta("json_migrated_at", _now())
+    logger.info(f"Migrated JSON artifacts into the run store: {counts}")
+    return counts
+
+
+run_store = open_run_store()
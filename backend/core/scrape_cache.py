@@ -0,0 +1,262 @@
+"""
+Scrape Snapshot Cache - on-disk website analyses and rendered HTML keyed by URL and scrape profile
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional, Dict, Any, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+def dom_hash(html: str) -> str:
+    """Content hash of a rendered page used to detect unchanged pages"""
+    return hashlib.sha256(html.encode("utf-8")).hexdigest()
+
+
+class ScrapeSnapshotCache:
+    """
+    One snapshot per (URL, scrape profile): the analysis JSON and the rendered HTML
+    (gzipped) as files, indexed in SQLite. The profile string names every scraper
+    setting that changes the analysis (URLScraper.snapshot_profile), so snapshots taken
+    with different backends never stand in for each other. A snapshot is served as-is for
+    fresh_seconds after it was last validated; after that it is revalidated with the
+    page's ETag/Last-Modified (a conditional GET, no browser) or, without validators,
+    by comparing the rendered DOM hash after navigation. Snapshots not validated for
+    ttl_seconds are evicted, as are least recently used ones beyond the size limits.
+    """
+
+    def __init__(self,
+                 root: str = "artifacts/scrape_cache",
+                 fresh_seconds: int = 3600,
+                 ttl_seconds: int = 7 * 86400,
+                 max_entries: int = 500,
+                 max_size_mb: float = 200,
+                 enabled: bool = True,
+                 offline: bool = False):
+        self.root = Path(root)
+        self.fresh_seconds = fresh_seconds
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        # Defaults for scrapes that don't choose; offline scrapes never touch the network
+        self.enabled = enabled
+        self.offline = offline
+        self._lock = threading.Lock()
+        self._ready = False
+
+    @classmethod
+    def from_env(cls) -> "ScrapeSnapshotCache":
+        return cls(root=os.getenv("SCRAPE_CACHE_DIR", "artifacts/scrape_cache"),
+                   fresh_seconds=int(os.getenv("SCRAPE_CACHE_FRESH_SECONDS", "3600")),
+                   ttl_seconds=int(os.getenv("SCRAPE_CACHE_TTL_SECONDS", str(7 * 86400))),
+                   max_size_mb=float(os.getenv("SCRAPE_CACHE_MAX_MB", "200")),
+                   enabled=os.getenv("SCRAPE_CACHE_ENABLED", "true").lower() == "true",
+                   offline=os.getenv("SCRAPE_OFFLINE", "false").lower() == "true")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        if not self._ready:
+            self.root.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(str(self.root / "index.sqlite"), timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            with conn:
+                if not self._ready:
+                    self._init_db(conn)
+                    self._ready = True
+                yield conn
+        finally:
+            conn.close()
+
+    def _init_db(self, conn: sqlite3.Connection) -> None:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                key TEXT PRIMARY KEY,
+                url TEXT,
+                profile TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                dom_hash TEXT,
+                size_bytes INTEGER,
+                created_at REAL,
+                validated_at REAL,
+                last_accessed REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_snapshots_lru ON snapshots(last_accessed)")
+
+    @staticmethod
+    def make_key(url: str, profile: str) -> str:
+        return hashlib.sha256(json.dumps([url, profile]).encode("utf-8")).hexdigest()[:32]
+
+    def _paths(self, key: str):
+        return self.root / f"{key}.json", self.root / f"{key}.html.gz"
+
+    def get(self, url: str, profile: str) -> Optional[Dict[str, Any]]:
+        """Snapshot metadata plus analysis for url/profile, or None; `fresh` tells whether it needs revalidation"""
+        key = self.make_key(url, profile)
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                row = conn.execute(
+                    "SELECT etag, last_modified, dom_hash, created_at, validated_at FROM snapshots WHERE key = ?",
+                    (key,)
+                ).fetchone()
+                if not row:
+                    return None
+                if self.ttl_seconds and row[4] + self.ttl_seconds < now:
+                    self._delete(conn, key)
+                    return None
+                conn.execute("UPDATE snapshots SET last_accessed = ? WHERE key = ?", (now, key))
+            analysis = json.loads(self._paths(key)[0].read_text())
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        except Exception as e:
+            logger.warning(f"Scrape cache read failed: {e}")
+            return None
+        return {
+            "key": key,
+            "url": url,
+            "profile": profile,
+            "etag": row[0],
+            "last_modified": row[1],
+            "dom_hash": row[2],
+            "created_at": row[3],
+            "validated_at": row[4],
+            "fresh": now - row[4] < self.fresh_seconds,
+            "analysis": analysis,
+        }
+
+    def html(self, url: str, profile: str) -> Optional[str]:
+        """Rendered HTML stored with the snapshot"""
+        path = self._paths(self.make_key(url, profile))[1]
+        try:
+            return gzip.decompress(path.read_bytes()).decode("utf-8")
+        except FileNotFoundError:
+            return None
+
+    def put(self,
+            url: str,
+            profile: str,
+            analysis: Dict[str, Any],
+            html: str,
+            etag: Optional[str] = None,
+            last_modified: Optional[str] = None) -> None:
+        """Store a fresh snapshot and evict expired/least recently used ones"""
+        key = self.make_key(url, profile)
+        now = time.time()
+        analysis_path, html_path = self._paths(key)
+        try:
+            with self._lock:
+                self.root.mkdir(parents=True, exist_ok=True)
+                analysis_bytes = json.dumps(analysis, default=str).encode("utf-8")
+                html_bytes = gzip.compress(html.encode("utf-8"))
+                analysis_path.write_bytes(analysis_bytes)
+                html_path.write_bytes(html_bytes)
+                with self._connect() as conn:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (key, url, profile, etag, last_modified, dom_hash(html),
+                         len(analysis_bytes) + len(html_bytes), now, now, now)
+                    )
+                    self._evict(conn, now)
+        except Exception as e:
+            logger.warning(f"Scrape cache write failed: {e}")
+
+    def mark_validated(self, key: str) -> None:
+        """The live page still matches the snapshot; restart its freshness window"""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                conn.execute("UPDATE snapshots SET validated_at = ?, last_accessed = ? WHERE key = ?", (now, now, key))
+        except Exception as e:
+            logger.warning(f"Scrape cache update failed: {e}")
+
+    def revalidate(self, entry: Dict[str, Any], timeout: float = 10) -> Optional[bool]:
+        """
+        Conditional GET with the snapshot's validators
+
+        Returns:
+            True if the server answered 304 Not Modified, False if the page changed,
+            None if the snapshot has no validators or the check failed
+        """
+        if not entry.get("etag") and not entry.get("last_modified"):
+            return None
+        headers = {"User-Agent": "SpecWeaver scrape cache"}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            with urllib.request.urlopen(urllib.request.Request(entry["url"], headers=headers), timeout=timeout):
+                return False
+        except urllib.error.HTTPError as e:
+            return True if e.code == 304 else None
+        except Exception as e:
+            logger.info(f"Revalidation of {entry['url']} failed: {e}")
+            return None
+
+    def _delete(self, conn: sqlite3.Connection, key: str) -> None:
+        conn.execute("DELETE FROM snapshots WHERE key = ?", (key,))
+        for path in self._paths(key):
+            path.unlink(missing_ok=True)
+
+    def _forget(self, key: str) -> None:
+        try:
+            with self._lock, self._connect() as conn:
+                self._delete(conn, key)
+        except Exception as e:
+            logger.warning(f"Scrape cache cleanup failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        if self.ttl_seconds:
+            for (key,) in conn.execute("SELECT key FROM snapshots WHERE validated_at < ?",
+                                       (now - self.ttl_seconds,)).fetchall():
+                self._delete(conn, key)
+        count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size_bytes), 0) FROM snapshots").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        for key, size in conn.execute("SELECT key, size_bytes FROM snapshots ORDER BY last_accessed ASC").fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            self._delete(conn, key)
+            count -= 1
+            total -= size or 0
+            evicted += 1
+        logger.info(f"Scrape cache evicted {evicted} least recently used snapshots")
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot count, size and how many are within their freshness window"""
+        now = time.time()
+        try:
+            with self._lock, self._connect() as conn:
+                count, total, fresh = conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(validated_at > ?), 0) FROM snapshots",
+                    (now - self.fresh_seconds,)
+                ).fetchone()
+        except Exception as e:
+            logger.warning(f"Scrape cache stats failed: {e}")
+            return {}
+        return {"enabled": self.enabled, "offline": self.offline, "snapshots": count,
+                "size_bytes": total, "fresh": fresh, "root": str(self.root)}
+
+    def clear(self) -> None:
+        """Drop every snapshot"""
+        with self._lock, self._connect() as conn:
+            for (key,) in conn.execute("SELECT key FROM snapshots").fetchall():
+                self._delete(conn, key)
+
+
+scrape_cache = ScrapeSnapshotCache.from_env()
@@ -0,0 +1,179 @@
+"""
+Scrape Diff - what changed between two website analyses of the same page
+"""
+import logging
+from typing import Dict, List, Any, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Element fields compared once two records are known to be the same element
+COMPARED_FIELDS = ("selector", "text", "aria_label", "placeholder", "href", "category")
+
+NAVIGATION_SECTIONS = ("main_menu", "breadcrumbs", "pagination", "tabs")
+
+
+def _brief(record: Dict[str, Any]) -> Dict[str, Any]:
+    """The identifying part of an element record (no positions or tags)"""
+    return {key: record.get(key, "") for key in ("node_id", "tag", "test_name", "selector", "text", "href")}
+
+
+def _fingerprint(record: Dict[str, Any]) -> Tuple[str, ...]:
+    """What a user would recognize the element by, independent of where it sits in the DOM"""
+    return tuple(str(record.get(key, ""))[:200] for key in ("tag", "type", "text", "aria_label", "placeholder", "href"))
+
+
+# Passes of _diff_records, most trusted first. node_id is the element's DOM path, so an
+# inserted sibling shifts it onto a different element: it only pairs what the fingerprint left.
+# Elements sharing a fingerprint (two "Home" links) pair with the one still at their path or
+# locator before any other.
+MATCH_PASSES = (
+    ("fingerprint", lambda r: (_fingerprint(r), r.get("node_id"))),
+    ("fingerprint", lambda r: (_fingerprint(r), r.get("selector"))),
+    ("fingerprint", _fingerprint),
+    ("node_id", lambda r: r.get("node_id")),
+    ("selector", lambda r: (r.get("tag"), r.get("selector")))
+)
+
+
+def _diff_records(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Match records by fingerprint (the same element, wherever it sits in the DOM), then
+    by DOM identity (node_id, e.g. an edited label), then by selector (same locator);
+    what is left was added or removed
+    """
+    unmatched_old = list(old)
+    unmatched_new = list(new)
+    pairs: List[Tuple[str, Dict[str, Any], Dict[str, Any]]] = []
+
+    for matched_by, key in MATCH_PASSES:
+        by_key: Dict[Any, List[Dict[str, Any]]] = {}
+        for record in unmatched_old:
+            if key(record) is not None:  # analyses stored before node ids existed
+                by_key.setdefault(key(record), []).append(record)
+        still_new = []
+        for record in unmatched_new:
+            candidates = by_key.get(key(record)) if key(record) is not None else None
+            if candidates:
+                match = candidates.pop(0)
+                unmatched_old.remove(match)
+                pairs.append((matched_by, match, record))
+            else:
+                still_new.append(record)
+        unmatched_new = still_new
+
+    changed = []
+    for matched_by, before, after in pairs:
+        changes = [field for field in COMPARED_FIELDS if before.get(field, "") != after.get(field, "")]
+        if before.get("node_id") != after.get("node_id"):
+            changes.append("dom_path")
+        if changes:
+            changed.append({"before": _brief(before), "after": _brief(after), "changes": changes,
+                            "matched_by": matched_by})
+    return {
+        "added": [_brief(record) for record in unmatched_new],
+        "removed": [_brief(record) for record in unmatched_old],
+        "changed": changed
+    }
+
+
+def _form_key(form: Dict[str, Any]) -> Tuple[str, str]:
+    return form.get("action", ""), form.get("method", "")
+
+
+def _diff_forms(old: List[Dict[str, Any]], new: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """Forms match by action and method (in order when a page has several); changes are field-level"""
+    remaining = list(old)
+    result: Dict[str, List[Dict[str, Any]]] = {"added": [], "removed": [], "changed": []}
+    for form in new:
+        match = next((candidate for candidate in remaining if _form_key(candidate) == _form_key(form)), None)
+        if match is None:
+            result["added"].append({"action": form.get("action", ""), "method": form.get("method", ""),
+                                    "fields": [_brief(field) for field in form.get("fields", [])]})
+            continue
+        remaining.remove(match)
+        fields = _diff_records(match.get("fields", []), form.get("fields", []))
+        submit = _diff_records([match["submit_button"]] if match.get("submit_button") else [],
+                               [form["submit_button"]] if form.get("submit_button") else [])
+        if any(fields.values()) or any(submit.values()):
+            result["changed"].append({"action": form.get("action", ""), "method": form.get("method", ""),
+                                      "fields": fields, "submit_button": submit})
+    result["removed"] = [{"action": form.get("action", ""), "method": form.get("method", ""),
+                          "fields": [_brief(field) for field in form.get("fields", [])]} for form in remaining]
+    return result
+
+
+def _moved(section: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """
+    Locators that must change: same element, different selector. Only fingerprint matches
+    count; a node_id or selector match may pair two different elements.
+    """
+    return [{
+        "name": entry["after"]["test_name"] or entry["before"]["test_name"],
+        "node_id": entry["after"]["node_id"],
+        "old_selector": entry["before"]["selector"],
+        "new_selector": entry["after"]["selector"]
+    } for entry in section["changed"] if "selector" in entry["changes"] and entry["matched_by"] == "fingerprint"]
+
+
+def _count(section: Dict[str, List[Any]]) -> int:
+    return sum(len(entries) for entries in section.values())
+
+
+def diff_analyses(old: Optional[Dict[str, Any]], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare a new page analysis with a stored one
+
+    Returns:
+        added/removed/changed elements, forms and navigation entries, the areas that
+        changed (page, navigation, search, forms, elements, content) and the locators
+        that moved. Without a baseline every area counts as changed.
+    """
+    if not old or old.get("error"):
+        return {"baseline": False, "changed_areas": ["page", "navigation", "search", "forms", "elements", "content"],
+                "moved_locators": []}
+
+    elements = _diff_records(old.get("elements", []), new.get("elements", []))
+    forms = _diff_forms(old.get("forms", []), new.get("forms", []))
+    old_navigation, new_navigation = old.get("navigation") or {}, new.get("navigation") or {}
+    navigation = {section: _diff_records(old_navigation.get(section, []), new_navigation.get(section, []))
+                  for section in NAVIGATION_SECTIONS}
+
+    moved = _moved(elements)
+    for form in forms["changed"]:
+        moved += _moved(form["fields"]) + _moved(form["submit_button"])
+    for section in navigation.values():
+        moved += _moved(section)
+    moved = list({entry["old_selector"] + "\0" + entry["new_selector"]: entry for entry in moved}.values())
+
+    search_touched = any(
+        "search" in (entry.get("after") or entry).get("test_name", "").lower()
+        or "search" in (entry.get("before") or {}).get("test_name", "").lower()
+        for bucket in elements.values() for entry in bucket
+    )
+    areas = {
+        "page": old.get("title") != new.get("title"),
+        "navigation": any(_count(section) for section in navigation.values()),
+        "search": search_touched,
+        "forms": bool(_count(forms)),
+        "elements": bool(_count(elements)),
+        "content": (old.get("content") != new.get("content")
+                    or old.get("accessibility") != new.get("accessibility"))
+    }
+    diff = {
+        "baseline": True,
+        "changed_areas": [area for area, changed in areas.items() if changed],
+        "summary": {
+            "added": len(elements["added"]) + len(forms["added"]) + sum(len(s["added"]) for s in navigation.values()),
+            "removed": (len(elements["removed"]) + len(forms["removed"])
+                        + sum(len(s["removed"]) for s in navigation.values())),
+            "changed": (len(elements["changed"]) + len(forms["changed"])
+                        + sum(len(s["changed"]) for s in navigation.values())),
+            "moved_locators": len(moved)
+        },
+        "elements": elements,
+        "forms": forms,
+        "navigation": navigation,
+        "moved_locators": moved
+    }
+    logger.info(f"Scrape diff for {new.get('url', '')}: {diff['summary']}, areas {diff['changed_areas']}")
+    return diff
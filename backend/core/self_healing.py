@@ -101,6 +101,36 @@ class SelfHealingEngine:
             auto_applied=auto_applied
         )
     
+    def heal_moved_locators(self,
+                            moved: List[Dict[str, Any]],
+                            locator_file: Optional[Path] = None) -> List[SelfHealingResult]:
+        """
+        Heal locators a re-scrape saw move (scrape_diff moved_locators): the element was
+        matched in the live page, so its new selector is applied without guessing
+        """
+        results = []
+        for entry in moved:
+            new_selector = entry["new_selector"]
+            suggestion = SelectorSuggestion(
+                original_selector=entry["old_selector"],
+                suggested_selector=new_selector,
+                selector_type=SelectorType.ID if new_selector.startswith('#') else SelectorType.CSS,
+                confidence=1.0,
+                reason="Same element found under a new selector when the page was re-scraped",
+                context=entry.get("node_id")
+            )
+            result = SelfHealingResult(
+                element_name=entry["name"],
+                original_selector=entry["old_selector"],
+                suggestions=[suggestion],
+                auto_applied=new_selector
+            )
+            if locator_file is not None:
+                self.apply_suggestion(suggestion, locator_file)
+            results.append(result)
+        logger.info(f"Healed {len(results)} moved locators")
+        return results
+    
     def _generate_rule_based_suggestions(self, selector: str) -> List[SelectorSuggestion]:
         """Generate suggestions based on common selector patterns"""
         suggestions = []
@@ -0,0 +1,248 @@
+"""
+Site Crawler - Analyzes many pages of one site concurrently on a single browser
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, List, Any, Optional, Set, Tuple
+from urllib.parse import urljoin, urldefrag, urlparse
+from urllib.robotparser import RobotFileParser
+
+from .browser_pool import BrowserPool, pool_for
+from .scrape_cache import scrape_cache
+from .url_scraper import scrape_page
+
+logger = logging.getLogger(__name__)
+
+# Navigation sections whose links the crawler follows
+FOLLOW_SECTIONS = ("main_menu", "breadcrumbs", "pagination")
+
+# Links to files rather than pages
+SKIP_EXTENSIONS = (
+    ".pdf", ".zip", ".gz", ".tar", ".dmg", ".exe", ".msi", ".png", ".jpg", ".jpeg",
+    ".gif", ".svg", ".webp", ".ico", ".mp3", ".mp4", ".webm", ".avi", ".mov",
+    ".css", ".js", ".json", ".xml", ".txt", ".csv", ".doc", ".docx", ".xls", ".xlsx"
+)
+
+
+def _normalize(url: str) -> str:
+    """URL without fragment and with an explicit path, so /a#x and /a are one page"""
+    url, _ = urldefrag(url)
+    parsed = urlparse(url)
+    return parsed._replace(path=parsed.path or "/").geturl()
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parsed = urlparse(url)
+    return parsed.scheme, parsed.netloc.lower()
+
+
+class SiteCrawler:
+    """
+    Breadth-first, same-origin crawl that follows the links URLScraper finds in a page's
+    navigation. Pages are analyzed by `concurrency` workers, each page in a fresh context
+    leased from the shared browser pool, so no browser is launched per page and
+    cookies or storage never leak between pages.
+    """
+
+    def __init__(self,
+                 max_depth: int = 2,
+                 max_pages: int = 50,
+                 concurrency: int = 4,
+                 respect_robots: bool = True,
+                 user_agent: str = "*",
+                 headless: bool = True,
+                 timeout: int = 30000,
+                 extraction: str = "single_pass",
+                 pool: Optional[BrowserPool] = None,
+                 **scraper_options):
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.concurrency = max(1, concurrency)
+        self.respect_robots = respect_robots
+        self.user_agent = user_agent
+        self.headless = headless
+        self.scraper_options = {"timeout": timeout, "extraction": extraction, **scraper_options}
+        self.pool = pool or pool_for(headless)
+        self._robots: Optional[RobotFileParser] = None
+
+    async def crawl(self, start_url: str) -> Dict[str, Any]:
+        """
+        Crawl a site starting at start_url
+
+        Returns:
+            Site analysis: merged elements/forms/navigation/content/accessibility (the
+            single-page analysis shape DynamicTestGenerator consumes) plus per-page
+            analyses, the link graph and pages skipped by robots.txt or failures
+        """
+        return await self.pool.arun(lambda: self._crawl(start_url))
+
+    async def _crawl(self, start_url: str) -> Dict[str, Any]:
+        start = time.time()
+        start_url = _normalize(start_url)
+        origin = _origin(start_url)
+        offline = self.scraper_options.get("offline")
+        if self.respect_robots and not (scrape_cache.offline if offline is None else offline):
+            self._robots = await asyncio.to_thread(self._load_robots, start_url)
+
+        queue: asyncio.Queue = asyncio.Queue()
+        queue.put_nowait((start_url, 0))
+        scheduled: Set[str] = {start_url}
+        pages: Dict[str, Dict[str, Any]] = {}
+        links: Dict[str, List[str]] = {}
+        skipped: Dict[str, str] = {}
+
+        async def worker() -> None:
+            while True:
+                url, depth = await queue.get()
+                try:
+                    if not self._allowed(url):
+                        skipped[url] = "robots.txt"
+                        continue
+                    analysis = await scrape_page(url, self.pool, self.headless, **self.scraper_options)
+                    analysis["depth"] = depth
+                    pages[url] = analysis
+                    if analysis.get("error"):
+                        continue
+                    children = self._same_origin_links(analysis, origin)
+                    links[url] = children
+                    if depth >= self.max_depth:
+                        continue
+                    for child in children:
+                        if child not in scheduled and len(scheduled) < self.max_pages:
+                            scheduled.add(child)
+                            queue.put_nowait((child, depth + 1))
+                except Exception as e:
+                    logger.warning(f"Crawl of {url} failed: {e}")
+                    skipped[url] = str(e)
+                finally:
+                    queue.task_done()
+
+        tasks = [asyncio.create_task(worker()) for _ in range(self.concurrency)]
+        try:
+            await queue.join()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        ordered = sorted(pages.values(), key=lambda page: (page["depth"], page["url"]))
+        site = self._merge(start_url, ordered)
+        site.update({
+            "pages": ordered,
+            "links": links,
+            "skipped": skipped,
+            "crawl": {
+                "max_depth": self.max_depth,
+                "max_pages": self.max_pages,
+                "concurrency": self.concurrency,
+                "pages_analyzed": len(ordered),
+                "pages_failed": sum(1 for page in ordered if page.get("error")),
+                "duration_ms": (time.time() - start) * 1000
+            }
+        })
+        logger.info(f"Crawled {len(ordered)} pages of {site['domain']} in {site['crawl']['duration_ms']:.0f}ms")
+        return site
+
+    def _load_robots(self, start_url: str) -> Optional[RobotFileParser]:
+        parsed = urlparse(start_url)
+        robots = RobotFileParser(f"{parsed.scheme}://{parsed.netloc}/robots.txt")
+        try:
+            robots.read()
+        except Exception as e:
+            logger.info(f"robots.txt unavailable for {parsed.netloc} ({e}); crawling without it")
+            return None
+        return robots
+
+    def _allowed(self, url: str) -> bool:
+        return self._robots is None or self._robots.can_fetch(self.user_agent, url)
+
+    def _same_origin_links(self, analysis: Dict[str, Any], origin: Tuple[str, str]) -> List[str]:
+        """Followable page URLs from the navigation sections, in discovery order"""
+        found: List[str] = []
+        navigation = analysis.get("navigation") or {}
+        for section in FOLLOW_SECTIONS:
+            for link in navigation.get(section, []):
+                href = link.get("href")
+                if not href:
+                    continue
+                url = _normalize(urljoin(analysis["url"], href))
+                if (_origin(url) == origin and url not in found
+                        and not urlparse(url).path.lower().endswith(SKIP_EXTENSIONS)):
+                    found.append(url)
+        return found
+
+    def _merge(self, start_url: str, pages: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Site-wide analysis; elements repeated on every page (header, footer) appear once"""
+        root = next((page for page in pages if page["url"] == start_url), pages[0] if pages else {})
+        site: Dict[str, Any] = {
+            "url": start_url,
+            "title": root.get("title", ""),
+            "domain": root.get("domain", urlparse(start_url).netloc),
+            "elements": [],
+            "forms": [],
+            "navigation": {"main_menu": [], "breadcrumbs": [], "pagination": [], "tabs": []},
+            "interactions": [],
+            "content": {"headings": [], "images": []},
+            "accessibility": {"aria_labels": [], "roles": []},
+            "performance": {}
+        }
+        if not pages or all(page.get("error") for page in pages):
+            site["error"] = "Failed to analyze any page of the site"
+            return site
+
+        seen: Dict[str, Set[Any]] = {}
+
+        def add(bucket: List[Any], name: str, item: Any, key: Any) -> None:
+            keys = seen.setdefault(name, set())
+            if key not in keys:
+                keys.add(key)
+                bucket.append(item)
+
+        def element_key(element: Dict[str, Any]) -> Tuple[str, str, str]:
+            return element.get("selector", ""), element.get("text", ""), element.get("href", "")
+
+        for page in pages:
+            if page.get("error"):
+                continue
+            for element in page.get("elements", []):
+                add(site["elements"], "elements", element, element_key(element))
+            for form in page.get("forms", []):
+                key = (form.get("action", ""), tuple(element_key(field) for field in form.get("fields", [])))
+                add(site["forms"], "forms", dict(form, page_url=page["url"]), key)
+            for section, bucket in site["navigation"].items():
+                for link in (page.get("navigation") or {}).get(section, []):
+                    add(bucket, f"navigation.{section}", link, element_key(link))
+            for interaction in page.get("interactions", []):
+                add(site["interactions"], "interactions", interaction, element_key(interaction))
+            content = page.get("content") or {}
+            for heading in content.get("headings", []):
+                add(site["content"]["headings"], "headings", heading, (heading["level"], heading["text"]))
+            for image in content.get("images", []):
+                add(site["content"]["images"], "images", image, image["src"])
+            accessibility = page.get("accessibility") or {}
+            for label in accessibility.get("aria_labels", []):
+                add(site["accessibility"]["aria_labels"], "aria_labels", label,
+                    (label["aria_label"], label["aria_labelledby"]))
+            site["accessibility"]["roles"].extend(accessibility.get("roles", []))
+
+        timings = [page.get("performance") or {} for page in pages if not page.get("error")]
+        site["performance"] = {
+            "load_time": max((t.get("load_time", 0) for t in timings), default=0),
+            "resource_count": sum(t.get("resource_count", 0) for t in timings),
+            "dom_size": max((t.get("dom_size", 0) for t in timings), default=0)
+        }
+        return site
+
+
+def crawl_site(url: str,
+               max_depth: int = 2,
+               max_pages: int = 50,
+               concurrency: int = 4,
+               respect_robots: bool = True,
+               headless: bool = True,
+               **scraper_options) -> Dict[str, Any]:
+    """Synchronous function to crawl a site. scraper_options: scrape_page keyword arguments"""
+    crawler = SiteCrawler(max_depth=max_depth, max_pages=max_pages, concurrency=concurrency,
+                          respect_robots=respect_robots, headless=headless, **scraper_options)
+    return crawler.pool.run(lambda: crawler._crawl(url))
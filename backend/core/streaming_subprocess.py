@@ -0,0 +1,140 @@
+"""
+Streaming Subprocess - run a command and tail its output live into a log file and run events
+"""
+import logging
+import os
+import queue
+import subprocess
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, Dict, List, Sequence
+
+from .run_events import run_events
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = 0.25  # seconds between log flushes / log events while output is flowing
+MAX_BATCH_LINES = 500  # lines per published log event
+TAIL_LINES = 200       # lines of each stream kept in the run record
+TAIL_CHARS = 20000
+KILL_GRACE_SECONDS = 5  # after a timeout kill, stop waiting for pipes held open by grandchildren
+
+
+@dataclass
+class StreamedProcess:
+    returncode: int
+    stdout_tail: str
+    stderr_tail: str
+    log_file: str
+    line_count: int
+    truncated: bool
+    timed_out: bool = False
+
+
+def _pump(pipe, stream: str, lines: "queue.Queue") -> None:
+    """Reader thread: one queue entry per line, until the pipe closes"""
+    try:
+        for line in iter(pipe.readline, ""):
+            lines.put((stream, line.rstrip("\n")))
+    finally:
+        pipe.close()
+
+
+def _tail(lines: deque) -> str:
+    return "\n".join(lines)[-TAIL_CHARS:]
+
+
+def run_streaming(cmd: Sequence[str],
+                  log_path: Path,
+                  run_id: Optional[str] = None,
+                  env: Optional[Dict[str, str]] = None,
+                  timeout: Optional[float] = None,
+                  header: str = "",
+                  shard: Optional[int] = None) -> StreamedProcess:
+    """
+    Run cmd, writing stdout/stderr line by line to log_path (stderr lines prefixed
+    "[stderr] ") and publishing them as run "log" events while it runs
+
+    The full output only lives in the log file; the result keeps the last TAIL_LINES
+    lines of each stream for the run record. On timeout the process is killed and
+    the return code is -1, as with the old subprocess.run(timeout=...) handling.
+    Log events of a sharded run carry the shard index.
+    """
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    lines: "queue.Queue" = queue.Queue()
+    tails = {"stdout": deque(maxlen=TAIL_LINES), "stderr": deque(maxlen=TAIL_LINES)}
+    counts = {"stdout": 0, "stderr": 0}
+    timed_out = False
+    killed_at = 0.0
+    # Piped Python output is block-buffered; unbuffered so lines show up as pytest prints them
+    env = dict(os.environ if env is None else env)
+    env.setdefault("PYTHONUNBUFFERED", "1")
+
+    with open(log_path, "w", encoding="utf-8") as log:
+        log.write(header)
+        log.flush()
+        try:
+            proc = subprocess.Popen(list(cmd), stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    text=True, bufsize=1, errors="replace", env=env)
+        except OSError as e:
+            log.write(f"Execution error: {e}\n")
+            return StreamedProcess(returncode=-2, stdout_tail="", stderr_tail=f"Execution error: {e}",
+                                   log_file=str(log_path), line_count=0, truncated=False)
+        readers = [threading.Thread(target=_pump, args=(pipe, stream, lines), daemon=True)
+                   for pipe, stream in ((proc.stdout, "stdout"), (proc.stderr, "stderr"))]
+        for reader in readers:
+            reader.start()
+        deadline = time.monotonic() + timeout if timeout else None
+
+        while any(reader.is_alive() for reader in readers) or not lines.empty():
+            # Collect for up to FLUSH_INTERVAL after the first line, so busy output goes out in batches
+            batch: List[tuple] = []
+            try:
+                batch.append(lines.get(timeout=FLUSH_INTERVAL))
+                flush_at = time.monotonic() + FLUSH_INTERVAL
+                while len(batch) < MAX_BATCH_LINES and time.monotonic() < flush_at:
+                    batch.append(lines.get(timeout=max(flush_at - time.monotonic(), 0)))
+            except queue.Empty:
+                pass
+            if batch:
+                published: Dict[str, List[str]] = {"stdout": [], "stderr": []}
+                for stream, line in batch:
+                    log.write(("[stderr] " if stream == "stderr" else "") + line + "\n")
+                    tails[stream].append(line)
+                    published[stream].append(line)
+                    counts[stream] += 1
+                log.flush()
+                if run_id:
+                    for stream, stream_lines in published.items():
+                        run_events.log(run_id, stream_lines, stream=stream, shard=shard)
+            if deadline and not timed_out and time.monotonic() > deadline:
+                logger.warning(f"Killing {cmd[0]} after {timeout}s (run {run_id})")
+                proc.kill()
+                timed_out = True
+                killed_at = time.monotonic()
+            if timed_out and time.monotonic() - killed_at > KILL_GRACE_SECONDS:
+                break
+
+        returncode = proc.wait()
+        if timed_out:
+            returncode = -1
+            message = f"Test execution timed out after {timeout:g} seconds"
+            tails["stderr"].append(message)
+            log.write(f"[stderr] {message}\n")
+            if run_id:
+                run_events.log(run_id, [message], stream="stderr", shard=shard)
+        log.write(f"\nExit Code: {returncode}\n")
+
+    return StreamedProcess(
+        returncode=returncode,
+        stdout_tail=_tail(tails["stdout"]),
+        stderr_tail=_tail(tails["stderr"]),
+        log_file=str(log_path),
+        line_count=counts["stdout"] + counts["stderr"],
+        truncated=any(counts[stream] > len(tails[stream]) or len("\n".join(tails[stream])) > TAIL_CHARS
+                      for stream in tails),
+        timed_out=timed_out
+    )
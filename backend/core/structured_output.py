@@ -0,0 +1,234 @@
+"""
+Structured Output - schema-constrained LLM responses: local validation, partial fixing and outcome stats
+"""
+import json
+import logging
+import re
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Chat-completion JSON modes require an object root; array schemas are wrapped under this key
+ARRAY_WRAPPER_KEY = "items"
+# JSON-schema keywords sent to providers; items and properties are rewritten recursively
+PROVIDER_KEYWORDS = ("type", "required", "enum", "description")
+
+_TYPES = {
+    "string": str, "integer": int, "number": (int, float), "boolean": bool,
+    "array": list, "object": dict, "null": type(None),
+}
+
+
+def object_root(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Schema with an object at the root; array schemas are wrapped as {"items": [...]}"""
+    if schema.get("type") == "array":
+        return {"type": "object", "required": [ARRAY_WRAPPER_KEY], "properties": {ARRAY_WRAPPER_KEY: schema}}
+    return schema
+
+
+def request_schema(schema: Dict[str, Any], free_form_objects: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Copy of schema with only the keywords every provider's schema mode accepts ("default"
+    and the like stay local, for fix()). Gemini cannot express objects without properties
+    (free_form_objects=False): such schemas give None and the caller falls back to JSON mode.
+    """
+    if not free_form_objects and schema.get("type") == "object" and not schema.get("properties"):
+        return None
+    portable: Dict[str, Any] = {key: schema[key] for key in PROVIDER_KEYWORDS if key in schema}
+    if "items" in schema:
+        portable["items"] = request_schema(schema["items"], free_form_objects)
+        if portable["items"] is None:
+            return None
+    if "properties" in schema:
+        portable["properties"] = {}
+        for key, sub in schema["properties"].items():
+            portable["properties"][key] = request_schema(sub, free_form_objects)
+            if portable["properties"][key] is None:
+                return None
+    return portable
+
+
+def close_truncated(text: str) -> str:
+    """Best-effort completion of JSON cut off mid-output: close the open string and brackets"""
+    closers: List[str] = []
+    in_string = escape = False
+    end = len(text)
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "[{":
+            closers.append("]" if ch == "[" else "}")
+        elif ch in "]}" and closers:
+            closers.pop()
+            if not closers:
+                end = i + 1
+                break
+    fixed = text[:end]
+    if in_string:
+        fixed += '"'
+    fixed = fixed.rstrip()
+    # Drop an object key that never got its value, then any dangling comma
+    if closers and closers[-1] == "}":
+        fixed = re.sub(r'([,{])\s*"(?:[^"\\]|\\.)*"\s*:?\s*$', r"\1", fixed)
+    fixed = re.sub(r",\s*$", "", fixed)
+    fixed = re.sub(r',\s*([\]}])', r"\1", fixed)
+    return fixed + "".join(reversed(closers))
+
+
+def extract_json(raw: Optional[str]) -> Tuple[Optional[Any], bool]:
+    """
+    First JSON value in raw LLM output (code fences and prose are skipped)
+
+    Returns:
+        (value or None, True if the value had to be closed after truncation)
+    """
+    text = (raw or "").strip()
+    if text.startswith("```"):
+        text = text[text.find("\n") + 1:] if "\n" in text else ""
+        text = text.rstrip().removesuffix("```")
+    starts = [i for i in (text.find("{"), text.find("[")) if i != -1]
+    if not starts:
+        return None, False
+    text = text[min(starts):]
+    decoder = json.JSONDecoder()
+    try:
+        return decoder.raw_decode(text)[0], False
+    except json.JSONDecodeError:
+        pass
+    try:
+        return decoder.raw_decode(close_truncated(text))[0], True
+    except json.JSONDecodeError:
+        return None, False
+
+
+def _is_type(value: Any, expected: Any) -> bool:
+    names = expected if isinstance(expected, list) else [expected]
+    for name in names:
+        if name in ("integer", "number") and isinstance(value, bool):
+            continue
+        if isinstance(value, _TYPES.get(name, object)):
+            return True
+    return False
+
+
+def validate(data: Any, schema: Dict[str, Any], path: str = "$") -> List[str]:
+    """Validate against the JSON-schema subset used in this repo (type, required, properties, items, enum)"""
+    expected = schema.get("type")
+    if expected and not _is_type(data, expected):
+        return [f"{path}: expected {expected}, got {type(data).__name__}"]
+    errors: List[str] = []
+    if "enum" in schema and data not in schema["enum"]:
+        errors.append(f"{path}: {data!r} not in {schema['enum']}")
+    if isinstance(data, dict):
+        for key in schema.get("required", []):
+            if key not in data:
+                errors.append(f"{path}: missing required field {key}")
+        for key, sub in (schema.get("properties") or {}).items():
+            if key in data:
+                errors.extend(validate(data[key], sub, f"{path}.{key}"))
+    elif isinstance(data, list) and "items" in schema:
+        for i, item in enumerate(data):
+            errors.extend(validate(item, schema["items"], f"{path}[{i}]"))
+    return errors
+
+
+def fix(data: Any, schema: Dict[str, Any]) -> Any:
+    """
+    Repair common deviations without another LLM call: unwrap/wrap arrays, stringify
+    scalars and objects where strings are expected, fill missing container fields.
+    Missing required strings are left for the caller to handle.
+    """
+    expected = schema.get("type")
+    if expected == "array":
+        if isinstance(data, dict):
+            wrapped = data.get(ARRAY_WRAPPER_KEY)
+            data = wrapped if isinstance(wrapped, list) else [data]
+        elif data is None:
+            data = []
+        elif not isinstance(data, list):
+            data = [data]
+        if "items" in schema:
+            data = [fix(item, schema["items"]) for item in data if item is not None]
+    elif expected == "object" and isinstance(data, dict):
+        props = schema.get("properties") or {}
+        data = {key: fix(value, props[key]) if key in props else value for key, value in data.items()}
+        for key in schema.get("required", []):
+            if data.get(key) is None:
+                sub = props.get(key, {})
+                if "default" in sub:
+                    data[key] = sub["default"]
+                elif sub.get("type") in ("array", "object"):
+                    data[key] = [] if sub["type"] == "array" else {}
+    elif expected == "string":
+        if isinstance(data, (int, float)) and not isinstance(data, bool):
+            data = str(data)
+        elif isinstance(data, dict):
+            data = data.get("text") or data.get("value") or data.get("name") or json.dumps(data)
+        elif isinstance(data, list) and all(isinstance(item, str) for item in data):
+            data = " ".join(data)
+    elif expected in ("integer", "number") and isinstance(data, str):
+        try:
+            data = int(data) if expected == "integer" else float(data)
+        except ValueError:
+            pass
+    return data
+
+
+def coerce(raw: Optional[str], schema: Dict[str, Any]) -> Tuple[Optional[Any], List[str], bool]:
+    """
+    Parse, validate and locally fix an LLM response
+
+    Returns:
+        (value or None, remaining validation errors, True if a local fix was applied)
+    """
+    data, truncated = extract_json(raw)
+    if data is None:
+        return None, ["no JSON value found"], False
+    errors = validate(data, schema)
+    if not errors:
+        return data, [], truncated
+    fixed = fix(data, schema)
+    return fixed, validate(fixed, schema), True
+
+
+class StructuredOutputStats:
+    """How structured responses were obtained, per task_type (process-wide)"""
+
+    # valid: usable as returned; fixed_locally: usable after fix(); repaired: needed
+    # the repair_json round trip; failed: unusable; no_response: every provider failed
+    OUTCOMES = ("valid", "fixed_locally", "repaired", "failed", "no_response")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Dict[str, int]] = {}
+
+    def record(self, task_type: str, outcome: str) -> None:
+        with self._lock:
+            counts = self._counts.setdefault(task_type, dict.fromkeys(self.OUTCOMES, 0))
+            counts[outcome] += 1
+        if outcome in ("repaired", "failed"):
+            logger.info(f"Structured output for {task_type}: {outcome}")
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Outcome counts and the share of responses that still needed an LLM repair"""
+        with self._lock:
+            by_task = {task: dict(counts) for task, counts in self._counts.items()}
+        totals = {outcome: sum(c[outcome] for c in by_task.values()) for outcome in self.OUTCOMES}
+        answered = sum(totals.values()) - totals["no_response"]
+        return {
+            **totals,
+            "repair_rate": (totals["repaired"] + totals["failed"]) / answered if answered else 0.0,
+            "by_task_type": by_task,
+        }
+
+
+structured_stats = StructuredOutputStats()
@@ -3,7 +3,7 @@ Test Case Generator - Generates test cases from RequirementGraph
 """
 import json
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from itertools import product
 import logging
 
@@ -12,6 +12,7 @@ from .llm_orchestrator import LLMOrchestrator
 from .domain_detector import DomainDetector
 from .prompt_loader import PromptLoader
 from .dynamic_test_generator import DynamicTestGenerator
+from .utils.json_stream import IncrementalJSONArrayParser
 
 logger = logging.getLogger(__name__)
 
@@ -19,13 +20,48 @@ logger = logging.getLogger(__name__)
 class TestCaseGenerator:
     """Generate test cases from RequirementGraph using heuristics"""
     
-    def __init__(self, orchestrator: Optional[LLMOrchestrator] = None):
+    def __init__(self,
+                 orchestrator: Optional[LLMOrchestrator] = None,
+                 domain_detector: Optional[DomainDetector] = None,
+                 prompt_loader: Optional[PromptLoader] = None):
         self.orchestrator = orchestrator or LLMOrchestrator()
-        self.domain_detector = DomainDetector()
-        self.prompt_loader = PromptLoader()
+        self.domain_detector = domain_detector or DomainDetector()
+        self.prompt_loader = prompt_loader or PromptLoader()
         self.dynamic_generator = DynamicTestGenerator()
+        # Per-request URLScraper options for URL-driven generation (e.g. readiness)
+        self.scrape_options: Dict[str, Any] = {}
+        self.feature_schema = self._get_feature_schema()
         self.test_counter = 0
 
+    def _get_feature_schema(self) -> Dict[str, Any]:
+        """JSON schema of the BDD feature pack requested from the LLM"""
+        return {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["feature_name", "scenarios"],
+                "properties": {
+                    "feature_name": {"type": "string"},
+                    "actor": {"type": "string"},
+                    "goal": {"type": "string"},
+                    "benefit": {"type": "string"},
+                    "scenarios": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "required": ["type", "name", "steps"],
+                            "properties": {
+                                "type": {"type": "string", "default": "scenario"},
+                                "name": {"type": "string"},
+                                "steps": {"type": "array", "items": {"type": "string"}},
+                                "examples": {"type": "array", "items": {"type": "object"}}
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
     def _intent_keywords(self, requirement: RequirementGraph) -> set:
         text = f"{requirement.title} {requirement.goal} {requirement.benefit}".lower()
         keys = set()
@@ -36,9 +72,20 @@ class TestCaseGenerator:
 
     def _apply_intent_filter(self, requirement: RequirementGraph, features: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """If the user's intent mentions specific flows (e.g., checkout), keep only relevant features."""
-        intents = self._intent_keywords(requirement)
-        if not intents:
+        patterns = self._intent_patterns(requirement)
+        if not patterns:
             return features
+        filtered: List[Dict[str, Any]] = []
+        for f in features:
+            name = str(f.get("feature_name", "")).lower()
+            if any(p in name for p in patterns):
+                filtered.append(f)
+        # If filter removed everything, fall back to original list
+        return filtered or features
+
+    def _intent_patterns(self, requirement: RequirementGraph) -> List[str]:
+        """Feature-name patterns implied by the flows the user's intent mentions"""
+        intents = self._intent_keywords(requirement)
         key_to_patterns = {
             "checkout": ["checkout", "payment", "order"],
             "cart": ["cart", "mini-cart", "basket"],
@@ -50,14 +97,7 @@ class TestCaseGenerator:
         patterns = []
         for k in intents:
             patterns.extend(key_to_patterns.get(k, [k]))
-        patterns = [p.lower() for p in patterns]
-        filtered: List[Dict[str, Any]] = []
-        for f in features:
-            name = str(f.get("feature_name", "")).lower()
-            if any(p in name for p in patterns):
-                filtered.append(f)
-        # If filter removed everything, fall back to original list
-        return filtered or features
+        return [p.lower() for p in patterns]
 
     def _sanitize_tags(self, tags: List[str]) -> List[str]:
         """Sanitize and de-duplicate tags for Gherkin (@tag)."""
@@ -87,7 +127,13 @@ class TestCaseGenerator:
         """
         # Generate comprehensive BDD Features using LLM
         features = self._generate_bdd_features(requirement, coverage)
-        
+        return self.build_suite(requirement, features, coverage)
+    
+    def build_suite(self,
+                    requirement: RequirementGraph,
+                    features: List[Dict[str, Any]],
+                    coverage: str = "comprehensive") -> TestSuite:
+        """Convert generated BDD features into a de-duplicated, augmented TestSuite"""
         # Convert Features to TestCase format for compatibility
         test_cases = self._convert_features_to_test_cases(features)
         test_cases = self._deduplicate_cases(test_cases)
@@ -252,20 +298,11 @@ class TestCaseGenerator:
         if raw_text:
             try:
                 logger.info("Direct LLM generation from raw input enabled")
-                system = self.prompt_loader.get_prompt('bdd_generation.system_prompt') or "You are an expert BDD test designer."
-                prompt = self.prompt_loader.get_prompt('bdd_generation.main_prompt',
-                    requirement_json=json.dumps({"user_input": raw_text}, indent=2),
-                    domain_context="",
-                    domain_examples="")
-                response = self.orchestrator.call(prompt=prompt, system=system, task_type="bdd_generation")
-                text = (response.content or "").strip()
-                from json import JSONDecoder
-                s_idx = text.find("[")
-                if s_idx == -1:
-                    s_idx = text.find("{")
-                dec = JSONDecoder()
-                obj, _ = dec.raw_decode(text[s_idx:])
-                feats = obj if isinstance(obj, list) else [obj]
+                prompt, system = self._raw_text_bdd_prompt(raw_text)
+                feats, _ = self.orchestrator.call_json(prompt=prompt, schema=self.feature_schema,
+                                                       system=system, task_type="bdd_generation")
+                if not feats:
+                    raise ValueError("no features in LLM response")
                 return feats
             except Exception as e:
                 logger.warning(f"Direct LLM generation failed: {e}; falling back to existing pipeline")
@@ -279,7 +316,7 @@ class TestCaseGenerator:
             try:
                 # Use dynamic generation based on actual website scraping
                 logger.info("Starting dynamic generation...")
-                features = self.dynamic_generator.generate_tests_from_website(url, headless=True)
+                features = self.dynamic_generator.generate_tests_from_website(url, headless=True, **self.scrape_options)
                 logger.info(f"Dynamic generation completed. Features: {len(features) if features else 0}")
                 
                 if features and len(features) > 0:
@@ -302,9 +339,17 @@ class TestCaseGenerator:
         feats = self._apply_intent_filter(requirement, feats)
         return feats
     
-    def _generate_llm_bdd_features(self, requirement: RequirementGraph, coverage: str) -> List[Dict[str, Any]]:
-        """Generate BDD features using LLM (original method)"""
-        
+    def _raw_text_bdd_prompt(self, raw_text: str) -> tuple[Optional[str], str]:
+        """Prompt and system prompt for direct BDD generation from the user's raw input"""
+        system = self.prompt_loader.get_prompt('bdd_generation.system_prompt') or "You are an expert BDD test designer."
+        prompt = self.prompt_loader.get_prompt('bdd_generation.main_prompt',
+            requirement_json=json.dumps({"user_input": raw_text}, indent=2),
+            domain_context="",
+            domain_examples="")
+        return prompt, system
+    
+    def _llm_bdd_prompt(self, requirement: RequirementGraph) -> tuple[Optional[str], str, str]:
+        """Prompt, system prompt and detected domain for BDD generation from a RequirementGraph"""
         # Detect domain from requirement
         ac_text = ' '.join([f"{ac.given} {ac.when} {ac.then}" for ac in requirement.acceptanceCriteria])
         requirement_text = f"{requirement.title} {requirement.goal} {ac_text}"
@@ -326,57 +371,87 @@ class TestCaseGenerator:
         
         system_prompt = self.prompt_loader.get_prompt('bdd_generation.system_prompt') or \
                        "You are an expert BDD test designer. Generate comprehensive Features with realistic scenarios."
+        return prompt, system_prompt, domain
+    
+    async def astream_bdd_features(self,
+                                   requirement: RequirementGraph,
+                                   coverage: str = "comprehensive") -> AsyncIterator[Dict[str, Any]]:
+        """
+        Streaming variant of _generate_bdd_features: yields each feature as soon as
+        the LLM has finished writing it. Follows the same source order (raw input,
+        website scrape, RequirementGraph prompt, fallback pack).
+        """
+        raw_text = getattr(requirement, 'raw_text', None)
+        url = getattr(requirement, 'url', '') or ''
+        domain = None
+        
+        if raw_text:
+            prompt, system = self._raw_text_bdd_prompt(raw_text)
+        elif url.startswith(('http://', 'https://')):
+            features = await self.dynamic_generator.agenerate_tests_from_website(url, True, **self.scrape_options)
+            if features:
+                for feature in features:
+                    yield feature
+                return
+            prompt, system, domain = self._llm_bdd_prompt(requirement)
+        else:
+            prompt, system, domain = self._llm_bdd_prompt(requirement)
+        
+        emitted = 0
+        # Intent filter (LLM path only): hold back off-intent features, release them if nothing matches
+        patterns = self._intent_patterns(requirement) if domain is not None else []
+        held_back: List[Dict[str, Any]] = []
+        if prompt:
+            parser = IncrementalJSONArrayParser()
+            try:
+                async for chunk in self.orchestrator.astream(prompt=prompt, system=system, task_type="bdd_generation"):
+                    for feature in parser.feed(chunk):
+                        if not isinstance(feature, dict):
+                            continue
+                        if domain not in (None, 'ecommerce') and self._feature_looks_ecommerce(feature):
+                            continue
+                        name = str(feature.get("feature_name", "")).lower()
+                        if patterns and not any(p in name for p in patterns):
+                            held_back.append(feature)
+                            continue
+                        emitted += 1
+                        yield feature
+                    if parser.done:
+                        break
+            except Exception as e:
+                logger.warning(f"Streaming BDD generation failed: {e}")
+        
+        if not emitted and held_back:
+            for feature in held_back:
+                yield feature
+        elif not emitted:
+            logger.error("No features streamed from LLM; using fallback features")
+            for feature in self._generate_fallback_features(requirement):
+                yield feature
+    
+    def _generate_llm_bdd_features(self, requirement: RequirementGraph, coverage: str) -> List[Dict[str, Any]]:
+        """Generate BDD features using LLM (original method)"""
+        prompt, system_prompt, domain = self._llm_bdd_prompt(requirement)
         
         if not prompt:
             logger.error("Failed to load BDD generation prompt template")
             return self._generate_fallback_features(requirement)
         
-        response = self.orchestrator.call(
+        # Schema-constrained call; the orchestrator validates/fixes the JSON locally
+        features, _ = self.orchestrator.call_json(
             prompt=prompt,
+            schema=self.feature_schema,
             system=system_prompt,
             task_type="bdd_generation"
         )
-
-        # Robustly extract first JSON array/object (ignore trailing text)
-        raw = (response.content or "").strip()
-        if not raw:
-            logger.error("Empty LLM response; using fallback features")
+        if not features:
+            logger.error("No usable features in LLM response; using fallback features")
             return self._generate_fallback_features(requirement)
 
-        def strip_code_fences(text: str) -> str:
-            t = text.strip()
-            if t.startswith("```"):
-                try:
-                    first_nl = t.find("\n")
-                    t = t[first_nl+1:]
-                    if t.endswith("```"):
-                        t = t[:-3]
-                except Exception:
-                    pass
-            return t
-
-        try:
-            text = strip_code_fences(raw)
-            # Find first JSON start
-            s_idx = text.find("[")
-            start_is_array = True
-            if s_idx == -1:
-                s_idx = text.find("{")
-                start_is_array = False
-            if s_idx == -1:
-                raise ValueError("No JSON start token found")
-            from json import JSONDecoder
-            dec = JSONDecoder()
-            obj, end = dec.raw_decode(text[s_idx:])
-            # obj may be an object or array
-            features = obj if isinstance(obj, list) else [obj]
-            # Domain-based safety filter: drop e-commerce-only features if domain isn't ecommerce
-            if domain != 'ecommerce':
-                features = self._filter_features_by_domain(features, domain)
-            return features
-        except Exception as e:
-            logger.error(f"Failed to parse BDD features: {e}")
-            return self._generate_fallback_features(requirement)
+        # Domain-based safety filter: drop e-commerce-only features if domain isn't ecommerce
+        if domain != 'ecommerce':
+            features = self._filter_features_by_domain(features, domain)
+        return features
 
     def _feature_looks_ecommerce(self, feature: Dict[str, Any]) -> bool:
         name = str(feature.get("feature_name", "")).lower()
@@ -826,20 +901,25 @@ EXAMPLE OUTPUT:
 Return ONLY the JSON array of specific, actionable steps.
 """
         
-        response = self.orchestrator.call(
+        steps_schema = {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "required": ["action", "params"],
+                "properties": {"action": {"type": "string", "default": "unknown.action"}, "params": {"type": "object"}}
+            }
+        }
+        steps_data, _ = self.orchestrator.call_json(
             prompt=prompt,
+            schema=steps_schema,
             system="You are a test automation expert. Generate precise test steps.",
             task_type="test_generation"
         )
         
-        try:
-            steps_data = json.loads(response.content)
+        if steps_data:
             for step in steps_data:
-                steps.append(TestStep(
-                    action=step.get("action", "unknown.action"),
-                    params=step.get("params", {})
-                ))
-        except:
+                steps.append(TestStep(action=step["action"], params=step["params"]))
+        else:
             # Fallback: create basic steps from AC
             steps = self._create_fallback_steps(ac)
         
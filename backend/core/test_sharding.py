@@ -0,0 +1,238 @@
+"""
+Test Sharding - split a pytest run into duration-balanced shards and merge their results
+"""
+import heapq
+import html
+import logging
+import os
+import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional, Dict, Any, List, Sequence
+
+from .run_events import run_events
+from .streaming_subprocess import run_streaming, TAIL_CHARS
+
+logger = logging.getLogger(__name__)
+
+REPORTS_DIR = Path("reports")
+LOGS_DIR = Path("artifacts/logs")
+DURATION_HISTORY_FILES = 10  # newest JUnit reports read for per-test durations
+DEFAULT_TEST_SECONDS = 5.0   # estimate for tests without history (when no test has any)
+
+
+def default_shard_count() -> int:
+    """Shards per run when the request does not say (PARALLEL_WORKERS, 1 = serial)"""
+    return max(1, int(os.getenv("PARALLEL_WORKERS", "1")))
+
+
+def run_timeout() -> float:
+    """Seconds before a pytest process (the whole run, or one shard) is killed"""
+    return float(os.getenv("RUN_TIMEOUT_SECONDS", "300"))
+
+
+def junit_key(nodeid: str) -> str:
+    """
+    JUnit classname::name for a pytest node id, the key durations are stored under:
+    tests/steps/test_cart.py::TestCart::test_add[1] -> tests.steps.test_cart.TestCart::test_add[1]
+    """
+    path, _, rest = nodeid.partition("::")
+    parts = rest.split("::")
+    module = path[:-3] if path.endswith(".py") else path
+    classname = ".".join([module.replace("/", ".").replace("\\", "."), *parts[:-1]])
+    return f"{classname}::{parts[-1]}"
+
+
+def junit_durations(reports_dir: Path = REPORTS_DIR) -> Dict[str, float]:
+    """Per-test durations from the newest merged JUnit reports (newer runs win)"""
+    reports = sorted((path for path in reports_dir.glob("junit_*.xml") if "_shard" not in path.stem),
+                     key=lambda path: path.stat().st_mtime)[-DURATION_HISTORY_FILES:]
+    durations: Dict[str, float] = {}
+    for report in reports:
+        try:
+            for case in ET.parse(report).getroot().iter("testcase"):
+                if case.find("skipped") is None:
+                    durations[f"{case.get('classname', '')}::{case.get('name', '')}"] = float(case.get("time") or 0)
+        except (ET.ParseError, ValueError) as e:
+            logger.warning(f"Skipping unreadable JUnit report {report}: {e}")
+    return durations
+
+
+def collect_tests(cmd: Sequence[str], env: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Node ids pytest would run for cmd. Ini addopts are dropped so collection writes no
+    reports, and verbosity is pinned last (one node id per line) whatever -q/-v cmd has.
+    """
+    result = subprocess.run([*cmd, "--collect-only", "-o", "addopts=", "--verbosity=-1"],
+                            capture_output=True, text=True, env=env, timeout=120)
+    tests = [line.strip() for line in result.stdout.splitlines() if "::" in line and not line.startswith(" ")]
+    if result.returncode not in (0, 5):  # 5: nothing collected
+        logger.warning(f"Test collection exited with {result.returncode}: {result.stdout[-500:]}")
+    return tests
+
+
+def plan_shards(tests: List[str], durations: Dict[str, float], count: int) -> List[Dict[str, Any]]:
+    """
+    Longest-processing-time-first: hand the slowest remaining test to the least loaded
+    shard. Tests without history count as the median known duration.
+    """
+    known = sorted(durations[junit_key(test)] for test in tests if junit_key(test) in durations)
+    fallback = known[len(known) // 2] if known else DEFAULT_TEST_SECONDS
+    estimates = {test: durations.get(junit_key(test), fallback) for test in tests}
+
+    shards = [{"index": index, "tests": [], "estimated_seconds": 0.0} for index in range(min(count, len(tests)))]
+    heap = [(0.0, index) for index in range(len(shards))]
+    for test in sorted(tests, key=lambda test: -estimates[test]):
+        load, index = heapq.heappop(heap)
+        shards[index]["tests"].append(test)
+        heapq.heappush(heap, (load + estimates[test], index))
+    for shard in shards:
+        shard["estimated_seconds"] = round(sum(estimates[test] for test in shard["tests"]), 3)
+    return shards
+
+
+def prepare_shards(cmd: Sequence[str], run_id: str, count: int,
+                   env: Optional[Dict[str, str]] = None) -> List[Dict[str, Any]]:
+    """Collect and balance the run's tests; fewer than two shards means run serially"""
+    tests = collect_tests(cmd, env)
+    shards = plan_shards(tests, junit_durations(), count) if count > 1 else []
+    if len(shards) > 1:
+        logger.info(f"Run {run_id}: {len(tests)} tests in {len(shards)} shards, estimated "
+                    f"{[shard['estimated_seconds'] for shard in shards]}s")
+    return shards
+
+
+def shard_plan(shards: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """What the run record and events show of a plan (test counts, not node ids)"""
+    return [{"index": shard["index"], "tests": len(shard["tests"]), "estimated_seconds": shard["estimated_seconds"]}
+            for shard in shards]
+
+
+def run_shard(cmd: Sequence[str], run_id: str, shard: Dict[str, Any],
+              env: Optional[Dict[str, str]] = None, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Run one shard's node ids in its own pytest process with its own log and reports"""
+    index = shard["index"]
+    junit = REPORTS_DIR / f"junit_{run_id}_shard{index}.xml"
+    # The shard's node ids replace the directories/files cmd selects (e.g. "tests")
+    modules = {test.split("::")[0] for test in shard["tests"]}
+    base = [arg for position, arg in enumerate(cmd)
+            if position == 0 or arg.startswith("-")
+            or not any(module == arg.rstrip("/") or module.startswith(arg.rstrip("/") + "/") for module in modules)]
+    report = REPORTS_DIR / f"report_{run_id}_shard{index}.html"
+    shard_cmd = [*base, f"--junitxml={junit}", f"--html={report}", "--self-contained-html", *shard["tests"]]
+    header = (f"=== Test Execution Log for Run {run_id}, shard {index} ({len(shard['tests'])} tests, "
+              f"estimated {shard['estimated_seconds']}s) ===\n" + "=" * 50 + "\n\n")
+    result = run_streaming(shard_cmd, LOGS_DIR / f"pytest_{run_id}_shard{index}.log", run_id=run_id, env=env,
+                           timeout=timeout or run_timeout(), header=header, shard=index)
+    return {
+        "index": index,
+        "tests": len(shard["tests"]),
+        "estimated_seconds": shard["estimated_seconds"],
+        "returncode": result.returncode,
+        "timed_out": result.timed_out,
+        "log_file": result.log_file,
+        "junit": str(junit),
+        "html_report": str(report),
+        "output": result.stdout_tail,
+        "errors": result.stderr_tail,
+        "output_lines": result.line_count,
+        "output_truncated": result.truncated
+    }
+
+
+def failed_shard(run_id: str, shard: Dict[str, Any], error: str, timed_out: bool = False) -> Dict[str, Any]:
+    """Result for a shard whose process or job died before run_shard returned (-2, as for a failed launch)"""
+    index = shard["index"]
+    return {
+        "index": index,
+        "tests": len(shard["tests"]),
+        "estimated_seconds": shard["estimated_seconds"],
+        "returncode": -1 if timed_out else -2,
+        "timed_out": timed_out,
+        "log_file": str(LOGS_DIR / f"pytest_{run_id}_shard{index}.log"),
+        "junit": str(REPORTS_DIR / f"junit_{run_id}_shard{index}.xml"),
+        "html_report": str(REPORTS_DIR / f"report_{run_id}_shard{index}.html"),
+        "output": "",
+        "errors": error,
+        "output_lines": 0,
+        "output_truncated": False
+    }
+
+
+def merge_junit(paths: List[Path], out_path: Path) -> Dict[str, Any]:
+    """One <testsuites> report from the shards' reports; returns its totals"""
+    merged = ET.Element("testsuites", name="pytest")
+    totals = {"tests": 0, "failures": 0, "errors": 0, "skipped": 0, "time": 0.0}
+    for path in paths:
+        if not path.exists():
+            continue
+        try:
+            root = ET.parse(path).getroot()
+        except ET.ParseError as e:
+            logger.warning(f"Skipping unreadable shard report {path}: {e}")
+            continue
+        for suite in ([root] if root.tag == "testsuite" else root.findall("testsuite")):
+            merged.append(suite)
+            for field in ("tests", "failures", "errors", "skipped"):
+                totals[field] += int(suite.get(field) or 0)
+            totals["time"] += float(suite.get("time") or 0)
+    totals["time"] = round(totals["time"], 3)
+    for field, value in totals.items():
+        merged.set(field, str(value))
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    ET.ElementTree(merged).write(out_path, encoding="utf-8", xml_declaration=True)
+    return totals
+
+
+def write_report_index(run_id: str, results: List[Dict[str, Any]], out_path: Path) -> None:
+    """
+    The run's HTML report for a sharded run: pytest-html reports do not merge, so this
+    page links each shard's report (missing ones, e.g. of a killed shard, are listed unlinked)
+    """
+    rows = []
+    for result in results:
+        report = Path(result.get("html_report") or "")
+        status = "passed" if result["returncode"] == 0 else f"failed (exit code {result['returncode']})"
+        label = f"Shard {result['index']}: {result['tests']} tests, {status}"
+        rows.append(f'<li><a href="{html.escape(report.name)}">{html.escape(label)}</a></li>'
+                    if report.name and report.exists() else f"<li>{html.escape(label)}, no report</li>")
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    out_path.write_text(f"<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Run {html.escape(run_id)}</title>"
+                        f"</head><body><h1>Run {html.escape(run_id)}</h1><ul>{''.join(rows)}</ul></body></html>\n",
+                        encoding="utf-8")
+
+
+def merge_shards(run_id: str, results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Run record fields for a finished sharded run: one status, one JUnit report, per-shard details"""
+    results = sorted(results, key=lambda result: result["index"])
+    junit = REPORTS_DIR / f"junit_{run_id}.xml"
+    totals = merge_junit([Path(result["junit"]) for result in results], junit)
+    report = REPORTS_DIR / f"report_{run_id}.html"
+    write_report_index(run_id, results, report)
+    failed = [result for result in results if result["returncode"] != 0]
+    share = TAIL_CHARS // max(len(results), 1)
+    return {
+        "status": "failed" if failed else "completed",
+        "exit_code": failed[0]["returncode"] if failed else 0,
+        "output": "\n".join(f"=== shard {result['index']} ===\n{result['output'][-share:]}" for result in results),
+        "errors": "\n".join(f"=== shard {result['index']} ===\n{result['errors'][-share:]}"
+                            for result in results if result["errors"]),
+        "output_lines": sum(result["output_lines"] for result in results),
+        "output_truncated": any(result["output_truncated"] or len(result["output"]) > share
+                                or len(result["errors"]) > share for result in results),
+        "junit_report": str(junit),
+        "junit_totals": totals,
+        "html_report": str(report),
+        "shards": [{key: value for key, value in result.items() if key not in ("output", "errors")}
+                   for result in results]
+    }
+
+
+def run_sharded(cmd: Sequence[str], run_id: str, shards: List[Dict[str, Any]],
+                env: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Run planned shards as parallel local pytest processes and merge them"""
+    run_events.publish(run_id, "shards", {"plan": shard_plan(shards)})
+    with ThreadPoolExecutor(max_workers=len(shards), thread_name_prefix=f"shard-{run_id[:8]}") as pool:
+        results = list(pool.map(lambda shard: run_shard(cmd, run_id, shard, env), shards))
+    return merge_shards(run_id, results)
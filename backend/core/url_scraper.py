@@ -2,46 +2,430 @@
 URL Scraper - Analyzes actual website structure using Playwright
 """
 import asyncio
+import hashlib
 import logging
+import time
+import warnings
 from typing import Dict, List, Any, Optional
-from pathlib import Path
+from urllib.parse import urlparse
+import urllib.request
 from playwright.async_api import async_playwright, Browser, Page
-from playwright.sync_api import sync_playwright
-import json
-import re
+
+from .browser_pool import BrowserPool, pool_for
+from .scrape_cache import ScrapeSnapshotCache, dom_hash, scrape_cache
+from .html_analyzer import parse, extract_payload, client_rendered_reason
+from .scrape_diff import diff_analyses
 
 logger = logging.getLogger(__name__)
 
+
+def _node_id(dom_path: str) -> str:
+    """Stable identifier for a DOM node from its structural path"""
+    return hashlib.sha1(dom_path.encode()).hexdigest()[:12]
+
+
+def _unique(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Drop repeated canonical records, keeping first-seen order"""
+    seen = set()
+    unique = []
+    for record in records:
+        if record["node_id"] not in seen:
+            seen.add(record["node_id"])
+            unique.append(record)
+    return unique
+
+
+class ElementIndex:
+    """
+    One canonical record per DOM node for the duration of a scrape. A node matched by
+    several selectors or sections (a nav link that is also a[href] and pagination) keeps
+    a single record whose `tags` and `selector_types` list every match.
+    """
+    
+    def __init__(self):
+        self._records: Dict[str, Dict[str, Any]] = {}
+    
+    def tag(self, node_id: str, tag: str, selector_type: str) -> Optional[Dict[str, Any]]:
+        """Add a tag to an already known node; None if the node hasn't been seen yet"""
+        record = self._records.get(node_id)
+        if record is not None:
+            if tag not in record["tags"]:
+                record["tags"].append(tag)
+            if selector_type not in record["selector_types"]:
+                record["selector_types"].append(selector_type)
+        return record
+    
+    def add(self, record: Dict[str, Any], tag: str) -> Dict[str, Any]:
+        """Register a newly extracted record (or merge into the existing one for its node)"""
+        existing = self.tag(record["node_id"], tag, record["selector_type"])
+        if existing is not None:
+            return existing
+        record["tags"] = [tag]
+        record["selector_types"] = [record["selector_type"]]
+        self._records[record["node_id"]] = record
+        return record
+    
+    def __len__(self) -> int:
+        return len(self._records)
+
+# single_pass: one page.evaluate for the whole analysis; per_element: one CDP round trip
+# per element property (slow on large pages, kept for comparison)
+EXTRACTION_MODES = ("single_pass", "per_element")
+
+# browser: Chromium from the pool; parser: fetch the HTML and parse it with lxml (static and
+# server-rendered pages, saved fixtures); auto: parser unless the HTML looks client-rendered
+SCRAPE_BACKENDS = ("auto", "browser", "parser")
+
+# adaptive: DOMContentLoaded, then wait until the DOM stops mutating and no fetch/XHR is in
+# flight, bounded by max_wait_ms; networkidle: networkidle plus a fixed 2s (the old behavior)
+READINESS_STRATEGIES = ("adaptive", "networkidle")
+READINESS_DEFAULTS = {
+    "quiet_ms": 500,           # DOM and fetch/XHR idle for this long counts as ready
+    "max_wait_ms": 10000,      # analyze anyway once this budget after navigation start is spent
+    "stale_request_ms": 5000,  # ignore requests open longer than this (long polling, beacons)
+    "poll_ms": 100
+}
+
+# Ad, analytics and session-replay hosts (subdomains included)
+TRACKER_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+    "googleadservices.com", "adservice.google.com", "connect.facebook.net", "hotjar.com",
+    "segment.com", "segment.io", "mixpanel.com", "amplitude.com", "fullstory.com", "clarity.ms",
+    "nr-data.net", "optimizely.com", "demdex.net", "omtrdc.net", "everesttech.net", "criteo.com",
+    "taboola.com", "outbrain.com", "bat.bing.com", "quantserve.com", "scorecardresearch.com",
+    "hs-analytics.net", "adnxs.com", "rubiconproject.com", "pubmatic.com", "moatads.com"
+]
+
+# Requests each scrape profile aborts through Playwright routing. lightweight keeps
+# stylesheets so element positions and visibility match what users see; dom_only also
+# drops CSS and every third-party request. Routing disables the browser HTTP cache, so
+# "full" installs no route at all.
+SCRAPE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "full": {"block_resource_types": [], "block_domains": [], "block_third_party": False},
+    "lightweight": {
+        "block_resource_types": ["image", "media", "font"],
+        "block_domains": TRACKER_DOMAINS,
+        "block_third_party": False
+    },
+    "dom_only": {
+        "block_resource_types": ["image", "media", "font", "stylesheet"],
+        "block_domains": TRACKER_DOMAINS,
+        "block_third_party": True
+    }
+}
+
+# Installed before page scripts run; records when the DOM last changed
+MUTATION_TRACKER_SCRIPT = """
+window.__specweaverLastMutation = 0;
+new MutationObserver(() => { window.__specweaverLastMutation = performance.now(); })
+    .observe(document, {subtree: true, childList: true, attributes: true, characterData: true});
+"""
+
+CLICKABLE_SELECTORS = [
+    "button", "a[href]", "input[type='submit']", "input[type='button']",
+    "[role='button']", "[onclick]", "[tabindex]"
+]
+INPUT_SELECTORS = ["input", "textarea", "select", "[contenteditable='true']"]
+
+# Structural path of an element (tag:nth-of-type chain from <html>). Hashed into the
+# node_id that identifies one DOM node across selectors and sections during a scrape.
+DOM_PATH_FUNCTION = """
+(el) => {
+    const parts = [];
+    for (let node = el; node && node.nodeType === 1; node = node.parentElement) {
+        let position = 1;
+        for (let sibling = node.previousElementSibling; sibling; sibling = sibling.previousElementSibling) {
+            if (sibling.tagName === node.tagName) position++;
+        }
+        parts.unshift(node.tagName.toLowerCase() + ':nth-of-type(' + position + ')');
+    }
+    return parts.join(' > ');
+}
+"""
+
+# Collects everything the _discover_* methods find in one in-page pass. Element facts are
+# stored once in `nodes`; sections hold [node index, selector_type] references so an
+# element matched by several selectors or sections is serialized only once.
+SINGLE_PASS_SCRIPT = """
+({clickable, inputs}) => {
+    const domPath = """ + DOM_PATH_FUNCTION.strip() + """;
+    const nodes = [];
+    const index = new Map();
+    const ref = (el) => {
+        if (index.has(el)) return index.get(el);
+        const tag = el.tagName.toLowerCase();
+        const box = el.getBoundingClientRect();
+        let selector = tag + ':nth-child(n)';
+        if (el.id) selector = '#' + el.id;
+        else if (el.classList.length) selector = tag + '.' + Array.from(el.classList).join('.');
+        nodes.push({
+            tag,
+            type: typeof el.type === 'string' ? el.type : '',
+            text: el.textContent?.trim() || '',
+            placeholder: typeof el.placeholder === 'string' ? el.placeholder : '',
+            aria_label: el.getAttribute('aria-label') || '',
+            role: el.getAttribute('role') || '',
+            selector,
+            href: typeof el.href === 'string' ? el.href : '',
+            path: domPath(el),
+            position: {x: box.x, y: box.y, width: box.width, height: box.height}
+        });
+        index.set(el, nodes.length - 1);
+        return nodes.length - 1;
+    };
+    const all = (root, selector) => Array.from(root.querySelectorAll(selector));
+    const refs = (root, selector, selectorType) => all(root, selector).map(el => [ref(el), selectorType]);
+    const links = (containers, selectorType) =>
+        all(document, containers).flatMap(container => refs(container, 'a', selectorType));
+    const attr = (el, name, fallback) => {
+        const value = el[name];  // a field named "action" shadows form.action
+        return typeof value === 'string' && value ? value : (el.getAttribute(name) || fallback);
+    };
+
+    const elements = {
+        clickable: clickable.flatMap(selector => refs(document, selector, selector)),
+        input: inputs.flatMap(selector => refs(document, selector, selector))
+    };
+    const forms = all(document, 'form').map(form => {
+        const submit = form.querySelector("input[type='submit'], button[type='submit'], button:not([type])");
+        return {
+            action: attr(form, 'action', ''),
+            method: attr(form, 'method', 'get'),
+            fields: refs(form, 'input, textarea, select', 'form_field'),
+            submit_button: submit ? ref(submit) : null
+        };
+    });
+    const navigation = {
+        main_menu: links("nav, [role='navigation'], .nav, .navigation, .menu", 'navigation'),
+        breadcrumbs: links("[role='breadcrumb'], .breadcrumb, .breadcrumbs", 'breadcrumb'),
+        pagination: links(".pagination, .pager, [role='navigation']", 'pagination'),
+        tabs: refs(document, "[role='tab'], .tab, .tabs", 'tab')
+    };
+    const interactions = all(document, '[onclick], [onchange], [onsubmit], [onload]').map(el =>
+        [ref(el), 'interactive', ['onclick', 'onchange', 'onsubmit'].filter(name => el[name])]);
+    const content = {
+        headings: all(document, 'h1, h2, h3, h4, h5, h6')
+            .map(el => ({text: el.textContent?.trim() || '', level: parseInt(el.tagName.charAt(1))}))
+            .filter(heading => heading.text),
+        paragraphs: [],
+        lists: [],
+        images: all(document, 'img').map(el => ({src: el.src || '', alt: el.alt || ''})).filter(img => img.src),
+        tables: []
+    };
+    const accessibility = {
+        aria_labels: all(document, '[aria-label], [aria-labelledby]')
+            .map(el => ({aria_label: el.getAttribute('aria-label') || '',
+                         aria_labelledby: el.getAttribute('aria-labelledby') || ''}))
+            .filter(entry => entry.aria_label || entry.aria_labelledby),
+        roles: all(document, '[role]').map(el => el.getAttribute('role') || '').filter(Boolean),
+        landmarks: []
+    };
+    const perf = performance.getEntriesByType('navigation')[0];
+    return {
+        title: document.title,
+        nodes, elements, forms, navigation, interactions, content, accessibility,
+        performance: {
+            load_time: perf ? perf.loadEventEnd - perf.loadEventStart : 0,
+            resource_count: performance.getEntriesByType('resource').length,
+            dom_size: document.querySelectorAll('*').length
+        }
+    };
+}
+"""
+
+
+class _RequestTracker:
+    """In-flight fetch/XHR requests of a page, from Playwright request events"""
+    
+    def __init__(self, page: Page):
+        self.page = page
+        self.pending: Dict[Any, float] = {}
+        self.last_activity = time.perf_counter()
+        page.on("request", self._started)
+        page.on("requestfinished", self._finished)
+        page.on("requestfailed", self._finished)
+    
+    def _started(self, request) -> None:
+        if request.resource_type in ("fetch", "xhr"):
+            self.pending[request] = self.last_activity = time.perf_counter()
+    
+    def _finished(self, request) -> None:
+        if self.pending.pop(request, None) is not None:
+            self.last_activity = time.perf_counter()
+    
+    def active(self, stale_after_s: float) -> int:
+        now = time.perf_counter()
+        return sum(1 for started in self.pending.values() if now - started < stale_after_s)
+    
+    def detach(self) -> None:
+        self.page.remove_listener("request", self._started)
+        self.page.remove_listener("requestfinished", self._finished)
+        self.page.remove_listener("requestfailed", self._finished)
+
+
+def _site(host: str) -> str:
+    """Registrable domain approximation (example.co.uk, example.com) for first/third-party checks"""
+    labels = host.lower().rstrip(".").split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in ("co", "com", "org", "net", "ac", "gov", "edu"):
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+def _host_matches(host: str, domains) -> bool:
+    return any(host == domain or host.endswith("." + domain) for domain in domains)
+
+
+class _ResourceBlocker:
+    """Aborts requests a scrape profile excludes and counts what was blocked"""
+    
+    def __init__(self, name: str, profile: Dict[str, Any]):
+        self.name = name
+        self.resource_types = set(profile.get("block_resource_types", []))
+        self.domains = [domain.lower() for domain in profile.get("block_domains", [])]
+        self.third_party = profile.get("block_third_party", False)
+        self.allow_domains = [domain.lower() for domain in profile.get("allow_domains", [])]
+        self.reset("")
+    
+    @property
+    def active(self) -> bool:
+        return bool(self.resource_types or self.domains or self.third_party)
+    
+    def reset(self, url: str) -> None:
+        """Start counting for a navigation to url"""
+        self.site = _site(urlparse(url).hostname or "")
+        self.allowed = 0
+        self.by_reason: Dict[str, int] = {}
+        self.by_type: Dict[str, int] = {}
+        self.by_host: Dict[str, int] = {}
+    
+    def reason(self, request) -> Optional[str]:
+        """Why a request is blocked, or None to let it through"""
+        parsed = urlparse(request.url)
+        if parsed.scheme not in ("http", "https"):
+            return None
+        if request.is_navigation_request() and request.frame.parent_frame is None:
+            return None  # the page itself
+        host = (parsed.hostname or "").lower()
+        if _host_matches(host, self.allow_domains):
+            return None
+        if request.resource_type in self.resource_types:
+            return "resource_type"
+        if _host_matches(host, self.domains):
+            return "tracker_domain"
+        if self.third_party and _site(host) != self.site:
+            return "third_party"
+        return None
+    
+    async def handle(self, route) -> None:
+        request = route.request
+        reason = self.reason(request)
+        if reason is None:
+            self.allowed += 1
+            await route.continue_()
+            return
+        host = urlparse(request.url).hostname or ""
+        self.by_reason[reason] = self.by_reason.get(reason, 0) + 1
+        self.by_type[request.resource_type] = self.by_type.get(request.resource_type, 0) + 1
+        self.by_host[host] = self.by_host.get(host, 0) + 1
+        await route.abort("blockedbyclient")
+    
+    def report(self) -> Dict[str, Any]:
+        return {
+            "profile": self.name,
+            "blocked": sum(self.by_reason.values()),
+            "allowed": self.allowed,
+            "by_reason": dict(self.by_reason),
+            "by_type": dict(self.by_type),
+            "top_blocked_hosts": dict(sorted(self.by_host.items(), key=lambda kv: kv[1], reverse=True)[:10])
+        }
+
+
 class URLScraper:
     """Scrapes website structure using Playwright to discover actual functionality"""
     
-    def __init__(self, headless: bool = True, timeout: int = 30000):
+    def __init__(self,
+                 headless: bool = True,
+                 timeout: int = 30000,
+                 extraction: str = "single_pass",
+                 pool: Optional[BrowserPool] = None,
+                 readiness: str = "adaptive",
+                 readiness_options: Optional[Dict[str, float]] = None,
+                 profile: str = "lightweight",
+                 profile_options: Optional[Dict[str, Any]] = None,
+                 cache: Optional[ScrapeSnapshotCache] = None,
+                 backend: str = "auto"):
+        if backend not in SCRAPE_BACKENDS:
+            raise ValueError(f"backend must be one of {SCRAPE_BACKENDS}, got {backend!r}")
+        if extraction not in EXTRACTION_MODES:
+            raise ValueError(f"extraction must be one of {EXTRACTION_MODES}, got {extraction!r}")
+        if readiness not in READINESS_STRATEGIES:
+            raise ValueError(f"readiness must be one of {READINESS_STRATEGIES}, got {readiness!r}")
+        if profile not in SCRAPE_PROFILES:
+            raise ValueError(f"profile must be one of {tuple(SCRAPE_PROFILES)}, got {profile!r}")
+        self.backend = backend
         self.headless = headless
         self.timeout = timeout
+        self.extraction = extraction
+        self.pool = pool
+        self.readiness = readiness
+        self.readiness_options = {**READINESS_DEFAULTS, **(readiness_options or {})}
+        self._mutation_tracker_page: Optional[Page] = None
+        self.profile = profile
+        self.blocker = _ResourceBlocker(profile, {**SCRAPE_PROFILES[profile], **(profile_options or {})})
+        self._blocker_page: Optional[Page] = None
+        self.cache = cache
+        self._response = None
+        self._backend_reason: Optional[str] = None
         self.browser: Optional[Browser] = None
         self.page: Optional[Page] = None
+        self.element_index = ElementIndex()
+        self._lease = None
+    
+    @property
+    def snapshot_profile(self) -> str:
+        """Snapshot cache profile: the scrape settings that change what an analysis contains"""
+        return f"{self.profile}:{self.backend}:{self.extraction}:{self.readiness}"
     
     async def __aenter__(self):
-        """Async context manager entry"""
+        """Async context manager entry; auto/parser scrapers open a browser only when a page needs one"""
+        if self.backend == "browser":
+            await self._open_browser()
+        return self
+    
+    async def _open_browser(self) -> None:
+        """Lease a context from the pool, or launch a private browser"""
+        if self.page is not None:
+            return
+        if self.pool is not None:
+            self._lease = self.pool.lease()
+            context = await self._lease.__aenter__()
+            self.page = await context.new_page()
+            return
         self.playwright = await async_playwright().start()
         self.browser = await self.playwright.chromium.launch(headless=self.headless)
         self.page = await self.browser.new_page()
         await self.page.set_viewport_size({"width": 1280, "height": 720})
-        return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Async context manager exit"""
+        self.page = None
+        if self._lease is not None:
+            lease, self._lease = self._lease, None
+            await lease.__aexit__(exc_type, exc_val, exc_tb)
+            return
         if self.browser:
             await self.browser.close()
         if hasattr(self, 'playwright'):
             await self.playwright.stop()
     
-    async def scrape_website(self, url: str) -> Dict[str, Any]:
+    async def scrape_website(self, url: str, snapshot: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Scrape website and analyze structure
         
         Args:
             url: Website URL to analyze
+            snapshot: Cached snapshot of url (ScrapeSnapshotCache.get); reused when the
+                rendered DOM is unchanged
             
         Returns:
             Dictionary containing discovered elements and functionality
@@ -49,73 +433,226 @@ class URLScraper:
         try:
             logger.info(f"Starting website analysis for: {url}")
             
-            # Navigate to the page
-            await self.page.goto(url, wait_until="networkidle", timeout=self.timeout)
-            
-            # Wait for page to fully load
-            await asyncio.sleep(2)
-            
-            # Analyze page structure
-            analysis = {
-                "url": url,
-                "title": await self.page.title(),
-                "domain": self._extract_domain(url),
-                "elements": await self._discover_elements(),
-                "forms": await self._discover_forms(),
-                "navigation": await self._discover_navigation(),
-                "interactions": await self._discover_interactions(),
-                "content": await self._discover_content(),
-                "accessibility": await self._discover_accessibility(),
-                "performance": await self._analyze_performance()
-            }
-            
-            logger.info(f"Website analysis completed. Found {len(analysis['elements'])} interactive elements")
+            static = await self._load_static(url) if self.backend != "browser" else None
+            if static is not None:
+                html, headers, timings = static["html"], static["headers"], static["performance"]
+            else:
+                await self._open_browser()
+                timings = await self._navigate(url)
+                html = await self.page.content() if self.cache is not None else None
+                headers = self._response.headers if self._response else {}
+            if snapshot and html is not None and dom_hash(html) == snapshot["dom_hash"]:
+                await asyncio.to_thread(self.cache.mark_validated, snapshot["key"])
+                logger.info(f"DOM of {url} unchanged since the cached snapshot; reusing its analysis")
+                return _from_snapshot(snapshot, "dom_unchanged")
+            if static is not None:
+                analysis = self._analyze_document(static["root"], url)
+            else:
+                analysis = await self.analyze_page(url)
+            analysis["performance"].update(timings)
+            logger.info(f"Website analysis completed. Found {len(analysis['elements'])} interactive elements "
+                        f"({timings['backend']} backend, ready after {timings['time_to_ready_ms']:.0f}ms)")
+            if html is not None and self.cache is not None:
+                await asyncio.to_thread(self.cache.put, url, self.snapshot_profile, analysis, html,
+                                        headers.get("etag"), headers.get("last-modified"))
+                analysis["snapshot"] = {"source": "live", "status": "stored"}
             return analysis
             
         except Exception as e:
             logger.error(f"Failed to scrape website {url}: {e}")
             return self._create_fallback_analysis(url)
     
+    async def _load_static(self, url: str) -> Optional[Dict[str, Any]]:
+        """Fetched and parsed HTML for the parser backend, or None when auto decides the page needs a browser"""
+        start = time.perf_counter()
+        try:
+            html, headers = await asyncio.to_thread(_fetch_html, url, self.timeout / 1000)
+            root = parse(html)
+        except Exception as e:
+            if self.backend == "parser":
+                raise
+            logger.info(f"Loading {url} without a browser failed ({e}); using the browser backend")
+            self._backend_reason = "static load failed"
+            return None
+        reason = client_rendered_reason(root) if self.backend == "auto" else None
+        if reason:
+            logger.info(f"{url} looks client-rendered ({reason}); using the browser backend")
+            self._backend_reason = reason
+            return None
+        return {
+            "html": html,
+            "headers": headers,
+            "root": root,
+            "performance": {
+                "backend": "parser",
+                "time_to_ready_ms": (time.perf_counter() - start) * 1000
+            }
+        }
+    
+    async def _navigate(self, url: str) -> Dict[str, Any]:
+        """Load url and wait until it is ready to analyze; returns readiness timings and blocked requests"""
+        start = time.perf_counter()
+        self.blocker.reset(url)
+        if self.blocker.active and self._blocker_page is not self.page:
+            await self.page.route("**/*", self.blocker.handle)
+            self._blocker_page = self.page
+        if self.readiness == "networkidle":
+            self._response = await self.page.goto(url, wait_until="networkidle", timeout=self.timeout)
+            await asyncio.sleep(2)
+            reason = "networkidle"
+        else:
+            if self._mutation_tracker_page is not self.page:
+                await self.page.add_init_script(MUTATION_TRACKER_SCRIPT)
+                self._mutation_tracker_page = self.page
+            tracker = _RequestTracker(self.page)
+            try:
+                self._response = await self.page.goto(url, wait_until="domcontentloaded", timeout=self.timeout)
+                reason = await self._wait_until_quiet(tracker, start)
+            finally:
+                tracker.detach()
+        return {
+            "backend": "browser",
+            "backend_reason": self._backend_reason,
+            "readiness": self.readiness,
+            "ready_reason": reason,
+            "time_to_ready_ms": (time.perf_counter() - start) * 1000,
+            "resource_blocking": self.blocker.report()
+        }
+    
+    async def _wait_until_quiet(self, tracker: _RequestTracker, start: float) -> str:
+        """Poll until DOM mutations and fetch/XHR traffic have been idle for quiet_ms"""
+        options = self.readiness_options
+        quiet_s = options["quiet_ms"] / 1000
+        stale_s = options["stale_request_ms"] / 1000
+        deadline = start + options["max_wait_ms"] / 1000
+        while time.perf_counter() < deadline:
+            try:
+                dom_idle_ms = await self.page.evaluate(
+                    "() => performance.now() - (window.__specweaverLastMutation || 0)")
+            except Exception:
+                dom_idle_ms = 0  # context replaced by a client-side redirect; keep waiting
+            network_idle_s = time.perf_counter() - tracker.last_activity
+            if dom_idle_ms >= options["quiet_ms"] and tracker.active(stale_s) == 0 and network_idle_s >= quiet_s:
+                return "quiescent"
+            await asyncio.sleep(options["poll_ms"] / 1000)
+        return "budget"
+    
+    async def analyze_page(self, url: str) -> Dict[str, Any]:
+        """Analyze the page that is already loaded, using the configured extraction mode"""
+        self.element_index = ElementIndex()
+        if self.extraction == "single_pass":
+            return await self._analyze_single_pass(url)
+        
+        return {
+            "url": url,
+            "title": await self.page.title(),
+            "domain": self._extract_domain(url),
+            "elements": await self._discover_elements(),
+            "forms": await self._discover_forms(),
+            "navigation": await self._discover_navigation(),
+            "interactions": await self._discover_interactions(),
+            "content": await self._discover_content(),
+            "accessibility": await self._discover_accessibility(),
+            "performance": await self._analyze_performance()
+        }
+    
+    async def _analyze_single_pass(self, url: str) -> Dict[str, Any]:
+        """Same analysis as the per-element path from a single page.evaluate payload"""
+        payload = await self.page.evaluate(SINGLE_PASS_SCRIPT, {
+            "clickable": CLICKABLE_SELECTORS,
+            "inputs": INPUT_SELECTORS
+        })
+        return self._analysis_from_payload(url, payload)
+    
+    def analyze_html(self, html: str, url: str = "about:blank") -> Dict[str, Any]:
+        """Analyze saved or fetched HTML with the parser backend; no browser involved"""
+        return self._analyze_document(parse(html), url)
+    
+    def _analyze_document(self, root, url: str) -> Dict[str, Any]:
+        self.element_index = ElementIndex()
+        return self._analysis_from_payload(url, extract_payload(root, url, CLICKABLE_SELECTORS, INPUT_SELECTORS))
+    
+    def _analysis_from_payload(self, url: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Analysis dict from a SINGLE_PASS_SCRIPT payload (or its html_analyzer twin)"""
+        nodes = payload["nodes"]
+        
+        def record(i: int, selector_type: str, tag: str) -> Dict[str, Any]:
+            facts = nodes[i]
+            node_id = _node_id(facts["path"])
+            return (self.element_index.tag(node_id, tag, selector_type)
+                    or self.element_index.add(self._element_from_facts(facts, selector_type, node_id), tag))
+        
+        def expand(refs, tag: Optional[str] = None) -> List[Dict[str, Any]]:
+            return _unique([record(i, selector_type, tag or selector_type) for i, selector_type in refs])
+        
+        elements = _unique(expand(payload["elements"]["clickable"], "clickable")
+                           + expand(payload["elements"]["input"], "input"))
+        
+        forms = []
+        for form in payload["forms"]:
+            submit = form["submit_button"]
+            forms.append({
+                "action": form["action"],
+                "method": form["method"],
+                "fields": expand(form["fields"]),
+                "submit_button": record(submit, "submit_button", "submit_button") if submit is not None else None
+            })
+        
+        interactions = []
+        for i, selector_type, events in payload["interactions"]:
+            event_info = record(i, selector_type, selector_type)
+            event_info["events"] = events
+            interactions.append(event_info)
+        
+        return {
+            "url": url,
+            "title": payload["title"],
+            "domain": self._extract_domain(url),
+            "elements": elements,
+            "forms": forms,
+            "navigation": {section: expand(refs) for section, refs in payload["navigation"].items()},
+            "interactions": _unique(interactions),
+            "content": payload["content"],
+            "accessibility": payload["accessibility"],
+            "performance": payload["performance"]
+        }
+    
     async def _discover_elements(self) -> List[Dict[str, Any]]:
         """Discover all interactive elements on the page"""
         elements = []
         
         # Find all clickable elements
-        clickable_selectors = [
-            "button", "a[href]", "input[type='submit']", "input[type='button']",
-            "[role='button']", "[onclick]", "[tabindex]"
-        ]
-        
-        for selector in clickable_selectors:
+        for selector in CLICKABLE_SELECTORS:
             try:
                 found_elements = await self.page.query_selector_all(selector)
                 for elem in found_elements:
-                    element_info = await self._extract_element_info(elem, selector)
+                    element_info = await self._extract_element_info(elem, selector, "clickable")
                     if element_info:
                         elements.append(element_info)
             except Exception as e:
                 logger.warning(f"Failed to analyze selector {selector}: {e}")
         
         # Find form inputs
-        input_selectors = [
-            "input", "textarea", "select", "[contenteditable='true']"
-        ]
-        
-        for selector in input_selectors:
+        for selector in INPUT_SELECTORS:
             try:
                 found_elements = await self.page.query_selector_all(selector)
                 for elem in found_elements:
-                    element_info = await self._extract_element_info(elem, selector)
+                    element_info = await self._extract_element_info(elem, selector, "input")
                     if element_info:
                         elements.append(element_info)
             except Exception as e:
                 logger.warning(f"Failed to analyze input selector {selector}: {e}")
         
-        return elements
+        return _unique(elements)
     
-    async def _extract_element_info(self, element, selector_type: str) -> Optional[Dict[str, Any]]:
-        """Extract detailed information about an element"""
+    async def _extract_element_info(self, element, selector_type: str, tag: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Extract detailed information about an element (once per DOM node, later matches only add a tag)"""
         try:
+            node_id = _node_id(await element.evaluate(DOM_PATH_FUNCTION))
+            known = self.element_index.tag(node_id, tag or selector_type, selector_type)
+            if known is not None:
+                return known
+            
             # Get element properties
             tag_name = await element.evaluate("el => el.tagName.toLowerCase()")
             element_type = await element.evaluate("el => el.type || ''")
@@ -123,45 +660,56 @@ class URLScraper:
             placeholder = await element.evaluate("el => el.placeholder || ''")
             aria_label = await element.evaluate("el => el.getAttribute('aria-label') || ''")
             role = await element.evaluate("el => el.getAttribute('role') || ''")
+            href = await element.evaluate("el => typeof el.href === 'string' ? el.href : ''")
             
             # Get element position and size
             bounding_box = await element.bounding_box()
             
-            # Determine element category
-            category = self._categorize_element(tag_name, element_type, role)
-            
-            # Generate test-friendly name
-            test_name = self._generate_test_name(text_content, placeholder, aria_label, tag_name)
-            
             # Create unique selector
             selector = await self._generate_unique_selector(element)
             
-            element_info = {
+            element_info = self._element_from_facts({
                 "tag": tag_name,
                 "type": element_type,
-                "category": category,
                 "text": text_content,
                 "placeholder": placeholder,
                 "aria_label": aria_label,
                 "role": role,
-                "test_name": test_name,
                 "selector": selector,
+                "href": href,
                 "position": {
                     "x": bounding_box["x"] if bounding_box else 0,
                     "y": bounding_box["y"] if bounding_box else 0,
                     "width": bounding_box["width"] if bounding_box else 0,
                     "height": bounding_box["height"] if bounding_box else 0
-                },
-                "interactive": self._is_interactive(tag_name, element_type, role),
-                "selector_type": selector_type
-            }
-            
-            return element_info
+                }
+            }, selector_type, node_id)
+            return self.element_index.add(element_info, tag or selector_type)
             
         except Exception as e:
             logger.warning(f"Failed to extract element info: {e}")
             return None
     
+    def _element_from_facts(self, facts: Dict[str, Any], selector_type: str, node_id: str) -> Dict[str, Any]:
+        """Element record (category, test name, interactivity) from raw DOM facts"""
+        tag_name, element_type, role = facts["tag"], facts["type"], facts["role"]
+        return {
+            "node_id": node_id,
+            "tag": tag_name,
+            "type": element_type,
+            "category": self._categorize_element(tag_name, element_type, role),
+            "text": facts["text"],
+            "placeholder": facts["placeholder"],
+            "aria_label": facts["aria_label"],
+            "role": role,
+            "test_name": self._generate_test_name(facts["text"], facts["placeholder"], facts["aria_label"], tag_name),
+            "selector": facts["selector"],
+            "href": facts["href"],
+            "position": facts["position"],
+            "interactive": self._is_interactive(tag_name, element_type, role),
+            "selector_type": selector_type
+        }
+    
     def _categorize_element(self, tag: str, element_type: str, role: str) -> str:
         """Categorize element based on its properties"""
         if tag == "button" or role == "button":
@@ -265,7 +813,7 @@ class URLScraper:
         except Exception as e:
             logger.warning(f"Failed to discover form fields: {e}")
         
-        return fields
+        return _unique(fields)
     
     async def _find_submit_button(self, form) -> Optional[Dict[str, Any]]:
         """Find the submit button for a form"""
@@ -325,7 +873,7 @@ class URLScraper:
         except Exception as e:
             logger.warning(f"Failed to discover navigation: {e}")
         
-        return navigation
+        return {section: _unique(links) for section, links in navigation.items()}
     
     async def _discover_interactions(self) -> List[Dict[str, Any]]:
         """Discover interactive behaviors and events"""
@@ -349,7 +897,7 @@ class URLScraper:
         except Exception as e:
             logger.warning(f"Failed to discover interactions: {e}")
         
-        return interactions
+        return _unique(interactions)
     
     async def _discover_content(self) -> Dict[str, Any]:
         """Discover page content structure"""
@@ -467,141 +1015,98 @@ class URLScraper:
             "error": "Failed to analyze website structure"
         }
 
-async def scrape_website_sync(url: str, headless: bool = True) -> Dict[str, Any]:
-    """Synchronous wrapper for website scraping"""
-    async with URLScraper(headless=headless) as scraper:
-        return await scraper.scrape_website(url)
+def _fetch_html(url: str, timeout: float) -> tuple:
+    """(HTML, lowercased response headers) of url over HTTP or from a file:// fixture"""
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0 (compatible; SpecWeaver)"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        content_type = response.headers.get_content_type()
+        if content_type not in ("text/html", "application/xhtml+xml"):
+            raise ValueError(f"not an HTML page ({content_type})")
+        charset = response.headers.get_content_charset() or "utf-8"
+        html = response.read().decode(charset, errors="replace")
+        return html, {name.lower(): value for name, value in response.headers.items()}
 
-def scrape_website(url: str, headless: bool = True) -> Dict[str, Any]:
-    """Synchronous function to scrape website"""
-    return asyncio.run(scrape_website_sync(url, headless))
+def analyze_html(html: str, url: str = "about:blank") -> Dict[str, Any]:
+    """Analyze saved HTML (e.g. a fixture file) with the parser backend; no browser involved"""
+    return URLScraper(backend="parser").analyze_html(html, url)
 
-def scrape_website_blocking(url: str, headless: bool = True) -> Dict[str, Any]:
-    """Blocking scraper using Playwright sync API to avoid event loop conflicts."""
-    try:
-        with sync_playwright() as p:
-            browser = p.chromium.launch(headless=headless)
-            page = browser.new_page()
-            page.set_viewport_size({"width": 1280, "height": 720})
-            page.goto(url, wait_until="networkidle", timeout=30000)
-
-            def elem_info(el) -> Dict[str, Any]:
-                tag = el.evaluate("el => el.tagName.toLowerCase()")
-                type_attr = el.get_attribute('type') or ''
-                text = (el.inner_text() or '').strip()
-                placeholder = el.get_attribute('placeholder') or ''
-                aria_label = el.get_attribute('aria-label') or ''
-                role = el.get_attribute('role') or ''
-                bbox = el.bounding_box() or {"x": 0, "y": 0, "width": 0, "height": 0}
-                def categorize(tag: str, t: str, role: str) -> str:
-                    if tag == 'button' or role == 'button':
-                        return 'button'
-                    if tag == 'a' or role == 'link':
-                        return 'link'
-                    if tag == 'input':
-                        if t in ['text', 'email', 'password', 'search']:
-                            return 'text_input'
-                        if t in ['submit', 'button']:
-                            return 'button'
-                        if t in ['checkbox', 'radio']:
-                            return 'selection'
-                        return 'input'
-                    if tag == 'textarea':
-                        return 'text_area'
-                    if tag == 'select':
-                        return 'dropdown'
-                    return 'other'
-                def test_name(text: str, placeholder: str, aria: str, tag: str) -> str:
-                    if text:
-                        return text[:50]
-                    if placeholder:
-                        return f"{placeholder} input"
-                    if aria:
-                        return aria[:50]
-                    return f"{tag} element"
-                # basic selector
-                element_id = el.get_attribute('id')
-                if element_id:
-                    selector = f"#{element_id}"
-                else:
-                    classes = (el.get_attribute('class') or '').strip().replace(' ', '.')
-                    selector = f"{tag}.{classes}" if classes else tag
-                return {
-                    "tag": tag,
-                    "type": type_attr,
-                    "category": categorize(tag, type_attr, role),
-                    "text": text,
-                    "placeholder": placeholder,
-                    "aria_label": aria_label,
-                    "role": role,
-                    "test_name": test_name(text, placeholder, aria_label, tag),
-                    "selector": selector,
-                    "position": bbox,
-                    "interactive": tag in ['button','a','input','textarea','select'] or type_attr in ['button','submit','checkbox','radio'] or role in ['button','link','tab','menuitem'],
-                    "selector_type": tag
-                }
+def _from_snapshot(snapshot: Dict[str, Any], status: str) -> Dict[str, Any]:
+    """Cached analysis annotated with where it came from"""
+    analysis = dict(snapshot["analysis"])
+    analysis["snapshot"] = {
+        "source": "cache",
+        "status": status,
+        "created_at": snapshot["created_at"],
+        "validated_at": snapshot["validated_at"]
+    }
+    return analysis
 
-            clickable = page.query_selector_all("button, a[href], input[type='submit'], input[type='button'], [role='button'], [onclick], [tabindex]")
-            inputs = page.query_selector_all("input, textarea, select, [contenteditable='true']")
-            elements: List[Dict[str, Any]] = []
-            for el in clickable:
-                try:
-                    elements.append(elem_info(el))
-                except Exception:
-                    pass
-            for el in inputs:
-                try:
-                    elements.append(elem_info(el))
-                except Exception:
-                    pass
-
-            # Forms
-            forms: List[Dict[str, Any]] = []
-            for form in page.query_selector_all('form'):
-                fields = []
-                for fld in form.query_selector_all('input, textarea, select'):
-                    try:
-                        fields.append(elem_info(fld))
-                    except Exception:
-                        pass
-                submit = form.query_selector("input[type='submit'], button[type='submit'], button:not([type])")
-                submit_info = elem_info(submit) if submit else None
-                forms.append({
-                    "action": form.get_attribute('action') or '',
-                    "method": form.get_attribute('method') or 'get',
-                    "fields": fields,
-                    "submit_button": submit_info
-                })
-
-            title = page.title()
-            browser.close()
-
-            domain = re.search(r'https?://(?:www\.)?([^/]+)', url)
-            domain = domain.group(1) if domain else url
-            return {
-                "url": url,
-                "title": title,
-                "domain": domain,
-                "elements": elements,
-                "forms": forms,
-                "navigation": {"main_menu": []},
-                "interactions": [],
-                "content": {},
-                "accessibility": {},
-                "performance": {}
-            }
-    except Exception as e:
-        logger.error(f"Blocking scrape failed for {url}: {e}")
-        return {
-            "url": url,
-            "title": "Analysis Failed",
-            "domain": url,
-            "elements": [],
-            "forms": [],
-            "navigation": {},
-            "interactions": [],
-            "content": {},
-            "accessibility": {},
-            "performance": {},
-            "error": str(e)
-        }
+async def scrape_page(url: str,
+                      pool: BrowserPool,
+                      headless: bool = True,
+                      use_cache: Optional[bool] = None,
+                      offline: Optional[bool] = None,
+                      diff: bool = False,
+                      **options) -> Dict[str, Any]:
+    """
+    Analyze url through the snapshot cache; must run on pool's loop (see the facades below)
+
+    A fresh snapshot, or a stale one the server confirms with 304 Not Modified, is
+    returned without leasing a browser. In offline mode only the cache is consulted.
+    use_cache/offline default to the cache's SCRAPE_CACHE_ENABLED/SCRAPE_OFFLINE settings.
+    With diff=True the page is always revalidated and the analysis carries a "diff"
+    against the snapshot it replaces (scrape_diff.diff_analyses).
+    options: URLScraper keyword arguments
+    """
+    use_cache = scrape_cache.enabled if use_cache is None else use_cache
+    offline = scrape_cache.offline if offline is None else offline
+    # Parser and browser snapshots (or other extraction/readiness settings) never stand in for each other
+    profile = URLScraper(**options).snapshot_profile
+    snapshot = None
+    if use_cache or offline or diff:
+        snapshot = await asyncio.to_thread(scrape_cache.get, url, profile)
+    analysis = None
+    if snapshot and offline:
+        analysis = _from_snapshot(snapshot, "offline")
+    elif offline:
+        logger.warning(f"Offline mode: no cached snapshot of {url} ({profile})")
+        analysis = URLScraper(**options)._create_fallback_analysis(url)
+        analysis["error"] = "No cached snapshot available in offline mode"
+        return analysis
+    elif snapshot and snapshot["fresh"] and use_cache and not diff:
+        analysis = _from_snapshot(snapshot, "fresh")
+    elif snapshot and await asyncio.to_thread(scrape_cache.revalidate, snapshot):
+        await asyncio.to_thread(scrape_cache.mark_validated, snapshot["key"])
+        analysis = _from_snapshot(snapshot, "not_modified")
+    if analysis is None:
+        # diff mode stores the new snapshot even with use_cache=False: it is the next baseline
+        cache = scrape_cache if use_cache or diff else None
+        async with URLScraper(headless=headless, pool=pool, cache=cache, **options) as scraper:
+            analysis = await scraper.scrape_website(url, snapshot=snapshot)
+    if diff and not analysis.get("error"):
+        analysis["diff"] = diff_analyses(snapshot["analysis"] if snapshot else None, analysis)
+    return analysis
+
+async def scrape_website_async(url: str, headless: bool = True, **options) -> Dict[str, Any]:
+    """Scrape on the shared browser pool; awaitable from any event loop. options: scrape_page keyword arguments"""
+    pool = pool_for(headless)
+    return await pool.arun(lambda: scrape_page(url, pool, headless, **options))
+
+async def scrape_website_sync(url: str, headless: bool = True, **options) -> Dict[str, Any]:
+    """Deprecated: despite its name this has always been a coroutine; use scrape_website_async"""
+    warnings.warn("scrape_website_sync is deprecated; use scrape_website_async",
+                  DeprecationWarning, stacklevel=2)
+    return await scrape_website_async(url, headless, **options)
+
+def scrape_website(url: str, headless: bool = True, **options) -> Dict[str, Any]:
+    """
+    Blocking facade over scrape_page for threads without an event loop (CLI, worker,
+    threadpool). Inside a running loop use scrape_website_async instead.
+    options: scrape_page keyword arguments
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        pool = pool_for(headless)
+        return pool.run(lambda: scrape_page(url, pool, headless, **options))
+    raise RuntimeError("scrape_website() would block the running event loop; await scrape_website_async()")
@@ -0,0 +1,88 @@
+"""
+Incremental JSON parsing - emit elements of a streamed JSON array as soon as each one closes
+"""
+import json
+import logging
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class IncrementalJSONArrayParser:
+    """
+    Feed LLM output chunk by chunk; every completed top-level element of the first
+    JSON array is returned as soon as its closing bracket arrives. Leading prose and
+    code fences are skipped. If the document is a single object instead of an array,
+    that object is returned once it closes.
+    """
+
+    def __init__(self):
+        self._buf: List[str] = []       # text of the element currently being read
+        self._depth = 0                 # nesting depth relative to the document root
+        self._in_string = False
+        self._escape = False
+        self._root: Optional[str] = None  # "[" or "{" once the document has started
+        self._done = False
+        self.errors = 0
+
+    @property
+    def done(self) -> bool:
+        """True once the top-level array/object has closed"""
+        return self._done
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Consume a chunk and return any elements completed by it"""
+        completed: List[Any] = []
+        for ch in chunk:
+            if self._done:
+                break
+            if self._root is None:
+                if ch in "[{":
+                    self._root = ch
+                    self._depth = 1
+                    if ch == "{":
+                        self._buf.append(ch)
+                continue
+
+            if (self._depth >= 2 or self._root == "{" or self._in_string
+                    or (self._depth == 1 and not ch.isspace() and ch not in ",]")):
+                self._buf.append(ch)
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1 and self._root == "[":
+                        # top-level scalar string element
+                        completed.extend(self._flush())
+                continue
+
+            if ch == '"':
+                self._in_string = True
+            elif ch in "[{":
+                self._depth += 1
+            elif ch in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._root == "[":
+                    completed.extend(self._flush())
+                elif self._depth == 0:
+                    completed.extend(self._flush())
+                    self._done = True
+            elif ch == "," and self._depth == 1 and self._root == "[":
+                completed.extend(self._flush())
+        return completed
+
+    def _flush(self) -> List[Any]:
+        text = "".join(self._buf).strip()
+        self._buf = []
+        if not text:
+            return []
+        try:
+            return [json.loads(text)]
+        except json.JSONDecodeError as e:
+            self.errors += 1
+            logger.warning(f"Skipping malformed streamed JSON element: {e}")
+            return []
@@ -28,13 +28,11 @@ from __future__ import annotations
 import argparse
 import asyncio
 import json
+import os
 from typing import Dict, Any
 from pathlib import Path
 
-from backend.core.requirement_parser import RequirementParser
-from backend.core.llm_orchestrator import LLMOrchestrator
-from backend.core.test_generator import TestCaseGenerator
-from backend.core.code_synthesizer import CodeSynthesizer
+from backend.core.components import components
 from backend.core.schemas import RequirementGraph, TestSuite, ExecutionConfig
 
 # Minimal MCP protocol structures
@@ -61,7 +59,7 @@ async def mcp_handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
             if story_md is None:
                 raise ToolError("invalid_params", "story_md is required")
             try:
-                req = RequirementParser(LLMOrchestrator()).parse(story_text=story_md)
+                req = components.parser.parse(story_text=story_md)
             except Exception as e:
                 raise ToolError("parse_error", str(e))
             return {"ok": True, "result": req.model_dump()}
@@ -72,7 +70,7 @@ async def mcp_handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
                 raise ToolError("invalid_params", "requirement_graph object is required")
             requirement_graph = RequirementGraph(**rg)
             coverage = params.get("coverage", "comprehensive")
-            suite = TestCaseGenerator(LLMOrchestrator()).generate(requirement_graph, coverage=coverage)
+            suite = components.generator().generate(requirement_graph, coverage=coverage)
             return {"ok": True, "result": suite.model_dump()}
 
         if method == "synthesize_scripts":
@@ -87,7 +85,7 @@ async def mcp_handle_request(request: Dict[str, Any]) -> Dict[str, Any]:
                 apiMode=params.get("api_mode", "mock"),
             )
             out_dir = Path(params.get("out_dir", "tests/generated/mcp"))
-            files = CodeSynthesizer().synthesize(requirement_graph, suite, cfg, out_dir)
+            files = components.synthesizer.synthesize(requirement_graph, suite, cfg, out_dir)
             return {"ok": True, "result": {k: str(v) for k, v in files.items()}}
 
         if method == "run_tests":
@@ -193,6 +191,9 @@ def main() -> None:
     parser.add_argument("--port", type=int, default=8765)
     args = parser.parse_args()
 
+    components.warmup()
+    if os.getenv("CONFIG_HOT_RELOAD", "true").lower() != "false":
+        components.start_watching()
     if args.transport == "stdio":
         asyncio.run(stdio_server())
     else:
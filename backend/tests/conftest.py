@@ -0,0 +1,36 @@
+"""
+Backend unit test configuration: the API imports core.* from backend/, and stores
+write under a throwaway working directory instead of the repo's artifacts/
+"""
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+FIXTURES_DIR = Path(__file__).resolve().parent / "fixtures"
+
+for path in (BACKEND_DIR / "api" / "api", BACKEND_DIR):
+    if str(path) not in sys.path:
+        sys.path.insert(0, str(path))
+
+_workdir = tempfile.mkdtemp(prefix="specweaver-tests-")
+os.environ.setdefault("RUN_STORE_URL", f"sqlite:///{_workdir}/specweaver.sqlite")
+os.environ.setdefault("METRICS_LOG_DIR", f"{_workdir}/metrics")
+os.environ.setdefault("SCRAPE_CACHE_DIR", f"{_workdir}/scrape_cache")
+os.environ["RUN_EVENTS_BACKEND"] = "memory"
+os.environ.pop("REDIS_URL", None)
+os.chdir(_workdir)
+
+
+@pytest.fixture(scope="session")
+def page_url():
+    """URL tests/fixtures/shop.html is analyzed as"""
+    return "https://shop.example.com/shop"
+
+
+@pytest.fixture(scope="session")
+def shop_html():
+    return (FIXTURES_DIR / "shop.html").read_text(encoding="utf-8")
@@ -0,0 +1,32 @@
+"""
+execute_tests (BackgroundTasks runs): a hung pytest process is killed after RUN_TIMEOUT_SECONDS
+"""
+import asyncio
+
+import app as api
+from core.run_store import run_store
+
+HUNG_SUITE = {
+    "conftest.py": (
+        "def pytest_addoption(parser):\n"
+        "    parser.addoption('--ui-mode')\n"
+        "    parser.addoption('--api-mode')\n"
+    ),
+    "test_hung.py": "import time\n\n\ndef test_hangs():\n    time.sleep(60)\n"
+}
+
+
+def test_hung_run_times_out_and_fails(tmp_path, monkeypatch):
+    (tmp_path / "tests").mkdir()
+    for name, source in HUNG_SUITE.items():
+        (tmp_path / "tests" / name).write_text(source)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("RUN_TIMEOUT_SECONDS", "2")
+    run_store.update_run("hung-run", {"id": "hung-run", "status": "queued"})
+
+    asyncio.run(api.execute_tests("hung-run", api.RunRequest(session_id="s", parallel=False)))
+
+    run = run_store.get_run("hung-run")
+    assert run["status"] == "failed"
+    assert run["exit_code"] == -1
+    assert "timed out after 2 seconds" in run["errors"]
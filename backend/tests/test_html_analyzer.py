@@ -0,0 +1,107 @@
+"""
+Parser-backend analysis of a saved page (tests/fixtures/shop.html), and the auto backend's fallback
+"""
+import asyncio
+
+import pytest
+
+from core import url_scraper
+from core.scrape_cache import ScrapeSnapshotCache
+from core.url_scraper import URLScraper, analyze_html
+
+
+@pytest.fixture(scope="module")
+def analysis(shop_html, page_url):
+    return analyze_html(shop_html, page_url)
+
+
+def _by_selector(analysis, selector):
+    return [element for element in analysis["elements"] if element["selector"] == selector]
+
+
+def test_analysis_shape(analysis, page_url):
+    assert analysis["url"] == page_url
+    assert analysis["title"] == "Luma Outfitters - Shop"
+    assert analysis["domain"] == "shop.example.com"
+    assert analysis["performance"]["dom_size"] > 0
+    for key in ("elements", "forms", "navigation", "interactions", "content", "accessibility"):
+        assert key in analysis
+
+
+def test_node_ids_are_unique_and_stable(shop_html, page_url, analysis):
+    node_ids = [element["node_id"] for element in analysis["elements"]]
+    assert all(node_ids)
+    assert len(node_ids) == len(set(node_ids))
+    again = analyze_html(shop_html, page_url)
+    assert [element["node_id"] for element in again["elements"]] == node_ids
+
+
+def test_each_element_listed_once_with_deduplicated_tags(analysis):
+    for element in analysis["elements"]:
+        assert len(element["tags"]) == len(set(element["tags"])), element
+    # The submit input is clickable, a form field and a submit button, but one element
+    submit = [element for element in analysis["elements"] if element["tag"] == "input" and element["type"] == "submit"]
+    assert len(submit) == 1
+    assert {"clickable", "form_field", "submit_button"} <= set(submit[0]["tags"])
+    # Identical buttons keep one entry each
+    assert len(_by_selector(analysis, "button.add-to-cart")) == 2
+
+
+def test_forms(analysis):
+    search, newsletter = analysis["forms"]
+    assert search["action"] == "https://shop.example.com/search"
+    assert search["method"] == "get"
+    assert [field["type"] for field in search["fields"]] == ["search"]
+    assert search["submit_button"]["text"] == "Search"
+    assert newsletter["action"] == "https://shop.example.com/subscribe"
+    assert newsletter["method"] == "post"
+    assert [(field["tag"], field["type"]) for field in newsletter["fields"]] == [
+        ("input", "email"), ("select", "select-one"), ("input", "submit")]
+    assert newsletter["fields"][0]["selector"] == "#email"
+    field_ids = {element["node_id"] for element in analysis["elements"]}
+    assert all(field["node_id"] in field_ids for form in analysis["forms"] for field in form["fields"])
+
+
+def test_navigation(analysis):
+    menu = analysis["navigation"]["main_menu"]
+    assert [link["text"] for link in menu] == ["Home", "Women", "Sale"]
+    assert menu[0]["selector"] == "#home"
+    assert menu[1]["href"] == "https://shop.example.com/women"
+    assert [link["text"] for link in analysis["navigation"]["breadcrumbs"]] == ["Home", "New"]
+    # Two "Home" links on the page, told apart by node id
+    assert menu[0]["node_id"] != analysis["navigation"]["breadcrumbs"][0]["node_id"]
+
+
+@pytest.mark.parametrize("html", [
+    "",
+    '<?xml version="1.0" encoding="UTF-8"?>\n<html xmlns="http://www.w3.org/1999/xhtml"><body><a href="/">Home</a></body></html>'
+])
+def test_static_load_of_unusual_documents(monkeypatch, page_url, html):
+    monkeypatch.setattr(url_scraper, "_fetch_html", lambda url, timeout: (html, {}))
+    static = asyncio.run(URLScraper(backend="parser")._load_static(page_url))
+    assert static["root"].tag == "html"
+
+
+def test_auto_backend_falls_back_to_the_browser_when_parsing_fails(monkeypatch, page_url):
+    def broken_parse(html):
+        raise ValueError("unparseable")
+
+    monkeypatch.setattr(url_scraper, "_fetch_html", lambda url, timeout: ("<html></html>", {}))
+    monkeypatch.setattr(url_scraper, "parse", broken_parse)
+    scraper = URLScraper(backend="auto")
+    assert asyncio.run(scraper._load_static(page_url)) is None
+    assert scraper._backend_reason == "static load failed"
+    with pytest.raises(ValueError):
+        asyncio.run(URLScraper(backend="parser")._load_static(page_url))
+
+
+def test_snapshots_are_kept_per_backend(monkeypatch, tmp_path, shop_html, page_url):
+    monkeypatch.setattr(url_scraper, "scrape_cache", ScrapeSnapshotCache(root=str(tmp_path)))
+    monkeypatch.setattr(url_scraper, "_fetch_html", lambda url, timeout: (shop_html, {}))
+    live = asyncio.run(url_scraper.scrape_page(page_url, None, backend="parser"))
+    assert live["snapshot"] == {"source": "live", "status": "stored"}
+    cached = asyncio.run(url_scraper.scrape_page(page_url, None, offline=True, backend="parser"))
+    assert cached["snapshot"]["status"] == "offline"
+    # A parser snapshot does not answer for a browser scrape of the same page
+    missing = asyncio.run(url_scraper.scrape_page(page_url, None, offline=True, backend="browser"))
+    assert missing["error"] == "No cached snapshot available in offline mode"
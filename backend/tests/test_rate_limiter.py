@@ -0,0 +1,50 @@
+"""
+TPM reservations: settled on real usage, handed back when the provider call fails or times out
+"""
+import asyncio
+
+from core.llm_orchestrator import LLMOrchestrator
+from core.rate_limiter import RateLimiter
+
+
+def _limiter():
+    limiter = RateLimiter()
+    limiter.configure({"providers": {"groq": {"rpm": 100, "tpm": 1000}}})
+    return limiter
+
+
+def _tpm(limiter):
+    return limiter.store._buckets["groq:tpm"][0]
+
+
+def test_release_hands_back_the_reservation():
+    limiter = _limiter()
+    assert limiter.acquire("groq", 400)
+    assert 599 < _tpm(limiter) < 601
+    limiter.release("groq", 400)
+    assert _tpm(limiter) > 999
+
+
+def test_settle_charges_actual_usage():
+    limiter = _limiter()
+    assert limiter.acquire("groq", 400)
+    limiter.settle("groq", 400, 100)
+    assert 899 < _tpm(limiter) < 901
+
+
+def test_failed_and_timed_out_calls_release():
+    orchestrator = LLMOrchestrator()
+    orchestrator.rate_limiter = _limiter()
+
+    async def slow(prompt, system, schema):
+        await asyncio.sleep(5)
+
+    async def empty(prompt, system, schema):
+        return None
+
+    for handler in (slow, empty):
+        try:
+            asyncio.run(orchestrator._aguarded_call("groq", handler, "x" * 1600, "", 0.1))
+        except asyncio.TimeoutError:
+            pass
+        assert _tpm(orchestrator.rate_limiter) > 999
@@ -0,0 +1,79 @@
+"""
+/api/runs/{run_id}/events: finished runs close cleanly, disconnects tear down the subscription,
+RQ runs are polled when events are in-process only
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app as api
+from core.run_events import run_events
+from core.run_store import run_store
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api.app) as test_client:
+        yield test_client
+
+
+def _events(body: str):
+    return [line.split(": ", 1)[1] for line in body.splitlines() if line.startswith("event: ")]
+
+
+def test_finished_run_without_buffered_events_closes(client):
+    # e.g. a run finished before an API restart: nothing left in the broker's history
+    run_store.update_run("finished-run", {"id": "finished-run", "status": "completed", "exit_code": 0})
+    with client.stream("GET", "/api/runs/finished-run/events") as response:
+        body = "".join(response.iter_text())
+    assert response.status_code == 200
+    assert _events(body) == ["snapshot"]
+
+
+def test_finished_run_replays_buffered_events(client):
+    run = run_store.update_run("replayed-run", {"id": "replayed-run", "status": "running"})
+    run_events.status(run)
+    run_events.log("replayed-run", ["collected 1 item"])
+    run_events.status(run_store.update_run("replayed-run", {"status": "failed", "exit_code": 1}))
+    with client.stream("GET", "/api/runs/replayed-run/events") as response:
+        body = "".join(response.iter_text())
+    assert _events(body) == ["snapshot", "status", "log", "status"]
+    with client.stream("GET", "/api/runs/replayed-run/events", headers={"Last-Event-ID": "2"}) as response:
+        assert _events("".join(response.iter_text())) == ["snapshot", "status"]
+
+
+def test_unknown_run_is_404(client):
+    assert client.get("/api/runs/no-such-run/events").status_code == 404
+
+
+class _DisconnectedRequest:
+    headers = {}
+
+    async def is_disconnected(self):
+        return True
+
+
+def test_disconnect_closes_subscription(monkeypatch):
+    monkeypatch.setattr(api, "RUN_EVENTS_HEARTBEAT_SECONDS", 0.05)
+    run_store.update_run("live-run", {"id": "live-run", "status": "running"})
+
+    async def consume():
+        response = await api.stream_run_events("live-run", _DisconnectedRequest())
+        return [chunk async for chunk in response.body_iterator]
+
+    chunks = asyncio.run(consume())
+    assert len(chunks) == 1 and chunks[0].startswith("event: snapshot")
+    assert "live-run" not in run_events.broker._subscribers
+
+
+def test_worker_run_status_is_polled_with_in_process_events(client, monkeypatch):
+    # An RQ worker's run: its events never reach this process's broker
+    monkeypatch.setattr(api, "RUN_STATUS_POLL_SECONDS", 0.05)
+    run_store.update_run("worker-run", {"id": "worker-run", "status": "running", "job_id": "job-1"})
+    threading.Timer(0.2, run_store.update_run, ("worker-run", {"status": "completed", "exit_code": 0})).start()
+    with client.stream("GET", "/api/runs/worker-run/events") as response:
+        body = "".join(response.iter_text())
+    assert _events(body) == ["snapshot", "status"]
+    assert '"status": "completed"' in body.split("event: status", 1)[1]
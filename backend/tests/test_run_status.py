@@ -0,0 +1,33 @@
+"""
+GET /api/runs/{run_id}: logs and reports come from the run record, not from whatever is in reports/
+"""
+import asyncio
+
+import app as api
+from core.run_store import run_store
+
+
+def test_only_the_runs_own_files_are_listed(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    (tmp_path / "logs").mkdir()
+    for name in ("junit_run-a.xml", "report_run-a.html", "report_run-a_shard0.html", "junit_run-b.xml"):
+        (tmp_path / "reports" / name).write_text("<x/>")
+    for name in ("pytest_run-a_shard0.log", "pytest_run-b.log"):
+        (tmp_path / "logs" / name).write_text("collected 1 item\n")
+    run_store.update_run("run-a", {
+        "id": "run-a",
+        "status": "completed",
+        "junit_report": "reports/junit_run-a.xml",
+        "html_report": "reports/report_run-a.html",
+        "shards": [
+            {"index": 0, "log_file": "logs/pytest_run-a_shard0.log", "junit": "reports/junit_run-a_shard0.xml",
+             "html_report": "reports/report_run-a_shard0.html"}
+        ]
+    })
+
+    run = asyncio.run(api.get_run_status("run-a"))
+
+    assert [log["file"] for log in run["logs"]] == ["pytest_run-a_shard0.log"]
+    assert [report["url"] for report in run["reports"]] == [
+        "/reports/report_run-a.html", "/reports/report_run-a_shard0.html", "/reports/junit_run-a.xml"]
@@ -0,0 +1,53 @@
+"""
+diff_analyses on edits of tests/fixtures/shop.html: inserted siblings, moved locators, edited labels
+"""
+import pytest
+
+from core.scrape_diff import diff_analyses
+from core.url_scraper import analyze_html
+
+
+@pytest.fixture(scope="module")
+def baseline(shop_html, page_url):
+    return analyze_html(shop_html, page_url)
+
+
+def _diff(baseline, html):
+    return diff_analyses(baseline, analyze_html(html, baseline["url"]))
+
+
+def test_unchanged_page(shop_html, baseline):
+    diff = _diff(baseline, shop_html)
+    assert diff["changed_areas"] == []
+    assert diff["moved_locators"] == []
+
+
+def test_inserted_sibling_is_added_not_moved(shop_html, baseline):
+    # Shifts the node ids of every later link in the menu
+    html = shop_html.replace('<a id="home" href="/">Home</a>',
+                             '<a id="home" href="/">Home</a>\n      <a class="nav-link x" href="/men">Men</a>')
+    diff = _diff(baseline, html)
+    assert diff["moved_locators"] == []
+    assert [entry["text"] for entry in diff["elements"]["added"]] == ["Men"]
+    assert diff["elements"]["removed"] == []
+    assert all(entry["changes"] == ["dom_path"] for entry in diff["elements"]["changed"])
+    assert [entry["text"] for entry in diff["navigation"]["main_menu"]["added"]] == ["Men"]
+    assert "navigation" in diff["changed_areas"]
+
+
+def test_changed_selector_of_the_same_element_is_moved(shop_html, baseline):
+    html = shop_html.replace('<a class="nav-link sale" href="/sale">Sale</a>',
+                             '<a id="sale" class="nav-link sale" href="/sale">Sale</a>')
+    diff = _diff(baseline, html)
+    assert [(entry["old_selector"], entry["new_selector"]) for entry in diff["moved_locators"]] == [
+        ("a.nav-link.sale", "#sale")]
+
+
+def test_edited_label_is_changed_but_not_moved(shop_html, baseline):
+    html = shop_html.replace('<a id="home" href="/">Home</a>', '<a class="nav-link" href="/">Start</a>')
+    diff = _diff(baseline, html)
+    # Paired by node id only, so the new selector is not trusted as a move
+    changed = [entry for entry in diff["elements"]["changed"] if entry["after"]["text"] == "Start"]
+    assert changed[0]["matched_by"] == "node_id"
+    assert {"text", "selector"} <= set(changed[0]["changes"])
+    assert diff["moved_locators"] == []
@@ -0,0 +1,35 @@
+"""
+Schemas sent to providers: local-only keywords stripped, Gemini falls back to JSON mode for free-form objects
+"""
+from core import structured_output
+from core.llm_orchestrator import LLMOrchestrator, LLMProvider
+
+STEPS_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "required": ["action", "params"],
+        "properties": {"action": {"type": "string", "default": "unknown.action"}, "params": {"type": "object"}}
+    }
+}
+
+
+def test_request_schema_drops_local_keywords():
+    schema = structured_output.request_schema(STEPS_SCHEMA)
+    assert schema["items"]["properties"]["action"] == {"type": "string"}
+    assert schema["items"]["properties"]["params"] == {"type": "object"}
+    assert "default" in STEPS_SCHEMA["items"]["properties"]["action"]  # fix() still sees it
+
+
+def test_free_form_objects_are_refused_for_gemini():
+    assert structured_output.request_schema(STEPS_SCHEMA, free_form_objects=False) is None
+    closed = {"type": "object", "properties": {"name": {"type": "string", "default": ""}}}
+    assert structured_output.request_schema(closed, free_form_objects=False) == {
+        "type": "object", "properties": {"name": {"type": "string"}}}
+
+
+def test_gemini_request_without_a_schema_it_cannot_express():
+    orchestrator = LLMOrchestrator()
+    args, system = orchestrator._structured_request(LLMProvider.GEMINI, STEPS_SCHEMA, "system")
+    assert args == {"generation_config": {"response_mime_type": "application/json"}}
+    assert "matching this schema" in system
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+CLI startup benchmark - cold-start latency of `specweaver --help` and `specweaver parse`
+
+Each case runs in a fresh interpreter. `parse` runs with provider API keys removed
+so it measures startup and the local parse path, not network calls. Results are
+appended to artifacts/benchmarks/cli_startup.jsonl so regressions show up over time.
+
+Usage:
+    python scripts/bench_cli_startup.py [--runs 5] [--importtime 15] [--no-record]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HISTORY_FILE = REPO_ROOT / "artifacts" / "benchmarks" / "cli_startup.jsonl"
+PROVIDER_KEYS = ("GROQ_API_KEY", "GOOGLE_API_KEY", "OPENAI_API_KEY")
+SAMPLE_STORY = """As a shopper I want to add items to my cart so that I can buy them later.
+
+Acceptance Criteria:
+- Given I am on a product page When I click "Add to cart" Then the cart count increases
+"""
+
+
+def _env() -> dict:
+    env = {k: v for k, v in os.environ.items() if k not in PROVIDER_KEYS}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    return env
+
+
+def _cases(workdir: Path) -> dict:
+    story = workdir / "story.md"
+    story.write_text(SAMPLE_STORY)
+    cli = [sys.executable, "-m", "backend.cli.specweaver_cli"]
+    return {
+        "help": cli + ["--help"],
+        "parse": cli + ["parse", str(story), "--output", str(workdir / "out")],
+    }
+
+
+def _time_once(cmd: list, cwd: Path) -> float:
+    start = time.perf_counter()
+    subprocess.run(cmd, cwd=cwd, env=_env(), check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return (time.perf_counter() - start) * 1000
+
+
+def _slowest_imports(cmd: list, cwd: Path, top: int) -> list:
+    """Top-level packages by cumulative import time (python -X importtime)"""
+    result = subprocess.run([cmd[0], "-X", "importtime", *cmd[1:]], cwd=cwd, env=_env(),
+                            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    totals: dict = {}
+    for line in result.stderr.splitlines():
+        m = re.match(r"import time:\s+\d+\s+\|\s+(\d+)\s+\|(\s*)(\S+)", line)
+        if m and len(m.group(2)) <= 1:  # top-level imports only
+            package = m.group(3).split(".")[0]
+            totals[package] = totals.get(package, 0) + int(m.group(1))
+    ranked = sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+    return [{"module": name, "ms": round(us / 1000, 1)} for name, us in ranked]
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--runs", type=int, default=5, help="Cold starts per case")
+    ap.add_argument("--importtime", type=int, default=0, metavar="N", help="Show the N slowest top-level imports per case")
+    ap.add_argument("--no-record", action="store_true", help=f"Do not append to {HISTORY_FILE.relative_to(REPO_ROOT)}")
+    args = ap.parse_args()
+
+    record = {"timestamp": datetime.utcnow().isoformat(), "python": sys.version.split()[0], "cases": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        # Scratch working dir that still sees config/, like a CLI run from the repo root
+        (workdir / "config").symlink_to(REPO_ROOT / "config", target_is_directory=True)
+        for name, cmd in _cases(workdir).items():
+            _time_once(cmd, workdir)  # warm the OS file cache / bytecode so runs are comparable
+            samples = [_time_once(cmd, workdir) for _ in range(args.runs)]
+            case = {
+                "median_ms": round(statistics.median(samples), 1),
+                "min_ms": round(min(samples), 1),
+                "max_ms": round(max(samples), 1),
+                "runs": args.runs,
+            }
+            if args.importtime:
+                case["slowest_imports"] = _slowest_imports(cmd, workdir, args.importtime)
+            record["cases"][name] = case
+
+    for name, case in record["cases"].items():
+        print(f"{name:>6}: median {case['median_ms']:.0f} ms (min {case['min_ms']:.0f}, max {case['max_ms']:.0f})")
+        for entry in case.get("slowest_imports", []):
+            print(f"          {entry['module']:<28} {entry['ms']:>8.1f} ms")
+
+    if not args.no_record:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {HISTORY_FILE.relative_to(REPO_ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+URL scraper benchmark - single_pass vs per_element DOM extraction (and the browserless parser)
+
+Loads a synthetic page (default ~2,000 nodes: navigation, forms, buttons, focusable
+cards, headings, images) or a real --url once per mode, then times only the analysis
+step so navigation and the post-load wait don't blur the comparison. Both modes must
+produce the same analysis; any difference is reported. The parser backend is timed on the
+same HTML for reference (it has no layout, so its positions are not compared). Results are
+appended to artifacts/benchmarks/url_scraper.jsonl.
+
+Usage:
+    python scripts/bench_url_scraper.py [--nodes 2000] [--runs 3] [--url URL] [--no-record]
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from backend.core.url_scraper import URLScraper, EXTRACTION_MODES, _fetch_html  # noqa: E402
+
+HISTORY_FILE = REPO_ROOT / "artifacts" / "benchmarks" / "url_scraper.jsonl"
+PIXEL = "data:image/gif;base64,R0lGODlhAQABAAAAACw="
+
+
+def synthetic_page(nodes: int) -> str:
+    """HTML with roughly `nodes` elements spread over every section the scraper inspects"""
+    blocks = max(nodes // 20, 1)  # each block below is ~20 elements
+    parts = ["<html><head><title>Scraper benchmark</title></head><body>",
+             "<nav class='menu'>" + "".join(f"<a href='#nav{i}'>Section {i}</a>" for i in range(20)) + "</nav>",
+             "<ol class='breadcrumb'><li><a href='#'>Home</a></li><li><a href='#'>Shop</a></li></ol>"]
+    for b in range(blocks):
+        parts.append(
+            f"<section id='block{b}'><h2>Block {b}</h2>"
+            f"<div class='card' tabindex='0' role='button' aria-label='Card {b}'><p>Card body {b}</p></div>"
+            f"<img src='{PIXEL}' alt='Image {b}'>"
+            f"<form action='/submit/{b}' method='post'>"
+            f"<input type='text' name='q' placeholder='Search {b}'>"
+            f"<input type='email' name='email' aria-label='Email {b}'>"
+            f"<select name='size'><option>S</option><option>M</option></select>"
+            f"<textarea name='note'></textarea>"
+            f"<input type='checkbox' name='agree'>"
+            f"<button type='submit' class='btn primary'>Send {b}</button></form>"
+            f"<a href='#more{b}' onclick='void 0'>More {b}</a>"
+            f"<div role='tab' class='tab'>Tab {b}</div></section>"
+        )
+    parts.append("<div class='pagination'>" + "".join(f"<a href='#p{i}'>{i}</a>" for i in range(1, 6)) + "</div>")
+    parts.append("</body></html>")
+    return "".join(parts)
+
+
+def _comparable(analysis: dict) -> dict:
+    """Analysis without timing-dependent fields"""
+    return {k: v for k, v in analysis.items() if k != "performance"}
+
+
+async def bench_mode(url: str, mode: str, runs: int) -> tuple:
+    async with URLScraper(headless=True, extraction=mode, backend="browser") as scraper:
+        await scraper.page.goto(url, wait_until="networkidle", timeout=scraper.timeout)
+        samples, analysis = [], None
+        for _ in range(runs):
+            start = time.perf_counter()
+            analysis = await scraper.analyze_page(url)
+            samples.append((time.perf_counter() - start) * 1000)
+    return samples, analysis
+
+
+def bench_parser(url: str, runs: int) -> dict:
+    html, _ = _fetch_html(url, 30)
+    scraper = URLScraper(backend="parser")
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        analysis = scraper.analyze_html(html, url)
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"median_ms": round(statistics.median(samples), 1), "runs": runs, "elements": len(analysis["elements"])}
+
+
+async def run(url: str, runs: int) -> dict:
+    cases, analyses = {}, {}
+    for mode in EXTRACTION_MODES:
+        samples, analyses[mode] = await bench_mode(url, mode, runs)
+        cases[mode] = {
+            "median_ms": round(statistics.median(samples), 1),
+            "min_ms": round(min(samples), 1),
+            "max_ms": round(max(samples), 1),
+            "runs": runs,
+            "elements": len(analyses[mode]["elements"]),
+        }
+    cases["parser"] = bench_parser(url, runs)
+    cases["identical_output"] = _comparable(analyses["single_pass"]) == _comparable(analyses["per_element"])
+    cases["dom_size"] = analyses["single_pass"]["performance"].get("dom_size")
+    return cases
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--nodes", type=int, default=2000, help="Approximate size of the synthetic page")
+    ap.add_argument("--runs", type=int, default=3, help="Analyses per mode")
+    ap.add_argument("--url", help="Benchmark a real page instead of the synthetic one")
+    ap.add_argument("--no-record", action="store_true", help=f"Do not append to {HISTORY_FILE.relative_to(REPO_ROOT)}")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = args.url
+        if not url:
+            page = Path(tmp) / "page.html"
+            page.write_text(synthetic_page(args.nodes))
+            url = page.as_uri()
+        result = asyncio.run(run(url, args.runs))
+
+    for mode in EXTRACTION_MODES:
+        case = result[mode]
+        print(f"{mode:>12}: median {case['median_ms']:.0f} ms (min {case['min_ms']:.0f}, "
+              f"max {case['max_ms']:.0f}), {case['elements']} elements")
+    speedup = result["per_element"]["median_ms"] / max(result["single_pass"]["median_ms"], 0.1)
+    print(f"     speedup: {speedup:.1f}x on {result['dom_size']} DOM nodes")
+    print(f"      parser: median {result['parser']['median_ms']:.0f} ms, {result['parser']['elements']} elements")
+    print(f"   identical: {result['identical_output']}")
+
+    if not args.no_record:
+        record = {"timestamp": datetime.utcnow().isoformat(), "url": args.url or f"synthetic:{args.nodes}", **result}
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        with open(HISTORY_FILE, "a") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"Recorded in {HISTORY_FILE.relative_to(REPO_ROOT)}")
+    return 0 if result["identical_output"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())